@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apps.authentication.revocation import revocation_store
+
+
+class Command(BaseCommand):
+    help = (
+        "Mantiene la tabla token_revocado de la rotación de refresh tokens: la "
+        "crea si no existe o borra los registros vencidos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--create-tables', action='store_true', help='Crea la tabla si no existe.')
+
+    def handle(self, *args, **options):
+        if options['create_tables']:
+            created = revocation_store.create_tables()
+            self.stdout.write(f"Tablas creadas: {', '.join(created) or 'ninguna'}")
+            return
+
+        deleted = revocation_store.prune()
+        self.stdout.write(f"{deleted} tokens revocados vencidos borrados")
@@ -1,3 +1,3 @@
-from apps.core.models import UserGci as User, Agency
+from apps.core.models import UserGci as User, Agency, RevokedToken
 
-__all__ = ['User', 'Agency']
+__all__ = ['User', 'Agency', 'RevokedToken']
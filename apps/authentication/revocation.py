@@ -0,0 +1,93 @@
+import time
+from threading import Lock
+
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+from django.utils import timezone
+
+from .models import RevokedToken
+
+import logging
+logger = logging.getLogger('authentication.revocation')
+
+
+class RevocationStore:
+    """
+    Registro de refresh tokens usados y familias revocadas, en la tabla
+    token_revocado de la BD default.
+
+    revoke inserta el id: la clave primaria hace que solo un request pueda usar
+    cada refresh token, aun entre procesos, sin consultarla antes.
+    is_revoked confirma una familia con una búsqueda por clave primaria, así
+    una revocación hecha por otro proceso se ve de inmediato. Cada refresh
+    cuesta una lectura y una escritura por índice, sin importar cuántas filas
+    tenga la tabla, y las filas vencidas se borran cada
+    REFRESH_REVOCATION_PRUNE_INTERVAL segundos.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._pruned_at = time.monotonic()
+
+    @staticmethod
+    def _alias():
+        return router.db_for_write(RevokedToken)
+
+    @staticmethod
+    def create_tables():
+        """
+        Crea token_revocado si no existe y retorna los nombres de las tablas creadas.
+        """
+        connection = connections[RevocationStore._alias()]
+        if RevokedToken._meta.db_table in connection.introspection.table_names():
+            return []
+        with connection.schema_editor() as editor:
+            editor.create_model(RevokedToken)
+        return [RevokedToken._meta.db_table]
+
+    def is_revoked(self, token_id):
+        return RevokedToken.objects.filter(token_id=token_id, expires_at__gt=timezone.now()).exists()
+
+    def revoke(self, token_id, expires_at):
+        """
+        Registra el id hasta expires_at. Retorna False si ya estaba registrado,
+        es decir, si el refresh token ya se había usado.
+        """
+        self._prune_if_due()
+        try:
+            with transaction.atomic(using=self._alias()):
+                RevokedToken.objects.create(token_id=token_id, expires_at=expires_at)
+        except IntegrityError:
+            return False
+        return True
+
+    def prune(self):
+        """
+        Borra los registros vencidos. Retorna la cantidad borrada.
+        """
+        deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+        with self._lock:
+            self._pruned_at = time.monotonic()
+        if deleted:
+            logger.info("Tokens revocados vencidos borrados: %s", deleted)
+        return deleted
+
+    def _prune_if_due(self):
+        interval = getattr(settings, 'REFRESH_REVOCATION_PRUNE_INTERVAL', 3600)
+        with self._lock:
+            due = time.monotonic() - self._pruned_at >= interval
+            if due:
+                # Evita que varios requests a la vez hagan la misma limpieza
+                self._pruned_at = time.monotonic()
+        if due:
+            try:
+                self.prune()
+            except Exception as e:
+                logger.warning("No se pudieron borrar los tokens revocados vencidos: %s", e)
+
+    def reset(self):
+        with self._lock:
+            self._pruned_at = time.monotonic()
+
+
+revocation_store = RevocationStore()
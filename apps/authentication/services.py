@@ -2,61 +2,70 @@ __all__ = ['AuthenticateService']
 
 import os
 import jwt
+import uuid
+import hashlib
 import datetime
 from types import SimpleNamespace
 from django.core.exceptions import ObjectDoesNotExist
 from django.contrib.auth.hashers import check_password
 
-from .models import Agency, User
+from .models import User
+from .revocation import revocation_store
 from apps.core.services import DatabasesUtils
 
+import logging
+logger = logging.getLogger('authentication.services')
+
 class AuthenticateService:
    
     @staticmethod
     def authenticate_user_dynamic(user_rut, agency_id, password):
         """
-        1. Obtiene la agencia de la base default
+        1. Obtiene la agencia del registro de inmobiliarias (base default)
         2. Configura las conexiones dinámicas y guarda la agencia actual
         3. Busca al usuario en la base de datos dinámica
         4. Retorna el usuario si existe, None si no
         """
         try:
-            # Obtener la agencia de la base default
-            agency = Agency.objects.using('default').get(id=agency_id)
-            
+            # Obtener la agencia desde el registro en memoria de la base default
+            agency = DatabasesUtils.get_agency(agency_id)
+            if agency is None:
+                return None, "Inmobiliaria no encontrada."
+
             # Configurar las conexiones dinámicas y guardar la agencia actual
-            db_alias_gci = f"gci_{agency.name.lower()}"
-            db_alias_gcli = f"gcli_{agency.name.lower()}"
-            
-            DatabasesUtils.get_dynamic_db_connection(db_alias_gci)
-            DatabasesUtils.get_dynamic_db_connection(db_alias_gcli)
-            DatabasesUtils.set_current_agency(agency)
-            
+            DatabasesUtils.get_dynamic_db_connection(agency.gci_alias)
+            DatabasesUtils.get_dynamic_db_connection(agency.gcli_alias)
+
             # Buscar al usuario en la base de datos dinámica
-            user = User.objects.get(rut=user_rut)
+            with DatabasesUtils.tenant_context(agency):
+                user = User.objects.get(rut=user_rut)
             return user, None
             
-        except Agency.DoesNotExist:
-            return None, "Inmobiliaria no encontrada."
         except User.DoesNotExist:
             return None, "Usuario no encontrado en la base de datos dinámica."
     
     @staticmethod
-    def generate_jwt(user, agency_id):
+    def generate_jwt(user, agency_id, family_id=None):
         """
-        Genera un access (15min) y refresh(48hrs) tokens, cada uno con sus claims correspondientes
+        Genera un access (15min) y refresh(48hrs) tokens, cada uno con sus claims correspondientes.
+        Cada token lleva su id (jti); el refresh token lleva además la familia
+        (fid) de tokens que nació en el login, para revocarla completa si se
+        reutiliza uno de sus refresh tokens.
         """
         now = datetime.datetime.now()
         access_payload = {
             'userRut':    user.rut,
             'agencyId':  agency_id,
             'iss':       'jwt_gci',
+            'jti':       uuid.uuid4().hex,
             'exp':       now + datetime.timedelta(minutes=15)
         }
         refresh_payload = {
             'userRut':    user.rut,
             'agencyId':  agency_id,
             'iss':       'jwt_gci',
+            'jti':       uuid.uuid4().hex,
+            'fid':       family_id or uuid.uuid4().hex,
             'exp':       now + datetime.timedelta(hours=48)
         }
         access_token = jwt.encode(
@@ -76,6 +85,11 @@ class AuthenticateService:
         """
         Recibe el refresh token revisa si es válido y no expirado, 
         emite un nuevo par de tokens.
+
+        Cada refresh token sirve una sola vez: su jti queda registrado en
+        revocation_store. Si llega uno ya usado se revoca toda su familia, así
+        tampoco sirven los tokens emitidos a partir de él. Los tokens emitidos
+        antes de agregar jti usan hashes del token como id y como familia.
         """
         try:
             payload = jwt.decode(
@@ -88,9 +102,24 @@ class AuthenticateService:
         except jwt.InvalidTokenError as e:
             return None, None, f'Token inválido: {str(e)}'
 
+        token_id = payload.get('jti') or hashlib.sha256(old_refresh_token.encode()).hexdigest()
+        family_id = payload.get('fid') or hashlib.sha256(f'fid:{old_refresh_token}'.encode()).hexdigest()
+        expires_at = datetime.datetime.fromtimestamp(payload['exp'], tz=datetime.timezone.utc)
+
+        if revocation_store.is_revoked(family_id):
+            return None, None, 'Refresh token revocado.'
+        if not revocation_store.revoke(token_id, expires_at):
+            # Reutilización: alguien más tiene una copia del token
+            revocation_store.revoke(
+                family_id, datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=48)
+            )
+            logger.warning("Refresh token reutilizado, familia %s revocada", family_id)
+            return None, None, 'Refresh token ya utilizado.'
+
         new_acess_token, new_refresh_token = AuthenticateService.generate_jwt(
             SimpleNamespace(rut=payload['userRut']),
-            payload['agencyId']
+            payload['agencyId'],
+            family_id,
         )
 
         return new_acess_token, new_refresh_token, None
@@ -0,0 +1,97 @@
+# authentication/tests/test_refresh.py
+import datetime
+import time
+from types import SimpleNamespace
+
+import jwt
+import pytest
+from django.db import connection
+
+from apps.authentication.models import RevokedToken
+from apps.authentication.revocation import revocation_store
+from apps.authentication.services import AuthenticateService
+
+SECRET = 'secreto-refresh'
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        with connection.schema_editor() as editor:
+            editor.create_model(RevokedToken)
+
+
+@pytest.fixture(autouse=True)
+def secrets(monkeypatch):
+    monkeypatch.setenv('SECRET_ACCESS_JWT', 'secreto-access')
+    monkeypatch.setenv('SECRET_REFRESH_JWT', SECRET)
+    revocation_store.reset()
+    yield
+    revocation_store.reset()
+
+
+def login():
+    return AuthenticateService.generate_jwt(SimpleNamespace(rut=1001), 3)
+
+
+@pytest.mark.django_db
+def test_refresh_token_is_single_use():
+    _, refresh_token = login()
+    access_token, new_refresh_token, error = AuthenticateService.refresh_jwt(refresh_token)
+    assert error is None
+
+    payload = jwt.decode(new_refresh_token, SECRET, algorithms=['HS256'])
+    assert payload['fid'] == jwt.decode(refresh_token, SECRET, algorithms=['HS256'])['fid']
+    assert AuthenticateService.refresh_jwt(refresh_token)[2] == 'Refresh token ya utilizado.'
+
+
+@pytest.mark.django_db
+def test_reuse_revokes_the_whole_family():
+    _, stolen = login()
+    _, rotated, _ = AuthenticateService.refresh_jwt(stolen)
+    AuthenticateService.refresh_jwt(stolen)
+
+    assert AuthenticateService.refresh_jwt(rotated)[2] == 'Refresh token revocado.'
+    # Otra sesión del mismo usuario no se ve afectada
+    assert AuthenticateService.refresh_jwt(login()[1])[2] is None
+
+
+@pytest.mark.django_db
+def test_legacy_tokens_without_jti_are_single_use():
+    legacy = jwt.encode(
+        {'userRut': 1001, 'agencyId': 3, 'iss': 'jwt_gci', 'exp': int(time.time()) + 3600}, SECRET, algorithm='HS256'
+    )
+    _, rotated, error = AuthenticateService.refresh_jwt(legacy)
+    assert error is None
+    assert AuthenticateService.refresh_jwt(rotated)[2] is None
+    assert AuthenticateService.refresh_jwt(legacy)[2] == 'Refresh token ya utilizado.'
+
+
+@pytest.mark.django_db
+def test_family_revoked_by_another_process_is_seen_at_once():
+    _, refresh_token = login()
+    family_id = jwt.decode(refresh_token, SECRET, algorithms=['HS256'])['fid']
+    # Otro proceso revoca la familia directamente en la tabla
+    RevokedToken.objects.create(
+        token_id=family_id, expires_at=datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=1)
+    )
+    assert AuthenticateService.refresh_jwt(refresh_token)[2] == 'Refresh token revocado.'
+
+
+@pytest.mark.django_db
+def test_refresh_costs_one_lookup_and_one_insert(django_assert_num_queries):
+    _, refresh_token = login()
+    # Búsqueda de la familia e insert del jti (con su savepoint)
+    with django_assert_num_queries(4):
+        assert AuthenticateService.refresh_jwt(refresh_token)[2] is None
+
+
+@pytest.mark.django_db
+def test_prune_deletes_expired_rows():
+    now = datetime.datetime.now(datetime.timezone.utc)
+    RevokedToken.objects.create(token_id='vencido', expires_at=now - datetime.timedelta(seconds=1))
+    RevokedToken.objects.create(token_id='vigente', expires_at=now + datetime.timedelta(hours=1))
+
+    assert revocation_store.prune() == 1
+    assert list(RevokedToken.objects.values_list('token_id', flat=True)) == ['vigente']
+    assert revocation_store.is_revoked('vigente')
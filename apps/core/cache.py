@@ -0,0 +1,126 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+
+from .context import get_current_agency
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class DimensionCache:
+    """
+    Cache en memoria, LRU y con TTL, de filas de dimensiones de las BD de
+    inmobiliarias (clientes, evaluaciones, ...) que no se pueden unir por SQL
+    con las tareas de gcli.
+
+    Las claves son (alias gci de la inmobiliaria actual, dimensión, id), así dos
+    inmobiliarias nunca comparten filas. Se guardan valores planos (dicts o
+    tuplas) y no instancias de modelos. El tamaño máximo es
+    DIMENSION_CACHE_MAX_ENTRIES y el TTL por defecto DIMENSION_CACHE_TTL.
+    """
+
+    def __init__(self, max_entries=None, ttl=None):
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    @property
+    def max_entries(self):
+        if self._max_entries is not None:
+            return self._max_entries
+        return getattr(settings, 'DIMENSION_CACHE_MAX_ENTRIES', 10000)
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'DIMENSION_CACHE_TTL', 300)
+
+    @staticmethod
+    def _tenant():
+        agency = get_current_agency()
+        return agency.gci_alias if agency is not None else 'default'
+
+    def get_many(self, dimension, ids, loader, ttl=None):
+        """
+        Retorna {id: fila} para los ids pedidos. Los que no están en cache o
+        vencieron se cargan en una sola llamada a loader(ids faltantes), que debe
+        retornar un dict {id: fila}. Los ids que loader no retorna no se cachean.
+        """
+        tenant = self._tenant()
+        found = {}
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            for object_id in set(ids):
+                key = (tenant, dimension, object_id)
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    found[object_id] = entry[1]
+                else:
+                    if entry is not None:
+                        del self._entries[key]
+                    missing.append(object_id)
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if not missing:
+            return found
+
+        loaded = loader(missing)
+        self._store(tenant, dimension, loaded, ttl)
+        found.update(loaded)
+        return found
+
+    def set_many(self, dimension, rows, ttl=None):
+        """
+        Guarda {id: fila} ya leídas por otra consulta de la inmobiliaria actual.
+        """
+        self._store(self._tenant(), dimension, rows, ttl)
+
+    def _store(self, tenant, dimension, rows, ttl):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            for object_id, row in rows.items():
+                key = (tenant, dimension, object_id)
+                self._entries[key] = (expires_at, row)
+                self._entries.move_to_end(key)
+            overflow = len(self._entries) - self.max_entries
+            for _ in range(max(0, overflow)):
+                self._entries.popitem(last=False)
+            self.evicted += max(0, overflow)
+
+    def invalidate(self, dimension=None, tenant=None):
+        """
+        Descarta las filas de una dimensión y/o inmobiliaria (alias gci); sin
+        argumentos vacía el cache completo.
+        """
+        with self._lock:
+            if dimension is None and tenant is None:
+                self._entries.clear()
+                return
+            for key in [
+                key for key in self._entries
+                if (dimension is None or key[1] == dimension) and (tenant is None or key[0] == tenant)
+            ]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evicted': self.evicted,
+            }
+
+
+dimension_cache = DimensionCache()
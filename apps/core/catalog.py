@@ -0,0 +1,75 @@
+import time
+from threading import Lock
+
+from django.conf import settings
+
+from .context import get_current_agency
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class LabelCatalog:
+    """
+    Cache en memoria, por inmobiliaria y con TTL, de las tablas de catálogo de
+    gcli (estado_tarea, tipo_tarea, origen_tarea, sistema) como {glosa: [ids]},
+    para que las consultas de tareas filtren por id sin unir esas tablas.
+
+    Cada tabla se carga completa la primera vez que se pide y se vuelve a leer
+    al vencer LABEL_CATALOG_TTL. Una glosa que no existe retorna una lista
+    vacía, igual que el filtro por glosa no encontraría filas.
+    """
+
+    def __init__(self, ttl=None):
+        self._ttl = ttl
+        self._lock = Lock()
+        self._tables = {}
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'LABEL_CATALOG_TTL', 300)
+
+    @staticmethod
+    def _tenant():
+        agency = get_current_agency()
+        return agency.gcli_alias if agency is not None else 'default'
+
+    def _labels(self, model):
+        key = (self._tenant(), model._meta.db_table)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._tables.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        labels = {}
+        for object_id, label in model.objects.values_list('id', 'label'):
+            labels.setdefault(label, []).append(object_id)
+        with self._lock:
+            self._tables[key] = (time.monotonic() + self.ttl, labels)
+        return labels
+
+    def ids(self, model, labels):
+        """
+        Retorna los ids ordenados de las filas de model cuya glosa está en labels.
+        """
+        if isinstance(labels, str):
+            labels = [labels]
+        catalog = self._labels(model)
+        return sorted(object_id for label in labels for object_id in catalog.get(label, ()))
+
+    def invalidate(self, tenant=None):
+        """
+        Descarta los catálogos de una inmobiliaria (alias gcli) o de todas.
+        """
+        with self._lock:
+            if tenant is None:
+                self._tables.clear()
+                return
+            for key in [key for key in self._tables if key[0] == tenant]:
+                del self._tables[key]
+
+
+label_catalog = LabelCatalog()
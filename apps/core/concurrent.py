@@ -0,0 +1,73 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from .context import get_current_agency
+from .middlewares.timing import get_request_timing
+from .pool import tenant_pool
+
+import logging
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, getattr(settings, 'CONCURRENT_QUERIES_MAX_WORKERS', 4)),
+                thread_name_prefix='concurrent_queries',
+            )
+        return _executor
+
+
+def _in_transaction():
+    return any(connection.in_atomic_block for connection in connections.all(initialized_only=True))
+
+
+def _run(func):
+    # Igual que en un request: descartar conexiones vencidas o rotas del
+    # worker antes y después, y reutilizar el resto según CONN_MAX_AGE
+    close_old_connections()
+    # Las conexiones del worker a la inmobiliaria pasan por el pool, que las
+    # cuenta en el tope por thread y cierra las que quedan sin uso
+    agency = get_current_agency()
+    if agency is not None:
+        tenant_pool.acquire(agency.gci_alias)
+        tenant_pool.acquire(agency.gcli_alias)
+    # Las queries del worker también cuentan en el Server-Timing del request
+    timing = get_request_timing()
+    try:
+        if timing is None:
+            return func()
+        with timing.instrument_thread():
+            return func()
+    finally:
+        close_old_connections()
+        tenant_pool.evict_idle()
+
+
+def run_concurrently(*calls):
+    """
+    Ejecuta funciones sin argumentos, típicamente consultas independientes, en
+    un pool pequeño de threads compartido y retorna sus resultados en el mismo
+    orden. Cada función corre con una copia del contexto del llamador (y por lo
+    tanto con su inmobiliaria) y con las conexiones propias del worker, que
+    administra tenant_pool como las de cualquier thread.
+
+    Se ejecutan en el thread actual, una tras otra, si CONCURRENT_QUERIES_ENABLED
+    está desactivado, si hay una sola función o si el llamador está dentro de
+    una transacción, cuyos datos no verían las otras conexiones.
+    """
+    if len(calls) < 2 or not getattr(settings, 'CONCURRENT_QUERIES_ENABLED', False) or _in_transaction():
+        return [func() for func in calls]
+
+    executor = _get_executor()
+    futures = [executor.submit(contextvars.copy_context().run, _run, func) for func in calls]
+    return [future.result() for future in futures]
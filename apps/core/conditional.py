@@ -0,0 +1,63 @@
+import hashlib
+from functools import wraps
+
+from django.utils.cache import patch_vary_headers, quote_etag
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from .context import get_current_agency
+from .identity import get_user_rut
+
+# Headers de los que sale el usuario del request (access token o header de Kong)
+IDENTITY_HEADERS = ('Authorization', 'X-User-Rut')
+
+
+def make_etag(*parts):
+    """
+    ETag fuerte a partir de los valores que determinan la respuesta.
+    """
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return quote_etag(digest)
+
+
+def conditional_etag(validator):
+    """
+    Decorador para acciones GET de un ViewSet que calcula el ETag antes de
+    ejecutar la vista y responde 304 si coincide con If-None-Match.
+
+    validator(request) debe retornar, con consultas baratas, los valores de los
+    que depende el contenido (por ejemplo la última fecha de historial y la
+    cantidad de tareas), o None para no usar ETag. A esos valores se suman la
+    ruta, los parámetros, la inmobiliaria actual y el usuario autenticado, y
+    las respuestas llevan Vary con los headers de identidad para que un cache
+    intermedio no las comparta entre usuarios.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(self, request, *args, **kwargs):
+            parts = validator(request)
+            if parts is None:
+                return view(self, request, *args, **kwargs)
+
+            agency = get_current_agency()
+            etag = make_etag(
+                request.path,
+                sorted(request.query_params.lists()),
+                agency.id if agency is not None else None,
+                get_user_rut(request),
+                parts,
+            )
+            if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+            if etag in if_none_match or '*' in if_none_match:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+                patch_vary_headers(response, IDENTITY_HEADERS)
+                return response
+
+            response = view(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                response['ETag'] = etag
+                patch_vary_headers(response, IDENTITY_HEADERS)
+            return response
+        return wrapped
+    return decorator
@@ -0,0 +1,38 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Inmobiliaria del request en curso. Una ContextVar sigue al request tanto en
+# WSGI (un thread por request) como en ASGI (varias tareas por thread), y
+# asgiref la propaga a los threads donde se ejecutan las vistas sync.
+_current_agency = ContextVar('current_agency', default=None)
+
+
+def get_current_agency():
+    """
+    Obtiene la inmobiliaria del contexto actual o None si no hay una establecida.
+    """
+    return _current_agency.get()
+
+
+def set_current_agency(agency):
+    """
+    Establece la inmobiliaria del contexto actual.
+    Retorna el token necesario para restaurar el valor anterior.
+    """
+    return _current_agency.set(agency)
+
+
+def reset_current_agency(token):
+    _current_agency.reset(token)
+
+
+@contextmanager
+def tenant_context(agency):
+    """
+    Establece la inmobiliaria mientras dure el bloque y luego restaura la anterior.
+    """
+    token = _current_agency.set(agency)
+    try:
+        yield agency
+    finally:
+        _current_agency.reset(token)
@@ -0,0 +1,129 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connections
+
+from .context import tenant_context
+from .pool import tenant_pool
+from .registry import agency_registry
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Cada cuánto revisa fan_out si alguna inmobiliaria superó su timeout
+_POLL_INTERVAL = 0.1
+
+
+@dataclass
+class FanOutResult:
+    """
+    Resultado de fan_out indexado por id de inmobiliaria. Las inmobiliarias que
+    fallaron o no respondieron a tiempo quedan en errors/timed_out y no en results.
+    """
+    agencies: dict = field(default_factory=dict)
+    results: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+    timed_out: list = field(default_factory=list)
+
+    @property
+    def complete(self):
+        return not self.errors and not self.timed_out
+
+    def merge(self, merge_func):
+        """
+        Combina los resultados parciales con merge_func(lista de resultados).
+        """
+        return merge_func(list(self.results.values()))
+
+
+def fan_out(func, args=(), kwargs=None, agencies=None, max_workers=None, timeout=None):
+    """
+    Ejecuta func(*args, **kwargs) una vez por inmobiliaria en un pool acotado de
+    threads, cada una con su inmobiliaria establecida en el contexto.
+
+    timeout es por inmobiliaria y se cuenta desde que su ejecución comienza; al
+    vencer se deja de esperar y se marca como timed_out. El thread no se puede
+    interrumpir, así que la query en curso sigue hasta terminar en la BD. Cada
+    worker cierra las conexiones que abrió para su inmobiliaria al terminarla.
+    """
+    if agencies is None:
+        agencies = agency_registry.all()
+    if kwargs is None:
+        kwargs = {}
+    if max_workers is None:
+        max_workers = getattr(settings, 'FAN_OUT_MAX_WORKERS', 8)
+    if timeout is None:
+        timeout = getattr(settings, 'FAN_OUT_TIMEOUT', 10)
+
+    result = FanOutResult(agencies={agency.id: agency for agency in agencies})
+    if not agencies:
+        return result
+
+    started = {}
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='fan_out')
+    futures = {
+        executor.submit(_run_for_tenant, func, agency, args, kwargs, started): agency
+        for agency in agencies
+    }
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                agency = futures[future]
+                try:
+                    result.results[agency.id] = future.result()
+                except Exception as e:
+                    logger.warning("fan_out falló en %s: %s", agency, e)
+                    result.errors[agency.id] = str(e)
+
+            now = time.monotonic()
+            expired = {
+                future for future in pending
+                if futures[future].id in started and now - started[futures[future].id] > timeout
+            }
+            for future in expired:
+                agency = futures[future]
+                logger.warning("fan_out superó el timeout de %ss en %s", timeout, agency)
+                result.timed_out.append(agency.id)
+            pending -= expired
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return result
+
+
+def _run_for_tenant(func, agency, args, kwargs, started):
+    started[agency.id] = time.monotonic()
+    opened_before = _open_aliases()
+    with tenant_context(agency):
+        tenant_pool.acquire(agency.gci_alias)
+        tenant_pool.acquire(agency.gcli_alias)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            # No dejar abiertas las conexiones que abrió esta inmobiliaria, sin
+            # tocar las que el thread ya tenía
+            _close_opened_since(opened_before, agency)
+
+
+def _open_aliases():
+    return {
+        connection.alias for connection in connections.all(initialized_only=True)
+        if connection.connection is not None
+    }
+
+
+def _close_opened_since(opened_before, agency):
+    tenant_aliases = {
+        agency.gci_alias, agency.gcli_alias, agency.gci_replica_alias, agency.gcli_replica_alias,
+    }
+    for connection in connections.all(initialized_only=True):
+        if connection.alias in opened_before or connection.connection is None:
+            continue
+        if connection.alias in tenant_aliases:
+            tenant_pool.release(connection.alias)
+        else:
+            connection.close()
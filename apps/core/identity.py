@@ -0,0 +1,138 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+
+import jwt
+from django.conf import settings
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Identity:
+    """
+    Usuario e inmobiliaria del request. source es 'jwt' si salen de un access
+    token verificado o 'headers' si salen de los headers de Kong.
+    """
+    user_rut: str
+    agency_id: str
+    source: str
+    expires_at: float = None
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class VerifiedTokenCache:
+    """
+    Verifica access tokens (HS256 con SECRET_ACCESS_JWT, emisor jwt_gci) y
+    guarda la identidad de los válidos hasta su exp, en un LRU de a lo más
+    JWT_VERIFIED_CACHE_MAX_ENTRIES tokens. Las claves son el sha256 del token,
+    así el cache no guarda tokens utilizables. Los tokens inválidos no se
+    guardan.
+    """
+
+    ISSUER = 'jwt_gci'
+
+    def __init__(self, max_entries=None):
+        self._max_entries = max_entries
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_entries(self):
+        if self._max_entries is not None:
+            return self._max_entries
+        return getattr(settings, 'JWT_VERIFIED_CACHE_MAX_ENTRIES', 10000)
+
+    @staticmethod
+    def secret():
+        return os.environ.get('SECRET_ACCESS_JWT')
+
+    def verify(self, token):
+        """
+        Retorna la Identity del token o lanza InvalidToken con el motivo.
+        """
+        key = hashlib.sha256(token.encode()).digest()
+        now = time.time()
+        with self._lock:
+            identity = self._entries.get(key)
+            if identity is not None and identity.expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return identity
+            if identity is not None:
+                del self._entries[key]
+            self.misses += 1
+
+        try:
+            payload = jwt.decode(
+                token,
+                self.secret(),
+                algorithms=['HS256'],
+                issuer=self.ISSUER,
+                options={'require': ['exp', 'iss']},
+            )
+        except jwt.ExpiredSignatureError:
+            raise InvalidToken('Access token expirado.')
+        except jwt.InvalidTokenError as e:
+            raise InvalidToken(f'Token inválido: {str(e)}')
+        if payload.get('userRut') is None or payload.get('agencyId') is None:
+            raise InvalidToken('Token inválido: faltan userRut o agencyId.')
+
+        identity = Identity(
+            user_rut=str(payload['userRut']),
+            agency_id=str(payload['agencyId']),
+            source='jwt',
+            expires_at=float(payload['exp']),
+        )
+        with self._lock:
+            self._entries[key] = identity
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return identity
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+verified_tokens = VerifiedTokenCache()
+
+
+def identity_from_headers(request):
+    """
+    Identity de los headers X-User-Rut y X-Agency-Id de Kong, o None si no vienen.
+    """
+    user_rut = request.headers.get('X-User-Rut')
+    agency_id = request.headers.get('X-Agency-Id')
+    if not user_rut and not agency_id:
+        return None
+    return Identity(user_rut=user_rut, agency_id=agency_id, source='headers')
+
+
+def get_identity(request):
+    """
+    Identity que dejó IdentityMiddleware en el request; sin el middleware
+    (tests, comandos) la arma desde los headers.
+    """
+    if hasattr(request, 'identity'):
+        return request.identity
+    return identity_from_headers(request)
+
+
+def get_user_rut(request):
+    identity = get_identity(request)
+    return identity.user_rut if identity is not None else None
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.services import DatabasesUtils
+from apps.core.warmup import warm_tenants
+
+
+class Command(BaseCommand):
+    help = (
+        "Registra los alias gci_/gcli_ de cada inmobiliaria y abre sus conexiones "
+        "en paralelo, informando la latencia de conexión de cada una."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Conexiones simultáneas (por defecto WARM_TENANTS_MAX_WORKERS).'
+        )
+        parser.add_argument(
+            '--agency', type=int, action='append', dest='agency_ids',
+            help='Id de inmobiliaria a precalentar. Puede repetirse.'
+        )
+
+    def handle(self, *args, **options):
+        agencies = None
+        if options['agency_ids']:
+            agencies = [DatabasesUtils.get_agency(agency_id) for agency_id in options['agency_ids']]
+            missing = [
+                str(agency_id) for agency_id, agency in zip(options['agency_ids'], agencies)
+                if agency is None
+            ]
+            if missing:
+                raise CommandError(f"Inmobiliarias no encontradas: {', '.join(missing)}")
+
+        results = warm_tenants(agencies=agencies, max_workers=options['workers'])
+
+        for result in results:
+            if result.ok:
+                self.stdout.write(f"{result.alias:<40} {result.elapsed * 1000:8.1f} ms")
+            else:
+                self.stdout.write(self.style.ERROR(f"{result.alias:<40} ERROR {result.error}"))
+
+        failed = [result for result in results if not result.ok]
+        self.stdout.write(
+            f"{len(results) - len(failed)} conexiones ok, {len(failed)} con error"
+        )
+        if failed:
+            failed_agencies = sorted({str(result.agency) for result in failed})
+            raise CommandError(f"Inmobiliarias con error: {', '.join(failed_agencies)}")
@@ -1,25 +1,52 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from ..replicas import replica_monitor
 from ..services import DatabasesUtils
 
 class DynamicDatabaseMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        agency = self.prepare_connections(request)
+        # Guardar la inmobiliaria actual para el router, solo durante este request
+        with DatabasesUtils.tenant_context(agency):
+            response = self.get_response(request)
+
+        # Cerrar las conexiones de inmobiliarias inactivas
+        DatabasesUtils.cleanup_unused_connections()
+
+        return response
+
+    async def __acall__(self, request):
+        agency = await sync_to_async(self.prepare_async_connections)(request)
+        with DatabasesUtils.tenant_context(agency):
+            return await self.get_response(request)
+
+    @staticmethod
+    def prepare_async_connections(request):
+        # Cada request ASGI corre en un thread propio que no se reutiliza: sus
+        # conexiones se cierran con request_finished, después del cuerpo
+        DatabasesUtils.close_connections_on_request_finished()
+        return DynamicDatabaseMiddleware.prepare_connections(request)
+
+    @staticmethod
+    def prepare_connections(request):
         agency = DatabasesUtils.get_agency_from_request(request)
         if agency:
-            # Siempre crear ambas conexiones
-            db_alias_gci = f"gci_{agency.name.lower()}"
-            db_alias_gcli = f"gcli_{agency.name.lower()}"
-            
-            DatabasesUtils.get_dynamic_db_connection(db_alias_gci)
-            DatabasesUtils.get_dynamic_db_connection(db_alias_gcli)
-            
-            # Guardar la inmobiliaria actual para el router
-            DatabasesUtils.set_current_agency(agency)
-        
-        response = self.get_response(request)
-        
-        # Limpiar conexiones no usadas
-        DatabasesUtils.cleanup_unused_connections()
-        
-        return response
\ No newline at end of file
+            # Siempre crear ambas conexiones, y las de sus réplicas si existen
+            DatabasesUtils.get_dynamic_db_connection(agency.gci_alias)
+            DatabasesUtils.get_dynamic_db_connection(agency.gcli_alias)
+            if replica_monitor.has_replica('gci'):
+                DatabasesUtils.get_dynamic_db_connection(agency.gci_replica_alias)
+            if replica_monitor.has_replica('gcli'):
+                DatabasesUtils.get_dynamic_db_connection(agency.gcli_replica_alias)
+        return agency
@@ -0,0 +1,85 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+
+from ..identity import InvalidToken, identity_from_headers, verified_tokens
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class IdentityMiddleware:
+    """
+    Deja en request.identity el usuario y la inmobiliaria del request.
+
+    Con un header Authorization: Bearer verifica el access token localmente
+    (con cache de tokens ya verificados) y un token inválido o expirado
+    responde 401. Sin token usa los headers de Kong, salvo que JWT_REQUIRED esté
+    activo. Si SECRET_ACCESS_JWT no está configurado no se verifica nada y se
+    usan los headers, como antes.
+    """
+    # Nombres de URL (basename del router + acción), válidos para cualquier
+    # versión de /api/<version>/auth/...
+    EXEMPT_URL_NAMES = (
+        'auth-login',
+        'auth-refresh',
+    )
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        error = self.authenticate(request)
+        if error is not None:
+            return error
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        # La verificación no consulta la BD: se hace en el event loop
+        error = self.authenticate(request)
+        if error is not None:
+            return error
+        return await self.get_response(request)
+
+    def authenticate(self, request):
+        """
+        Asigna request.identity; retorna la respuesta 401 si el request no
+        puede seguir.
+        """
+        request.identity = None
+        if self.is_exempt(request):
+            return None
+
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not token.strip() or not verified_tokens.secret():
+            if getattr(settings, 'JWT_REQUIRED', False):
+                return self.unauthorized('No se proporcionó access token.')
+            request.identity = identity_from_headers(request)
+            return None
+
+        try:
+            request.identity = verified_tokens.verify(token.strip())
+        except InvalidToken as e:
+            return self.unauthorized(str(e))
+        return None
+
+    def is_exempt(self, request):
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return match.url_name in self.EXEMPT_URL_NAMES
+
+    @staticmethod
+    def unauthorized(detail):
+        response = JsonResponse({'detail': detail}, status=401)
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
@@ -1,3 +1,5 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
 import logging
 logger = logging.getLogger(__name__)
 
@@ -10,10 +12,16 @@ class KongHeadersMiddleware:
         '/api/auth/refresh/',
     )
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        # En ASGI get_response es una corrutina; el retorno se await-ea aguas arriba.
         for path in self.EXEMPT_PATHS:
             if request.path.startswith(path):
                 return self.get_response(request)
@@ -0,0 +1,217 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from ..context import get_current_agency
+from ..replicas import replica_monitor
+
+_current_timing = ContextVar('server_timing', default=None)
+
+
+def get_request_timing():
+    """
+    RequestTiming del request actual, o None fuera de ServerTimingMiddleware.
+    """
+    return _current_timing.get()
+
+
+class QueryTimer:
+    """
+    Execute wrapper que acumula cantidad de queries y tiempo por alias.
+    """
+
+    def __init__(self):
+        self.queries = {}
+        self._lock = Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            alias = context['connection'].alias
+            # Los workers de run_concurrently suman en paralelo
+            with self._lock:
+                count, total = self.queries.get(alias, (0, 0.0))
+                self.queries[alias] = (count + 1, total + elapsed)
+
+
+class RequestTiming:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.view_start = None
+        self.view_end = None
+        self.end = None
+        self.timer = QueryTimer()
+        # alias -> nombre de la métrica, sin exponer los alias de inmobiliarias
+        self.metrics = {}
+        self.streamed = False
+        self._wrapped = []
+        self._lock = Lock()
+
+    def wrap(self, aliases):
+        """
+        Instala el timer en las conexiones de los alias del thread actual y
+        retorna las que instrumentó. Las conexiones son por thread: en ASGI la
+        vista sync corre en otro thread que el middleware, así que se llama
+        también desde process_view, y desde instrument_thread en los workers.
+        """
+        wrapped = []
+        with self._lock:
+            self.metrics.update(aliases)
+            for alias in aliases:
+                connection = connections[alias]
+                if any(previous is connection for previous in self._wrapped):
+                    continue
+                connection.execute_wrappers.append(self.timer)
+                self._wrapped.append(connection)
+                wrapped.append(connection)
+        return wrapped
+
+    def unwrap(self, wrapped=None):
+        """
+        Quita el timer de las conexiones indicadas, o de todas sin argumentos.
+        """
+        with self._lock:
+            if wrapped is None:
+                wrapped, self._wrapped = self._wrapped, []
+            else:
+                self._wrapped = [
+                    connection for connection in self._wrapped
+                    if not any(connection is other for other in wrapped)
+                ]
+        for connection in wrapped:
+            try:
+                connection.execute_wrappers.remove(self.timer)
+            except ValueError:
+                pass
+
+    @contextmanager
+    def instrument_thread(self):
+        """
+        Mide las queries del thread actual sobre las BD del request mientras
+        dure el bloque, por ejemplo en los workers de run_concurrently.
+        """
+        wrapped = self.wrap(dict(self.metrics))
+        try:
+            yield
+        finally:
+            self.unwrap(wrapped)
+
+    def header(self):
+        queries = {}
+        for alias, (count, total) in self.timer.queries.items():
+            metric = self.metrics.get(alias, 'other')
+            previous_count, previous_total = queries.get(metric, (0, 0.0))
+            queries[metric] = (previous_count + count, previous_total + total)
+
+        metrics = []
+        for metric, (count, total) in sorted(queries.items()):
+            metrics.append(f'db-{metric};desc="{count} queries";dur={total * 1000:.2f}')
+        if self.streamed:
+            # Las queries del cuerpo corren después de enviar los headers
+            metrics.append('db;desc="streamed"')
+        if self.view_start is not None:
+            view_end = self.view_end or self.end
+            metrics.append(f'view;dur={(view_end - self.view_start) * 1000:.2f}')
+            if self.view_end is not None:
+                metrics.append(f'render;dur={(self.end - self.view_end) * 1000:.2f}')
+        metrics.append(f'total;dur={(self.end - self.start) * 1000:.2f}')
+        return ', '.join(metrics)
+
+
+class ServerTimingMiddleware:
+    """
+    Agrega el header Server-Timing con la cantidad de queries y el tiempo por
+    BD (db-default, db-gci, db-gcli y sus réplicas), más el tiempo de la vista
+    y del render de la respuesta.
+
+    Incluye las queries de los workers de run_concurrently. Las de un cuerpo en
+    streaming corren después de enviar los headers y no se cuentan: esas
+    respuestas llevan la métrica db;desc="streamed".
+
+    Debe ir después de DynamicDatabaseMiddleware para conocer la inmobiliaria.
+    Se desactiva con SERVER_TIMING_ENABLED = False.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, 'SERVER_TIMING_ENABLED', True):
+            return self.get_response(request)
+
+        timing = request._server_timing = RequestTiming()
+        token = _current_timing.set(timing)
+        timing.wrap(self._request_aliases())
+        try:
+            response = self.get_response(request)
+        finally:
+            timing.unwrap()
+            _current_timing.reset(token)
+        return self._finish(timing, response)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'SERVER_TIMING_ENABLED', True):
+            return await self.get_response(request)
+
+        # Las conexiones se instrumentan en process_view, que corre en el
+        # thread de la vista sync
+        timing = request._server_timing = RequestTiming()
+        token = _current_timing.set(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            timing.unwrap()
+            _current_timing.reset(token)
+        return self._finish(timing, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = getattr(request, '_server_timing', None)
+        if timing is not None:
+            timing.view_start = time.perf_counter()
+            timing.wrap(self._request_aliases())
+        return None
+
+    def process_template_response(self, request, response):
+        # Las Response de DRF se renderizan después de este hook
+        timing = getattr(request, '_server_timing', None)
+        if timing is not None:
+            timing.view_end = time.perf_counter()
+        return response
+
+    @staticmethod
+    def _finish(timing, response):
+        timing.end = time.perf_counter()
+        timing.streamed = response.streaming
+        response['Server-Timing'] = timing.header()
+        return response
+
+    @staticmethod
+    def _request_aliases():
+        """
+        Retorna {alias: métrica} de las BD del request. El header es público:
+        las métricas usan nombres fijos y no los alias gci_<inmobiliaria>.
+        """
+        aliases = {'default': 'default'}
+        agency = get_current_agency()
+        if agency is not None:
+            aliases[agency.gci_alias] = 'gci'
+            aliases[agency.gcli_alias] = 'gcli'
+            if replica_monitor.has_replica('gci'):
+                aliases[agency.gci_replica_alias] = 'gci-replica'
+            if replica_monitor.has_replica('gcli'):
+                aliases[agency.gcli_replica_alias] = 'gcli-replica'
+        return aliases
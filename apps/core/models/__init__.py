@@ -3,6 +3,7 @@ from .agency import Agency
 from .portal_types import PortalTypes
 from .evaluation import Evaluation
 from .client import Client
+from .revoked_token import RevokedToken
 
 __all__ = [
     'UserGci',
@@ -11,4 +12,5 @@ __all__ = [
     'PortalTypes',
     'Evaluation',
     'Client',
+    'RevokedToken',
     ]
@@ -0,0 +1,16 @@
+from django.db import models
+
+class RevokedToken(models.Model):
+    """
+    Ids (jti) de refresh tokens ya usados y familias de tokens revocadas.
+    Cada fila se puede borrar apenas pasa fecha_expiracion, porque un token
+    vencido se rechaza de todas formas.
+    """
+    database = 'default'
+
+    token_id = models.CharField(max_length=64, primary_key=True, db_column='id_token')
+    expires_at = models.DateTimeField(db_index=True, db_column='fecha_expiracion')
+
+    class Meta:
+        db_table = 'token_revocado'
+        managed = False
@@ -5,6 +5,7 @@ from .task_type import TaskType
 from .task_status import TaskStatus
 from .task_origin import TaskOrigin
 from .user_task import UserTask
+from .follow_up_counter import FollowUpCounter, FollowUpCounterState, FollowUpTaskSnapshot
 
 __all__ = [
     'Task',
@@ -13,5 +14,8 @@ __all__ = [
     'TaskStatus',
     'TaskOrigin',
     'System',
-    'UserTask'
+    'UserTask',
+    'FollowUpCounter',
+    'FollowUpCounterState',
+    'FollowUpTaskSnapshot',
 ]
\ No newline at end of file
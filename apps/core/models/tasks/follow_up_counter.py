@@ -0,0 +1,65 @@
+from django.db import models
+
+
+class FollowUpTaskSnapshot(models.Model):
+    """
+    Última contribución conocida de cada tarea de seguimiento abierta a los
+    contadores: usuario asignado, día de su fecha límite y medio de entrada.
+    Mantenida por FollowUpCounterService, no por la aplicación GCLI.
+    """
+    database = 'gcli'
+
+    task_id = models.IntegerField(primary_key=True, db_column='id_tarea')
+    username_sso = models.CharField(max_length=30, db_column='username_sso')
+    due_day = models.DateField(db_column='dia_limite')
+    means = models.CharField(max_length=20, db_column='medio')
+
+    class Meta:
+        db_table = 'seguimiento_tarea'
+        managed = False
+        indexes = [
+            models.Index(fields=['username_sso', 'due_day', 'means'], name='seguimiento_tarea_usuario'),
+        ]
+
+    def __str__(self):
+        return f"Task {self.task_id} - User {self.username_sso}"
+
+
+class FollowUpCounter(models.Model):
+    """
+    Cantidad de tareas de seguimiento abiertas por usuario, día límite y medio
+    de entrada. Hoy y atrasadas se obtienen al leer, comparando el día.
+    """
+    database = 'gcli'
+
+    id = models.AutoField(primary_key=True, db_column='id_seguimiento_contador')
+    username_sso = models.CharField(max_length=30, db_column='username_sso')
+    due_day = models.DateField(db_column='dia_limite')
+    means = models.CharField(max_length=20, db_column='medio')
+    quantity = models.IntegerField(db_column='cantidad')
+
+    class Meta:
+        db_table = 'seguimiento_contador'
+        managed = False
+        unique_together = [('username_sso', 'due_day', 'means')]
+
+    def __str__(self):
+        return f"{self.username_sso} {self.due_day} {self.means}: {self.quantity}"
+
+
+class FollowUpCounterState(models.Model):
+    """
+    Marca de agua de la sincronización: último id_historial_tarea procesado.
+    """
+    database = 'gcli'
+
+    id = models.IntegerField(primary_key=True, db_column='id')
+    last_history_id = models.BigIntegerField(db_column='ultimo_id_historial_tarea')
+    updated_at = models.DateTimeField(db_column='fecha_actualizacion')
+
+    class Meta:
+        db_table = 'seguimiento_contador_estado'
+        managed = False
+
+    def __str__(self):
+        return f"{self.last_history_id} ({self.updated_at})"
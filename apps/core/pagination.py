@@ -0,0 +1,80 @@
+import base64
+import json
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    next_cursor: str = None
+
+
+def encode_cursor(values):
+    """
+    Codifica los valores de la última fila de una página como un cursor opaco.
+    Fechas y datetimes se guardan en ISO 8601 con microsegundos.
+    """
+    values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size, model_fields=None):
+    """
+    Retorna la lista de valores del cursor o lanza ValueError si es inválido.
+    Con model_fields (campos del modelo, uno por valor) convierte cada valor al
+    tipo de su campo, para que un cursor adulterado no llegue al filtro.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError('cursor inválido')
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('cursor inválido')
+    if model_fields is not None:
+        try:
+            values = [field.to_python(value) for field, value in zip(model_fields, values)]
+        except (ValidationError, TypeError, ValueError):
+            raise ValueError('cursor inválido')
+    if any(value is None for value in values):
+        raise ValueError('cursor inválido')
+    return values
+
+
+def _row_value(row, field):
+    return row[field] if isinstance(row, dict) else getattr(row, field)
+
+
+def paginate_keyset(queryset, fields, cursor=None, page_size=100):
+    """
+    Pagina queryset por keyset: ordena por fields (el último debe ser único,
+    típicamente 'id') y retorna las page_size filas posteriores al cursor.
+
+    A diferencia de OFFSET, cada página cuesta lo mismo sin importar cuántas
+    filas hay antes, y no salta ni repite filas si cambian páginas anteriores.
+    Funciona con querysets de modelos y con .values().
+    """
+    queryset = queryset.order_by(*fields)
+    if cursor:
+        model_fields = [queryset.model._meta.get_field(field) for field in fields]
+        values = decode_cursor(cursor, len(fields), model_fields)
+        # (f1, f2, ...) > (v1, v2, ...) expandido a OR de prefijos iguales, más
+        # f1 >= v1 para que la BD pueda recorrer el índice como un rango
+        after = Q()
+        for index, field in enumerate(fields):
+            condition = Q(**{f'{field}__gt': values[index]})
+            for previous, value in zip(fields[:index], values[:index]):
+                condition &= Q(**{previous: value})
+            after |= condition
+        after &= Q(**{f'{fields[0]}__gte': values[0]})
+        queryset = queryset.filter(after)
+
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        next_cursor = encode_cursor([_row_value(items[-1], field) for field in fields])
+    return KeysetPage(items=items, next_cursor=next_cursor)
@@ -0,0 +1,190 @@
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from asgiref.local import Local
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import connections
+
+from .replicas import is_replica_alias, primary_alias
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class TenantConnectionPool:
+    """
+    Administra las conexiones a las BD de las inmobiliarias (gci_*/gcli_*).
+
+    Las conexiones de Django son locales a cada thread, por lo que el orden
+    LRU y el tope TENANT_POOL_MAX_CONNECTIONS se llevan por thread (un worker
+    sync de gunicorn equivale a un thread). Al superar el tope se cierra la
+    conexión usada hace más tiempo; evict_idle() cierra las que llevan más de
+    TENANT_POOL_IDLE_TIMEOUT segundos sin uso. Los alias registrados se
+    mantienen, de modo que reabrir una conexión no requiere reconfigurarla.
+
+    En ASGI, Django atiende cada request en un thread propio
+    (ThreadSensitiveContext) que no se vuelve a usar, así que sus conexiones no
+    se pueden reutilizar: close_on_request_finished() las cierra todas al
+    terminar el request, junto con la respuesta.
+    """
+
+    def __init__(self, max_connections=None, idle_timeout=None):
+        self._max_connections = max_connections
+        self._idle_timeout = idle_timeout
+        # Igual que connections: por thread y no por contexto
+        self._local = Local(thread_critical=True)
+        self._lock = Lock()
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    @property
+    def max_connections(self):
+        if self._max_connections is not None:
+            return self._max_connections
+        return getattr(settings, 'TENANT_POOL_MAX_CONNECTIONS', 20)
+
+    @property
+    def idle_timeout(self):
+        if self._idle_timeout is not None:
+            return self._idle_timeout
+        return getattr(settings, 'TENANT_POOL_IDLE_TIMEOUT', 300)
+
+    def acquire(self, db_alias):
+        """
+        Registra el alias si hace falta, marca su uso y retorna la conexión.
+        """
+        self.register(db_alias)
+        connection = connections[db_alias]
+
+        with self._lock:
+            if connection.connection is not None:
+                self.reused += 1
+            else:
+                self.created += 1
+
+        last_used = self._last_used()
+        last_used[db_alias] = time.monotonic()
+        last_used.move_to_end(db_alias)
+
+        while len(last_used) > self.max_connections:
+            oldest = next(iter(last_used))
+            if oldest == db_alias or not self._evict(oldest):
+                break
+        return connection
+
+    def register(self, db_alias):
+        """
+        Agrega la configuración del alias a connections.settings si no existe.
+        """
+        if db_alias not in connections.settings:
+            connections.settings[db_alias] = self.build_settings(db_alias)
+
+    @staticmethod
+    def build_settings(db_alias):
+        db_type = 'gcli' if db_alias.startswith('gcli_') else 'gci'
+        if is_replica_alias(db_alias):
+            # La réplica tiene el mismo nombre de BD que el primario en otro host
+            host = settings.TENANT_REPLICA_HOSTS[db_type]
+        elif db_type == 'gcli':
+            host = os.environ.get('DB_HOST_GCLI', 'localhost')
+        else:
+            host = os.environ.get('DB_HOST_GCI', 'localhost')
+
+        return {
+            'ENGINE': 'django.db.backends.mysql',
+            'NAME': primary_alias(db_alias),
+            'USER': os.environ.get('MYSQL_USER', 'default_user'),
+            'PASSWORD': os.environ.get('MYSQL_PASSWORD', 'default_password'),
+            'HOST': host,
+            'PORT': os.environ.get('DB_PORT', '3306'),
+            'TIME_ZONE': settings.TIME_ZONE,
+            'CONN_HEALTH_CHECKS': True,
+            'CONN_MAX_AGE': getattr(settings, 'TENANT_CONN_MAX_AGE', 0),
+            'OPTIONS': {},
+            'AUTOCOMMIT': True,
+            'ATOMIC_REQUESTS': False,
+            'TEST': {},
+        }
+
+    def evict_idle(self):
+        """
+        Cierra las conexiones del thread actual sin uso por más de idle_timeout.
+        """
+        now = time.monotonic()
+        last_used = self._last_used()
+        for db_alias, used_at in list(last_used.items()):
+            if now - used_at <= self.idle_timeout:
+                # El orden es LRU: el resto se usó más recientemente.
+                break
+            self._evict(db_alias)
+
+    def release(self, db_alias):
+        """
+        Cierra la conexión del alias en el thread actual y la saca del orden LRU.
+        """
+        if db_alias in connections.settings:
+            self._evict(db_alias)
+
+    def close_all(self):
+        """
+        Cierra todas las conexiones de inmobiliarias del thread actual.
+        """
+        self._local.close_on_request_finished = False
+        for db_alias in list(self._last_used()):
+            self._evict(db_alias)
+
+    def close_on_request_finished(self):
+        """
+        Marca las conexiones del thread actual para cerrarlas con la señal
+        request_finished, que Django envía desde este mismo thread al cerrar la
+        respuesta, también después de servir un cuerpo en streaming.
+        """
+        self._local.close_on_request_finished = True
+
+    def request_finished(self, **kwargs):
+        if getattr(self._local, 'close_on_request_finished', False):
+            self.close_all()
+
+    def stats(self):
+        """
+        Estadísticas del pool. 'open' corresponde al thread actual.
+        """
+        open_connections = sum(
+            1 for db_alias in self._last_used()
+            if connections[db_alias].connection is not None
+        )
+        with self._lock:
+            return {
+                'open': open_connections,
+                'created': self.created,
+                'reused': self.reused,
+                'evicted': self.evicted,
+            }
+
+    def _evict(self, db_alias):
+        connection = connections[db_alias]
+        if connection.in_atomic_block:
+            # No cortar una transacción en curso; se reintenta más adelante.
+            return False
+        self._last_used().pop(db_alias, None)
+        if connection.connection is not None:
+            connection.close()
+            with self._lock:
+                self.evicted += 1
+            logger.debug("Conexión %s cerrada por el pool", db_alias)
+        return True
+
+    def _last_used(self):
+        try:
+            return self._local.last_used
+        except AttributeError:
+            self._local.last_used = OrderedDict()
+            return self._local.last_used
+
+
+tenant_pool = TenantConnectionPool()
+request_finished.connect(tenant_pool.request_finished, dispatch_uid='apps.core.pool')
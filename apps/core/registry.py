@@ -0,0 +1,163 @@
+import time
+from dataclasses import dataclass, field
+from threading import Lock
+
+from django.conf import settings
+
+from .replicas import replica_alias
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AgencyEntry:
+    """
+    Inmobiliaria cacheada junto a sus alias de base de datos ya calculados.
+    """
+    id: int
+    name: str
+    gci_alias: str
+    gcli_alias: str
+    gci_replica_alias: str = field(init=False, repr=False)
+    gcli_replica_alias: str = field(init=False, repr=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'gci_replica_alias', replica_alias(self.gci_alias))
+        object.__setattr__(self, 'gcli_replica_alias', replica_alias(self.gcli_alias))
+
+    @classmethod
+    def from_agency(cls, agency):
+        name = agency.name.lower()
+        return cls(
+            id=agency.id,
+            name=agency.name,
+            gci_alias=f"gci_{name}",
+            gcli_alias=f"gcli_{name}",
+        )
+
+    def alias_for(self, db_type):
+        """
+        Retorna el alias de la inmobiliaria para el tipo de BD ('gci' o 'gcli').
+        """
+        return self.gcli_alias if db_type == 'gcli' else self.gci_alias
+
+    def __str__(self):
+        return self.name
+
+
+class AgencyRegistry:
+    """
+    Cache en memoria de la tabla inmobiliarias indexada por id.
+
+    La tabla completa se carga de una vez y se recarga cuando vence el TTL
+    (AGENCY_REGISTRY_TTL). Un id desconocido solo fuerza una recarga si la
+    última carga es más antigua que AGENCY_REGISTRY_MISS_RELOAD, así un header
+    inválido no se traduce en una consulta por request.
+    """
+
+    def __init__(self, ttl=None, miss_reload_interval=None):
+        self._ttl = ttl
+        self._miss_reload_interval = miss_reload_interval
+        self._lock = Lock()
+        self._reload_lock = Lock()
+        self._entries = {}
+        self._loaded_at = None
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'AGENCY_REGISTRY_TTL', 300)
+
+    @property
+    def miss_reload_interval(self):
+        if self._miss_reload_interval is not None:
+            return self._miss_reload_interval
+        return getattr(settings, 'AGENCY_REGISTRY_MISS_RELOAD', 30)
+
+    def get(self, agency_id):
+        """
+        Retorna la AgencyEntry para el id entregado o None si no existe.
+        """
+        try:
+            agency_id = int(agency_id)
+        except (TypeError, ValueError):
+            return None
+
+        if self._is_older_than(self.ttl):
+            self._refresh()
+
+        entry = self._entries.get(agency_id)
+        with self._lock:
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        if self._is_older_than(self.miss_reload_interval):
+            self._refresh()
+            entry = self._entries.get(agency_id)
+        return entry
+
+    def all(self):
+        """
+        Retorna todas las inmobiliarias registradas.
+        """
+        if self._is_older_than(self.ttl):
+            self._refresh()
+        return list(self._entries.values())
+
+    def reload(self):
+        """
+        Recarga la tabla inmobiliarias completa desde la base default.
+        """
+        with self._reload_lock:
+            self._reload()
+
+    def invalidate(self):
+        """
+        Marca la cache como vencida; la próxima lectura recarga la tabla.
+        """
+        with self._lock:
+            self._loaded_at = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'reloads': self.reloads,
+                'age': None if self._loaded_at is None else time.monotonic() - self._loaded_at,
+            }
+
+    def _is_older_than(self, seconds):
+        loaded_at = self._loaded_at
+        return loaded_at is None or time.monotonic() - loaded_at >= seconds
+
+    def _refresh(self):
+        observed = self._loaded_at
+        with self._reload_lock:
+            # Si otro thread recargó mientras esperábamos el lock, no repetir.
+            if self._loaded_at == observed:
+                self._reload()
+
+    def _reload(self):
+        entries = {agency.id: AgencyEntry.from_agency(agency) for agency in self._load()}
+        with self._lock:
+            self._entries = entries
+            self._loaded_at = time.monotonic()
+            self.reloads += 1
+        logger.debug("AgencyRegistry recargado con %d inmobiliarias", len(entries))
+
+    def _load(self):
+        # Importar aquí para evitar importación circular
+        from apps.core.models import Agency
+        return Agency.objects.using('default').only('id', 'name')
+
+
+agency_registry = AgencyRegistry()
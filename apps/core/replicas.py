@@ -0,0 +1,131 @@
+import time
+from threading import Lock
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import DatabaseError, connections
+from django.dispatch import receiver
+
+import logging
+logger = logging.getLogger(__name__)
+
+REPLICA_SUFFIX = '__replica'
+
+
+def replica_alias(db_alias):
+    return f"{db_alias}{REPLICA_SUFFIX}"
+
+
+def primary_alias(db_alias):
+    if db_alias.endswith(REPLICA_SUFFIX):
+        return db_alias[:-len(REPLICA_SUFFIX)]
+    return db_alias
+
+
+def is_replica_alias(db_alias):
+    return db_alias.endswith(REPLICA_SUFFIX)
+
+
+class ReplicaMonitor:
+    """
+    Sigue el retraso de las réplicas de lectura de las inmobiliarias.
+
+    El retraso de cada réplica se mide con SHOW REPLICA STATUS como máximo una
+    vez cada TENANT_REPLICA_LAG_CHECK_INTERVAL segundos y se cachea. Una réplica
+    se puede usar si su retraso no supera TENANT_REPLICA_MAX_LAG; si la medición
+    falla o la replicación está detenida se considera atrasada y el router vuelve
+    al primario hasta la próxima medición.
+    """
+
+    def __init__(self, max_lag=None, check_interval=None):
+        self._max_lag = max_lag
+        self._check_interval = check_interval
+        self._lock = Lock()
+        self._status = {}
+        self._replica_types = None
+
+    @property
+    def max_lag(self):
+        if self._max_lag is not None:
+            return self._max_lag
+        return getattr(settings, 'TENANT_REPLICA_MAX_LAG', 5)
+
+    @property
+    def check_interval(self):
+        if self._check_interval is not None:
+            return self._check_interval
+        return getattr(settings, 'TENANT_REPLICA_LAG_CHECK_INTERVAL', 10)
+
+    def has_replica(self, db_type):
+        """
+        Indica si hay un host de réplica configurado para 'gci' o 'gcli'.
+        """
+        replica_types = self._replica_types
+        if replica_types is None:
+            hosts = getattr(settings, 'TENANT_REPLICA_HOSTS', {})
+            replica_types = self._replica_types = frozenset(
+                family for family, host in hosts.items() if host
+            )
+        return db_type in replica_types
+
+    def reset_settings(self):
+        self._replica_types = None
+
+    def is_usable(self, db_alias):
+        """
+        Indica si la réplica del alias está dentro del retraso permitido.
+        """
+        lag = self.lag(db_alias)
+        return lag is not None and lag <= self.max_lag
+
+    def lag(self, db_alias):
+        """
+        Retorna el último retraso medido en segundos, o None si es desconocido.
+        """
+        now = time.monotonic()
+        with self._lock:
+            checked_at, lag = self._status.get(db_alias, (None, None))
+            if checked_at is not None and now - checked_at < self.check_interval:
+                return lag
+            # Los demás threads usan el valor anterior mientras se mide.
+            self._status[db_alias] = (now, lag)
+
+        try:
+            lag = self.measure_lag(connections[db_alias])
+        except DatabaseError as e:
+            logger.warning("No se pudo medir el retraso de %s: %s", db_alias, e)
+            lag = None
+
+        with self._lock:
+            self._status[db_alias] = (time.monotonic(), lag)
+        return lag
+
+    def stats(self):
+        with self._lock:
+            return {db_alias: lag for db_alias, (_, lag) in self._status.items()}
+
+    @staticmethod
+    def measure_lag(connection):
+        with connection.cursor() as cursor:
+            cursor.execute('SHOW REPLICA STATUS')
+            row = cursor.fetchone()
+            if row is None:
+                # El host no está replicando: no hay retraso que esperar.
+                return 0.0
+            columns = [column[0] for column in cursor.description]
+
+        status = dict(zip(columns, row))
+        # MariaDB usa Seconds_Behind_Master; MySQL 8.0.22+ Seconds_Behind_Source.
+        for key in ('Seconds_Behind_Master', 'Seconds_Behind_Source'):
+            if key in status:
+                return None if status[key] is None else float(status[key])
+        return None
+
+
+replica_monitor = ReplicaMonitor()
+
+
+@receiver(setting_changed)
+def reset_replica_settings(setting, **kwargs):
+    if setting == 'TENANT_REPLICA_HOSTS':
+        replica_monitor.reset_settings()
@@ -1,21 +1,85 @@
+from django.db import connections
+
+from ..context import get_current_agency
+from ..replicas import primary_alias, replica_monitor
 from ..services import DatabasesUtils
 
 class AgencyDatabaseRouter:
+    """
+    Enruta los modelos con database = 'gci' o 'gcli' al alias de la inmobiliaria actual.
+
+    db_for_read/db_for_write se llaman en cada queryset, así que todo lo que se
+    puede se resuelve una sola vez: el tipo de BD de cada modelo se memoiza, los
+    alias vienen precalculados en la AgencyEntry y cada alias se registra en el
+    pool solo la primera vez que se enruta.
+
+    Si hay réplica configurada para el tipo de BD (TENANT_REPLICA_HOSTS), las
+    lecturas van a la réplica salvo que haya una transacción abierta en el
+    primario o que la réplica esté atrasada. Las escrituras siempre van al primario.
+    """
+
+    def __init__(self):
+        self._db_types = {}
+        self._registered = set()
+
     def db_for_read(self, model, **hints):
-        agency = DatabasesUtils.get_current_agency()
-        
-        # Obtener qué BD usar del modelo
-        db_type = getattr(model, 'database', 'default')  # Si no se especifica, usa default
-        
-        if db_type == 'default':
+        agency = get_current_agency()
+        if agency is None:
+            return 'default'
+
+        db_type = self._db_type(model)
+        if db_type == 'gci':
+            db_alias, replica = agency.gci_alias, agency.gci_replica_alias
+        elif db_type == 'gcli':
+            db_alias, replica = agency.gcli_alias, agency.gcli_replica_alias
+        else:
             return 'default'
-            
-        if agency and db_type in ['gci', 'gcli']:
-            db_alias = f"{db_type}_{agency.name.lower()}"
-            DatabasesUtils.get_dynamic_db_connection(db_alias)
-            return db_alias
-            
-        return 'default'
+
+        if db_alias not in self._registered:
+            self._register(db_alias)
+        if (
+            replica_monitor.has_replica(db_type)
+            and not connections[db_alias].in_atomic_block
+        ):
+            if replica not in self._registered:
+                self._register(replica)
+            if replica_monitor.is_usable(replica):
+                return replica
+        return db_alias
 
     def db_for_write(self, model, **hints):
-        return self.db_for_read(model, **hints)
\ No newline at end of file
+        agency = get_current_agency()
+        if agency is None:
+            return 'default'
+
+        db_type = self._db_type(model)
+        if db_type == 'gci':
+            db_alias = agency.gci_alias
+        elif db_type == 'gcli':
+            db_alias = agency.gcli_alias
+        else:
+            return 'default'
+
+        if db_alias not in self._registered:
+            self._register(db_alias)
+        return db_alias
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Un objeto leído desde la réplica puede relacionarse con uno del primario
+        db1, db2 = obj1._state.db, obj2._state.db
+        if db1 and db2 and primary_alias(db1) == primary_alias(db2):
+            return True
+        return None
+
+    def _db_type(self, model):
+        # Obtener qué BD usar del modelo
+        try:
+            return self._db_types[model]
+        except KeyError:
+            # Si no se especifica, usa default
+            db_type = self._db_types[model] = getattr(model, 'database', 'default')
+            return db_type
+
+    def _register(self, db_alias):
+        DatabasesUtils.register_db_alias(db_alias)
+        self._registered.add(db_alias)
@@ -1,84 +1,108 @@
-import os
-import time
-from django.conf import settings
-from django.db import connections
-from threading import local
-
-_thread_locals = local()
+from . import context
+from .concurrent import run_concurrently
+from .fanout import fan_out
+from .identity import get_identity
+from .pool import tenant_pool
+from .registry import agency_registry
 
 class DatabasesUtils:
     
     def get_agency_from_request(request):
         """
-        Extrae la inmobiliaria de los headers de Kong.
-        Retorna None si no hay headers o son inválidos.
-        """
-        try:
-            # Obtener el agency_id del header de Kong
-            agency_id = request.headers.get('X-Agency-Id')
-            if not agency_id:
-                return None
-                
-            # Obtener la inmobiliaria
-            # Importar aquí para evitar importación circular
-            from apps.core.models import Agency
-            return Agency.objects.get(id=agency_id)
-            
-        except (Agency.DoesNotExist, ValueError):
+        Extrae la inmobiliaria del access token verificado o de los headers de
+        Kong. Retorna None si no hay headers o son inválidos.
+        La resolución se hace contra el AgencyRegistry, sin consultar la BD.
+        """
+        identity = get_identity(request)
+        agency_id = identity.agency_id if identity is not None else None
+        if not agency_id:
             return None
-    
+        return agency_registry.get(agency_id)
+
+    def get_agency(agency_id):
+        """
+        Retorna la inmobiliaria cacheada para el id entregado o None si no existe.
+        """
+        return agency_registry.get(agency_id)
+
+    def get_agencies():
+        """
+        Retorna todas las inmobiliarias del registro.
+        """
+        return agency_registry.all()
+
     def get_current_agency():
         """
-        Obtiene la inmobiliaria actual del thread local.
+        Obtiene la inmobiliaria actual del contexto del request.
         Retorna None si no hay inmobiliaria establecida.
         """
-        return getattr(_thread_locals, 'agency', None)
+        return context.get_current_agency()
 
     def set_current_agency(agency):
         """
-        Establece la inmobiliaria actual en el thread local.
+        Establece la inmobiliaria actual en el contexto del request.
+        Retorna un token para restaurar el valor anterior con reset_current_agency.
+        """
+        return context.set_current_agency(agency)
+
+    def reset_current_agency(token):
+        context.reset_current_agency(token)
+
+    def tenant_context(agency):
+        """
+        Context manager que establece la inmobiliaria solo dentro del bloque.
         """
-        _thread_locals.agency = agency
+        return context.tenant_context(agency)
 
     @staticmethod
     def get_dynamic_db_connection(db_alias):
         """
-        Dado el nombre de la inmobiliaria (por ejemplo, 'besalco'),
-        construye el alias 'gci_besalco' y, si no existe en settings.DATABASES,
-        lo agrega con la configuración necesaria.
+        Dado el alias de la inmobiliaria (por ejemplo, 'gci_besalco'),
+        lo registra en el pool de conexiones si no existe y retorna la conexión.
         """
+        return tenant_pool.acquire(db_alias)
+
+    @staticmethod
+    def register_db_alias(db_alias):
+        """
+        Registra la configuración del alias sin tocar el orden LRU del pool.
+        """
+        tenant_pool.register(db_alias)
 
-        if db_alias.startswith('gcli_'):
-            host = os.environ.get('DB_HOST_GCLI', 'localhost')
-        else:
-            host = os.environ.get('DB_HOST_GCI', 'localhost')
-    
-        if db_alias not in settings.DATABASES:
-            # Agregar la configuración dinámica
-            settings.DATABASES[db_alias] = {
-                'ENGINE': 'django.db.backends.mysql',
-                'NAME': db_alias,
-                'USER': os.environ.get('MYSQL_USER', 'default_user'),
-                'PASSWORD': os.environ.get('MYSQL_PASSWORD', 'default_password'),
-                'HOST': host,
-                'PORT': os.environ.get('DB_PORT', '3306'),
-                'TIME_ZONE': settings.TIME_ZONE,
-                'CONN_HEALTH_CHECKS': True,
-                'CONN_MAX_AGE': getattr(settings, 'CONN_MAX_AGE', 0),
-                'OPTIONS': {},
-                'AUTOCOMMIT': True,
-                'ATOMIC_REQUESTS': False,
-                
-            }
-        return connections[db_alias]
-    
     @staticmethod
     def cleanup_unused_connections():
-        current_time = time.time()
-        connection_timeout = int(os.environ.get('CONNECTION_TIMEOUT', 3600))
-        for alias in list(settings.DATABASES.keys()):
-            if alias.startswith(('gci_', 'gcli_')):
-                last_used = getattr(connections[alias], 'last_used', 0)
-                if current_time - last_used > connection_timeout:
-                    connections[alias].close()
-                    del settings.DATABASES[alias]
\ No newline at end of file
+        """
+        Cierra las conexiones de inmobiliarias inactivas del thread actual.
+        """
+        tenant_pool.evict_idle()
+
+    @staticmethod
+    def close_connections_on_request_finished():
+        """
+        Cierra las conexiones de inmobiliarias del thread actual al terminar el
+        request (ASGI, donde el thread no se reutiliza).
+        """
+        tenant_pool.close_on_request_finished()
+
+    @staticmethod
+    def get_pool_stats():
+        return tenant_pool.stats()
+
+    @staticmethod
+    def fan_out(func, args=(), kwargs=None, agencies=None, max_workers=None, timeout=None):
+        """
+        Ejecuta func en cada inmobiliaria (todas por defecto) en paralelo y
+        retorna un FanOutResult con los resultados parciales.
+        """
+        return fan_out(
+            func, args=args, kwargs=kwargs, agencies=agencies,
+            max_workers=max_workers, timeout=timeout
+        )
+
+    @staticmethod
+    def run_concurrently(*calls):
+        """
+        Ejecuta consultas independientes en paralelo dentro de la inmobiliaria
+        actual y retorna sus resultados en orden.
+        """
+        return run_concurrently(*calls)
@@ -0,0 +1,38 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+
+async def aiterate(iterator):
+    """
+    Recorre un iterador sync desde código async, pidiendo cada elemento en el
+    thread de las vistas sync (que consulta la BD con sus conexiones) y
+    entregándolo apenas está listo. Al cerrarse antes de terminar (cliente
+    desconectado) cierra también el iterador.
+    """
+    sentinel = object()
+    next_item = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            item = await next_item(iterator, sentinel)
+            if item is sentinel:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await sync_to_async(close, thread_sensitive=True)()
+
+
+def streaming_response(request, content, **kwargs):
+    """
+    StreamingHttpResponse de un iterador sync de bytes. En ASGI lo envuelve en
+    un iterador async, porque Django junta en memoria todo el contenido sync
+    antes de enviar el primer byte.
+
+    Conviene que cada elemento sea un trozo grande (una página), ya que en
+    ASGI cada uno cuesta un salto de thread.
+    """
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        content = aiterate(iter(content))
+    return StreamingHttpResponse(content, **kwargs)
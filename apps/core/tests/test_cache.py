@@ -0,0 +1,85 @@
+# core/tests/test_cache.py
+from types import SimpleNamespace
+
+from apps.core import cache as cache_module
+from apps.core.cache import DimensionCache
+from apps.core.context import tenant_context
+
+
+def make_loader(rows):
+    calls = []
+
+    def loader(ids):
+        calls.append(sorted(ids))
+        return {id_: rows[id_] for id_ in ids if id_ in rows}
+
+    return loader, calls
+
+
+def test_get_many_loads_only_missing_ids():
+    cache = DimensionCache(max_entries=10, ttl=60)
+    loader, calls = make_loader({1: 'a', 2: 'b', 3: 'c'})
+    assert cache.get_many('client', [1, 2], loader) == {1: 'a', 2: 'b'}
+    assert cache.get_many('client', [1, 2, 3], loader) == {1: 'a', 2: 'b', 3: 'c'}
+    assert calls == [[1, 2], [3]]
+    assert cache.stats()['hits'] == 2
+
+
+def test_unknown_ids_are_not_cached():
+    cache = DimensionCache(max_entries=10, ttl=60)
+    loader, calls = make_loader({})
+    assert cache.get_many('client', [7], loader) == {}
+    assert cache.get_many('client', [7], loader) == {}
+    assert len(calls) == 2
+
+
+def test_entries_expire(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: clock[0])
+    cache = DimensionCache(max_entries=10, ttl=60)
+    loader, calls = make_loader({1: 'a'})
+    cache.get_many('client', [1], loader)
+    clock[0] += 30
+    cache.get_many('client', [1], loader)
+    cache.get_many('client', [1], loader, ttl=5)
+    clock[0] += 31
+    cache.get_many('client', [1], loader)
+    assert len(calls) == 2
+
+
+def test_evicts_least_recently_used():
+    cache = DimensionCache(max_entries=2, ttl=60)
+    loader, calls = make_loader({1: 'a', 2: 'b', 3: 'c'})
+    cache.get_many('client', [1], loader)
+    cache.get_many('client', [2], loader)
+    cache.get_many('client', [1], loader)
+    cache.get_many('client', [3], loader)
+    assert cache.stats()['evicted'] == 1
+    cache.get_many('client', [1], loader)
+    cache.get_many('client', [2], loader)
+    assert calls == [[1], [2], [3], [2]]
+
+
+def test_keys_are_scoped_by_tenant_and_dimension():
+    cache = DimensionCache(max_entries=10, ttl=60)
+    besalco = SimpleNamespace(gci_alias='gci_besalco')
+    socovesa = SimpleNamespace(gci_alias='gci_socovesa')
+    with tenant_context(besalco):
+        assert cache.get_many('client', [1], lambda ids: {1: 'besalco'}) == {1: 'besalco'}
+        assert cache.get_many('evaluation', [1], lambda ids: {1: 'evaluación'}) == {1: 'evaluación'}
+    with tenant_context(socovesa):
+        assert cache.get_many('client', [1], lambda ids: {1: 'socovesa'}) == {1: 'socovesa'}
+
+    cache.invalidate(tenant='gci_besalco')
+    assert cache.stats()['entries'] == 1
+    cache.invalidate()
+    assert cache.stats()['entries'] == 0
+
+
+def test_set_many_fills_the_current_tenant():
+    cache = DimensionCache(max_entries=10, ttl=60)
+    with tenant_context(SimpleNamespace(gci_alias='gci_besalco')):
+        cache.set_many('evaluation', {1: 'leída con el detalle'})
+        loader, calls = make_loader({1: 'otra'})
+        assert cache.get_many('evaluation', [1], loader) == {1: 'leída con el detalle'}
+    assert calls == []
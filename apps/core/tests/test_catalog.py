@@ -0,0 +1,58 @@
+# core/tests/test_catalog.py
+from types import SimpleNamespace
+
+from apps.core import catalog as catalog_module
+from apps.core.catalog import LabelCatalog
+from apps.core.context import tenant_context
+
+
+def make_model(table, rows):
+    loads = []
+
+    def values_list(*fields):
+        loads.append(fields)
+        return list(rows)
+
+    model = SimpleNamespace(
+        _meta=SimpleNamespace(db_table=table),
+        objects=SimpleNamespace(values_list=values_list),
+    )
+    return model, loads
+
+
+def test_ids_load_each_table_once():
+    catalog = LabelCatalog(ttl=60)
+    status, loads = make_model('estado_tarea', [(1, 'Nueva'), (2, 'En Ejecución'), (3, 'Cerrada')])
+    assert catalog.ids(status, ['En Ejecución', 'Nueva']) == [1, 2]
+    assert catalog.ids(status, 'Cerrada') == [3]
+    assert catalog.ids(status, 'Inexistente') == []
+    assert len(loads) == 1
+
+
+def test_ids_refresh_after_ttl(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(catalog_module.time, 'monotonic', lambda: clock[0])
+    catalog = LabelCatalog(ttl=60)
+    status, loads = make_model('estado_tarea', [(1, 'Nueva')])
+    catalog.ids(status, 'Nueva')
+    clock[0] += 59
+    catalog.ids(status, 'Nueva')
+    clock[0] += 2
+    catalog.ids(status, 'Nueva')
+    assert len(loads) == 2
+
+
+def test_tenants_do_not_share_catalogs():
+    catalog = LabelCatalog(ttl=60)
+    status, loads = make_model('estado_tarea', [(1, 'Nueva')])
+    catalog.ids(status, 'Nueva')
+    with tenant_context(SimpleNamespace(gcli_alias='gcli_sur', gci_alias='gci_sur')):
+        catalog.ids(status, 'Nueva')
+        catalog.ids(status, 'Nueva')
+    assert len(loads) == 2
+
+    catalog.invalidate(tenant='gcli_sur')
+    with tenant_context(SimpleNamespace(gcli_alias='gcli_sur', gci_alias='gci_sur')):
+        catalog.ids(status, 'Nueva')
+    catalog.ids(status, 'Nueva')
+    assert len(loads) == 3
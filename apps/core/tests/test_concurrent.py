@@ -0,0 +1,74 @@
+# core/tests/test_concurrent.py
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from apps.core import concurrent
+from apps.core.concurrent import run_concurrently
+from apps.core.context import get_current_agency, tenant_context
+
+
+@pytest.fixture(autouse=True)
+def pool_calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        concurrent.tenant_pool, 'acquire',
+        lambda db_alias: calls.append(('acquire', db_alias, threading.current_thread().name))
+    )
+    monkeypatch.setattr(
+        concurrent.tenant_pool, 'evict_idle',
+        lambda: calls.append(('evict_idle', None, threading.current_thread().name))
+    )
+    return calls
+
+
+def test_runs_in_parallel_with_caller_context(settings):
+    settings.CONCURRENT_QUERIES_ENABLED = True
+    agency = SimpleNamespace(id=1, name='Besalco', gci_alias='gci_besalco', gcli_alias='gcli_besalco')
+
+    def lookup(value):
+        time.sleep(0.2)
+        return value, get_current_agency(), threading.current_thread().name
+
+    start = time.perf_counter()
+    with tenant_context(agency):
+        results = run_concurrently(lambda: lookup('clientes'), lambda: lookup('evaluaciones'))
+    elapsed = time.perf_counter() - start
+
+    assert [value for value, _, _ in results] == ['clientes', 'evaluaciones']
+    assert all(current is agency for _, current, _ in results)
+    assert all(name.startswith('concurrent_queries') for _, _, name in results)
+    assert elapsed < 0.35
+    assert get_current_agency() is None
+
+
+def test_runs_inline_when_disabled(settings):
+    settings.CONCURRENT_QUERIES_ENABLED = False
+    caller = threading.current_thread().name
+    results = run_concurrently(lambda: threading.current_thread().name, lambda: threading.current_thread().name)
+    assert results == [caller, caller]
+
+
+def test_exceptions_propagate(settings):
+    settings.CONCURRENT_QUERIES_ENABLED = True
+
+    def fail():
+        raise ValueError('sin conexión')
+
+    with pytest.raises(ValueError, match='sin conexión'):
+        run_concurrently(lambda: 1, fail)
+
+
+def test_workers_use_the_connection_pool(settings, pool_calls):
+    settings.CONCURRENT_QUERIES_ENABLED = True
+    agency = SimpleNamespace(id=1, name='Besalco', gci_alias='gci_besalco', gcli_alias='gcli_besalco')
+    with tenant_context(agency):
+        run_concurrently(lambda: 1, lambda: 2)
+
+    assert all(thread.startswith('concurrent_queries') for _, _, thread in pool_calls)
+    assert sorted(alias for action, alias, _ in pool_calls if action == 'acquire') == [
+        'gci_besalco', 'gci_besalco', 'gcli_besalco', 'gcli_besalco',
+    ]
+    assert sum(action == 'evict_idle' for action, _, _ in pool_calls) == 2
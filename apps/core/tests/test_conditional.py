@@ -0,0 +1,66 @@
+# core/tests/test_conditional.py
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from apps.core.conditional import conditional_etag
+
+state = {'version': 1, 'calls': 0}
+
+
+class ExampleViewSet(viewsets.ViewSet):
+    authentication_classes = []
+    permission_classes = []
+
+    @action(detail=False, methods=['get'])
+    @conditional_etag(lambda request: (state['version'],))
+    def example(self, request):
+        state['calls'] += 1
+        return Response({'version': state['version']})
+
+
+view = ExampleViewSet.as_view({'get': 'example'})
+
+
+def get(etag=None, user_rut=None, **params):
+    headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+    if user_rut:
+        headers['HTTP_X_USER_RUT'] = user_rut
+    return view(APIRequestFactory().get('/example/', params, **headers))
+
+
+def test_matching_etag_skips_the_view():
+    state.update(version=1, calls=0)
+    first = get()
+    assert first.status_code == 200
+    etag = first['ETag']
+
+    second = get(etag)
+    assert second.status_code == 304
+    assert second['ETag'] == etag
+    assert state['calls'] == 1
+
+    state['version'] = 2
+    third = get(etag)
+    assert third.status_code == 200
+    assert third['ETag'] != etag
+
+
+def test_etag_depends_on_query_params():
+    state.update(version=1, calls=0)
+    etag = get(time_status='today')['ETag']
+    assert get(etag, time_status='overdue').status_code == 200
+    assert get(f'"otro", {etag}', time_status='today').status_code == 304
+
+
+def test_etag_depends_on_user():
+    state.update(version=1, calls=0)
+    first = get(user_rut='11111111')
+    assert {'Authorization', 'X-User-Rut'} <= set(first['Vary'].split(', '))
+
+    # Otro usuario con el mismo ETag no recibe 304 de la respuesta del primero
+    assert get(first['ETag'], user_rut='22222222').status_code == 200
+    not_modified = get(first['ETag'], user_rut='11111111')
+    assert not_modified.status_code == 304
+    assert {'Authorization', 'X-User-Rut'} <= set(not_modified['Vary'].split(', '))
@@ -0,0 +1,73 @@
+# core/tests/test_context.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from apps.core.middlewares.databases import DynamicDatabaseMiddleware
+from apps.core.registry import AgencyEntry
+from apps.core.services import DatabasesUtils
+
+BESALCO = AgencyEntry(id=1, name='Besalco', gci_alias='gci_besalco', gcli_alias='gcli_besalco')
+
+
+@pytest.fixture
+def tenant_stubs(monkeypatch):
+    monkeypatch.setattr(DatabasesUtils, 'get_agency_from_request', lambda request: BESALCO)
+    monkeypatch.setattr(DatabasesUtils, 'get_dynamic_db_connection', lambda db_alias: None)
+    monkeypatch.setattr(DatabasesUtils, 'cleanup_unused_connections', lambda: None)
+
+
+def test_tenant_context_restores_previous_agency():
+    assert DatabasesUtils.get_current_agency() is None
+    with DatabasesUtils.tenant_context(BESALCO):
+        assert DatabasesUtils.get_current_agency() is BESALCO
+    assert DatabasesUtils.get_current_agency() is None
+
+
+def test_agency_does_not_leak_between_threads():
+    with DatabasesUtils.tenant_context(BESALCO):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            assert executor.submit(DatabasesUtils.get_current_agency).result() is None
+
+
+def test_concurrent_tasks_see_their_own_agency():
+    other = AgencyEntry(id=2, name='Otra', gci_alias='gci_otra', gcli_alias='gcli_otra')
+
+    async def handle(agency):
+        with DatabasesUtils.tenant_context(agency):
+            await asyncio.sleep(0)
+            return DatabasesUtils.get_current_agency()
+
+    async def main():
+        return await asyncio.gather(handle(BESALCO), handle(other))
+
+    assert asyncio.run(main()) == [BESALCO, other]
+
+
+def test_sync_middleware_scopes_agency_to_request(tenant_stubs):
+    seen = []
+
+    def get_response(request):
+        seen.append(DatabasesUtils.get_current_agency())
+        return HttpResponse()
+
+    middleware = DynamicDatabaseMiddleware(get_response)
+    middleware(RequestFactory().get('/'))
+    assert seen == [BESALCO]
+    assert DatabasesUtils.get_current_agency() is None
+
+
+def test_async_middleware_scopes_agency_to_request(tenant_stubs):
+    seen = []
+
+    async def get_response(request):
+        seen.append(DatabasesUtils.get_current_agency())
+        return HttpResponse()
+
+    middleware = DynamicDatabaseMiddleware(get_response)
+    asyncio.run(middleware(RequestFactory().get('/')))
+    assert seen == [BESALCO]
+    assert DatabasesUtils.get_current_agency() is None
@@ -0,0 +1,85 @@
+# core/tests/test_fanout.py
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from apps.core import fanout
+from apps.core.registry import AgencyEntry
+from apps.core.services import DatabasesUtils
+
+AGENCIES = [
+    AgencyEntry(id=id_, name=name, gci_alias=f'gci_{name}', gcli_alias=f'gcli_{name}')
+    for id_, name in [(1, 'a'), (2, 'b'), (3, 'c')]
+]
+
+
+@pytest.fixture(autouse=True)
+def no_connections(monkeypatch):
+    monkeypatch.setattr(fanout.tenant_pool, 'acquire', lambda db_alias: None)
+
+
+def test_runs_each_agency_in_its_context():
+    result = DatabasesUtils.fan_out(
+        lambda: DatabasesUtils.get_current_agency().name, agencies=AGENCIES, max_workers=2
+    )
+    assert result.complete
+    assert result.results == {1: 'a', 2: 'b', 3: 'c'}
+    assert DatabasesUtils.get_current_agency() is None
+
+
+def test_errors_are_partial_results():
+    def func():
+        if DatabasesUtils.get_current_agency().id == 2:
+            raise ValueError('sin conexión')
+        return 1
+
+    result = DatabasesUtils.fan_out(func, agencies=AGENCIES)
+    assert result.results == {1: 1, 3: 1}
+    assert result.errors == {2: 'sin conexión'}
+    assert result.merge(sum) == 2
+
+
+def test_slow_agency_times_out():
+    release = threading.Event()
+
+    def func():
+        if DatabasesUtils.get_current_agency().id == 3:
+            release.wait(5)
+        return 1
+
+    try:
+        result = DatabasesUtils.fan_out(func, agencies=AGENCIES, timeout=0.2)
+    finally:
+        release.set()
+    assert result.timed_out == [3]
+    assert sorted(result.results) == [1, 2]
+
+
+class FakeConnection:
+    def __init__(self, alias, connection=None):
+        self.alias = alias
+        self.connection = connection
+
+    def close(self):
+        self.connection = None
+
+
+def test_closes_only_connections_opened_by_the_tenant(monkeypatch):
+    pooled = FakeConnection('gci_z', connection=object())
+    default = FakeConnection('default')
+    tenant = FakeConnection('gci_a')
+    monkeypatch.setattr(
+        fanout, 'connections', SimpleNamespace(all=lambda initialized_only: [pooled, default, tenant])
+    )
+    released = []
+    monkeypatch.setattr(fanout.tenant_pool, 'release', released.append)
+
+    def func():
+        default.connection = object()
+        tenant.connection = object()
+
+    fanout._run_for_tenant(func, AGENCIES[0], (), {}, {})
+    assert released == ['gci_a']
+    assert default.connection is None
+    assert pooled.connection is not None
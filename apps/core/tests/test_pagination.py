@@ -0,0 +1,19 @@
+# core/tests/test_pagination.py
+from datetime import datetime, timezone
+
+import pytest
+
+from apps.core.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip_keeps_microseconds():
+    due_date = datetime(2025, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    cursor = encode_cursor([due_date, 42])
+    assert '=' not in cursor
+    assert decode_cursor(cursor, 2) == ['2025-03-01T12:30:15.123456+00:00', 42]
+
+
+@pytest.mark.parametrize('cursor', ['no-es-base64!', encode_cursor([1]), 'e30'])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 2)
@@ -0,0 +1,148 @@
+# core/tests/test_pool.py
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+from django.core.handlers.asgi import ASGIHandler
+
+from apps.core import pool as pool_module
+from apps.core.pool import TenantConnectionPool, tenant_pool
+from apps.core.replicas import replica_monitor
+from apps.core.services import DatabasesUtils
+
+
+class FakeWrapper:
+    def __init__(self):
+        self.connection = None
+        self.in_atomic_block = False
+
+    def close(self):
+        self.connection = None
+
+
+class FakeConnections:
+    def __init__(self):
+        self.settings = {}
+        self._wrappers = {}
+
+    def __getitem__(self, alias):
+        return self._wrappers.setdefault(alias, FakeWrapper())
+
+
+@pytest.fixture
+def fake_connections(monkeypatch):
+    fake = FakeConnections()
+    monkeypatch.setattr(pool_module, 'connections', fake)
+    return fake
+
+
+def open_connection(pool, alias):
+    connection = pool.acquire(alias)
+    connection.connection = object()
+    return connection
+
+
+def test_acquire_registers_alias_once(fake_connections):
+    pool = TenantConnectionPool(max_connections=5, idle_timeout=60)
+    pool.acquire('gci_besalco')
+    pool.acquire('gci_besalco')
+    assert fake_connections.settings['gci_besalco']['NAME'] == 'gci_besalco'
+
+
+def test_reuse_is_counted(fake_connections):
+    pool = TenantConnectionPool(max_connections=5, idle_timeout=60)
+    open_connection(pool, 'gci_besalco')
+    pool.acquire('gci_besalco')
+    stats = pool.stats()
+    assert stats['created'] == 1
+    assert stats['reused'] == 1
+    assert stats['open'] == 1
+
+
+def test_lru_eviction_over_capacity(fake_connections):
+    pool = TenantConnectionPool(max_connections=2, idle_timeout=60)
+    first = open_connection(pool, 'gci_a')
+    open_connection(pool, 'gci_b')
+    pool.acquire('gci_a')
+    open_connection(pool, 'gci_c')
+
+    assert first.connection is not None
+    assert fake_connections['gci_b'].connection is None
+    assert pool.stats()['evicted'] == 1
+    assert pool.stats()['open'] == 2
+
+
+def test_atomic_connections_are_not_evicted(fake_connections):
+    pool = TenantConnectionPool(max_connections=1, idle_timeout=60)
+    busy = open_connection(pool, 'gci_a')
+    busy.in_atomic_block = True
+    open_connection(pool, 'gci_b')
+    assert busy.connection is not None
+
+
+def test_evict_idle(fake_connections, monkeypatch):
+    pool = TenantConnectionPool(max_connections=5, idle_timeout=18)
+    clock = iter([0, 5, 20])
+    monkeypatch.setattr(pool_module.time, 'monotonic', lambda: next(clock))
+    open_connection(pool, 'gci_a')
+    open_connection(pool, 'gci_b')
+    pool.evict_idle()
+    assert fake_connections['gci_a'].connection is None
+    assert fake_connections['gci_b'].connection is not None
+
+
+def call_asgi(path):
+    async def request():
+        sent = []
+        received = []
+
+        async def receive():
+            if received:
+                # Sin desconexión del cliente hasta que termine el request
+                await asyncio.Future()
+            received.append(True)
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'', 'headers': []}
+        await ASGIHandler()(scope, receive, send)
+        return sent
+
+    # Como un servidor ASGI: un event loop sin async_to_sync alrededor, que
+    # haría correr el código sync en el thread que llama
+    return asyncio.run(request())
+
+
+@pytest.mark.django_db
+def test_asgi_requests_close_their_tenant_connections(settings, fake_connections, monkeypatch):
+    settings.MIDDLEWARE = ['apps.core.middlewares.databases.DynamicDatabaseMiddleware']
+    agency = SimpleNamespace(gci_alias='gci_besalco', gcli_alias='gcli_besalco')
+    monkeypatch.setattr(DatabasesUtils, 'get_agency_from_request', staticmethod(lambda request: agency))
+    monkeypatch.setattr(replica_monitor, 'has_replica', lambda db_type: False)
+    threads = []
+
+    def acquire(db_alias):
+        threads.append(threading.current_thread().name)
+        return open_connection(tenant_pool, db_alias)
+
+    monkeypatch.setattr(DatabasesUtils, 'get_dynamic_db_connection', staticmethod(acquire))
+    evicted = tenant_pool.stats()['evicted']
+
+    for _ in range(3):
+        call_asgi('/sin-ruta/')
+        assert fake_connections['gci_besalco'].connection is None
+        assert fake_connections['gcli_besalco'].connection is None
+
+    # Django atiende cada request ASGI en un thread nuevo: nada que reutilizar
+    assert len(set(threads)) == 3
+    assert tenant_pool.stats()['evicted'] == evicted + 6
+
+
+def test_wsgi_requests_keep_their_connections(fake_connections):
+    pool = TenantConnectionPool(max_connections=5, idle_timeout=60)
+    connection = open_connection(pool, 'gci_besalco')
+    pool.request_finished()
+    assert connection.connection is not None
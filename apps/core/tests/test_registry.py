@@ -0,0 +1,56 @@
+# core/tests/test_registry.py
+from types import SimpleNamespace
+
+from apps.core.registry import AgencyRegistry
+
+
+def make_registry(monkeypatch, agencies, **kwargs):
+    registry = AgencyRegistry(**kwargs)
+    calls = []
+
+    def fake_load():
+        calls.append(1)
+        return [SimpleNamespace(id=id_, name=name) for id_, name in agencies]
+
+    monkeypatch.setattr(registry, '_load', fake_load)
+    return registry, calls
+
+
+def test_get_precomputes_aliases(monkeypatch):
+    registry, _ = make_registry(monkeypatch, [(1, 'Besalco')], ttl=60, miss_reload_interval=60)
+    agency = registry.get('1')
+    assert agency.name == 'Besalco'
+    assert agency.gci_alias == 'gci_besalco'
+    assert agency.gcli_alias == 'gcli_besalco'
+    assert agency.alias_for('gcli') == 'gcli_besalco'
+
+
+def test_hits_do_not_reload(monkeypatch):
+    registry, calls = make_registry(monkeypatch, [(1, 'Besalco')], ttl=60, miss_reload_interval=60)
+    for _ in range(5):
+        registry.get(1)
+    assert len(calls) == 1
+    assert registry.stats()['hits'] == 5
+    assert registry.stats()['misses'] == 0
+
+
+def test_unknown_id_is_a_throttled_miss(monkeypatch):
+    registry, calls = make_registry(monkeypatch, [(1, 'Besalco')], ttl=60, miss_reload_interval=60)
+    assert registry.get(2) is None
+    assert registry.get(2) is None
+    assert len(calls) == 1
+    assert registry.stats()['misses'] == 2
+
+
+def test_invalid_id_returns_none(monkeypatch):
+    registry, calls = make_registry(monkeypatch, [(1, 'Besalco')], ttl=60, miss_reload_interval=60)
+    assert registry.get('abc') is None
+    assert calls == []
+
+
+def test_invalidate_forces_reload(monkeypatch):
+    registry, calls = make_registry(monkeypatch, [(1, 'Besalco')], ttl=60, miss_reload_interval=60)
+    registry.get(1)
+    registry.invalidate()
+    registry.get(1)
+    assert len(calls) == 2
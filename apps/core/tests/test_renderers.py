@@ -0,0 +1,56 @@
+# core/tests/test_renderers.py
+import io
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from apps.core import renderers
+from apps.core.parsers import ORJSONParser
+from apps.core.renderers import ORJSONRenderer
+
+DATA = {
+    'status': 'success',
+    'data': [
+        {
+            'id': 1,
+            'name': 'Peñalolén\u2028',
+            'registered': datetime(2025, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+            'contactDate': date(2025, 3, 2),
+            'amount': Decimal('10.50'),
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'ratio': 0.25,
+            'tags': ('a', 'b'),
+            'empty': None,
+        }
+    ],
+    1: 'clave numérica',
+}
+
+
+def test_output_matches_json_renderer():
+    assert ORJSONRenderer().render(DATA) == JSONRenderer().render(DATA)
+
+
+def test_falls_back_without_orjson(monkeypatch):
+    monkeypatch.setattr(renderers, 'orjson', None)
+    assert ORJSONRenderer().render(DATA) == JSONRenderer().render(DATA)
+
+
+def test_indent_and_big_integers_use_json_renderer():
+    assert ORJSONRenderer().render(DATA, 'application/json; indent=2') == \
+        JSONRenderer().render(DATA, 'application/json; indent=2')
+    assert ORJSONRenderer().render({'id': 2 ** 70}) == b'{"id":1180591620717411303424}'
+    assert ORJSONRenderer().render(None) == b''
+
+
+def test_parser_reads_utf8_and_rejects_invalid_json():
+    parser = ORJSONParser()
+    assert parser.parse(io.BytesIO('{"rut": "12.345.678-9", "nombre": "Ñuñoa"}'.encode())) == {
+        'rut': '12.345.678-9', 'nombre': 'Ñuñoa',
+    }
+    with pytest.raises(ParseError):
+        parser.parse(io.BytesIO(b'{"rut": '))
@@ -0,0 +1,96 @@
+# core/tests/test_routers.py
+import pytest
+
+from apps.core.models import Agency, Client
+from apps.core.models.tasks import Task
+from apps.core.registry import AgencyEntry
+from apps.core.routers.databases import AgencyDatabaseRouter
+from apps.core.services import DatabasesUtils
+
+BESALCO = AgencyEntry(id=1, name='Besalco', gci_alias='gci_besalco', gcli_alias='gcli_besalco')
+
+
+@pytest.fixture
+def registered(monkeypatch):
+    aliases = []
+    monkeypatch.setattr(DatabasesUtils, 'register_db_alias', aliases.append)
+    return aliases
+
+
+def test_without_agency_routes_to_default(registered):
+    router = AgencyDatabaseRouter()
+    assert router.db_for_read(Task) == 'default'
+    assert registered == []
+
+
+def test_routes_by_model_database(registered):
+    router = AgencyDatabaseRouter()
+    with DatabasesUtils.tenant_context(BESALCO):
+        assert router.db_for_read(Task) == 'gcli_besalco'
+        assert router.db_for_write(Client) == 'gci_besalco'
+        assert router.db_for_read(Agency) == 'default'
+
+
+def test_alias_is_registered_once(registered):
+    router = AgencyDatabaseRouter()
+    with DatabasesUtils.tenant_context(BESALCO):
+        for _ in range(3):
+            router.db_for_read(Task)
+    assert registered == ['gcli_besalco']
+
+
+class FakeConnection:
+    in_atomic_block = False
+
+
+@pytest.fixture
+def replicas(settings, monkeypatch, registered):
+    from apps.core.routers import databases
+    settings.TENANT_REPLICA_HOSTS = {'gci': None, 'gcli': 'replica-host'}
+    fake_connections = {'gcli_besalco': FakeConnection(), 'gci_besalco': FakeConnection()}
+    monkeypatch.setattr(databases, 'connections', fake_connections)
+    usable = {'gcli_besalco__replica': True}
+    monkeypatch.setattr(databases.replica_monitor, 'is_usable', lambda db_alias: usable[db_alias])
+    return fake_connections, usable
+
+
+def test_reads_go_to_replica(replicas):
+    router = AgencyDatabaseRouter()
+    with DatabasesUtils.tenant_context(BESALCO):
+        assert router.db_for_read(Task) == 'gcli_besalco__replica'
+        assert router.db_for_write(Task) == 'gcli_besalco'
+        # gci no tiene réplica configurada
+        assert router.db_for_read(Client) == 'gci_besalco'
+
+
+def test_reads_inside_transaction_stay_on_primary(replicas):
+    fake_connections, _ = replicas
+    fake_connections['gcli_besalco'].in_atomic_block = True
+    router = AgencyDatabaseRouter()
+    with DatabasesUtils.tenant_context(BESALCO):
+        assert router.db_for_read(Task) == 'gcli_besalco'
+
+
+def test_lagging_replica_falls_back_to_primary(replicas):
+    _, usable = replicas
+    usable['gcli_besalco__replica'] = False
+    router = AgencyDatabaseRouter()
+    with DatabasesUtils.tenant_context(BESALCO):
+        assert router.db_for_read(Task) == 'gcli_besalco'
+
+
+def test_replica_lag_is_cached(monkeypatch):
+    from apps.core.replicas import ReplicaMonitor
+    monitor = ReplicaMonitor(max_lag=5, check_interval=60)
+    measured = iter([1.0, 30.0])
+    calls = []
+
+    def fake_measure(connection):
+        calls.append(connection)
+        return next(measured)
+
+    monkeypatch.setattr(monitor, 'measure_lag', fake_measure)
+    monkeypatch.setattr('apps.core.replicas.connections', {'gci_a__replica': object()})
+    assert monitor.is_usable('gci_a__replica')
+    assert monitor.is_usable('gci_a__replica')
+    assert len(calls) == 1
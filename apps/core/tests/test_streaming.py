@@ -0,0 +1,49 @@
+# core/tests/test_streaming.py
+import threading
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory, RequestFactory
+
+from apps.core.streaming import aiterate, streaming_response
+
+
+def test_aiterate_yields_each_item_before_the_next_is_read():
+    events = []
+
+    def pages():
+        for number in (1, 2):
+            events.append(f'leída {number}')
+            yield number
+
+    async def consume():
+        async for page in aiterate(pages()):
+            events.append(f'enviada {page}')
+
+    async_to_sync(consume)()
+    assert events == ['leída 1', 'enviada 1', 'leída 2', 'enviada 2']
+
+
+def test_aiterate_closes_the_iterator_when_the_client_leaves():
+    closed = threading.Event()
+
+    def pages():
+        try:
+            while True:
+                yield b'x'
+        finally:
+            closed.set()
+
+    async def consume_one():
+        stream = aiterate(pages())
+        await stream.__anext__()
+        await stream.aclose()
+
+    async_to_sync(consume_one)()
+    assert closed.is_set()
+
+
+def test_streaming_response_is_async_only_under_asgi():
+    asgi = streaming_response(AsyncRequestFactory().get('/'), iter([b'a']))
+    wsgi = streaming_response(RequestFactory().get('/'), iter([b'a']))
+    assert asgi.is_async
+    assert not wsgi.is_async
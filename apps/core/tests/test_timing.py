@@ -0,0 +1,97 @@
+# core/tests/test_timing.py
+import threading
+from types import SimpleNamespace
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import connection, connections
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+
+from apps.core import concurrent
+from apps.core.concurrent import run_concurrently
+from apps.core.context import tenant_context
+from apps.core.middlewares.timing import ServerTimingMiddleware
+
+
+@pytest.mark.django_db
+def test_server_timing_counts_queries_per_alias():
+    def get_response(request):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.execute('SELECT 2')
+        return HttpResponse()
+
+    response = ServerTimingMiddleware(get_response)(RequestFactory().get('/'))
+    header = response['Server-Timing']
+    assert 'db-default;desc="2 queries"' in header
+    assert 'total;dur=' in header
+    assert connection.execute_wrappers == []
+
+
+def test_server_timing_can_be_disabled(settings):
+    settings.SERVER_TIMING_ENABLED = False
+    response = ServerTimingMiddleware(lambda request: HttpResponse())(RequestFactory().get('/'))
+    assert not response.has_header('Server-Timing')
+
+
+@pytest.mark.django_db
+def test_server_timing_counts_queries_of_sync_views_under_asgi():
+    # En ASGI la vista sync corre en otro thread, con sus propias conexiones
+    def view(request):
+        middleware.process_view(request, view, (), {})
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        return HttpResponse()
+
+    async def get_response(request):
+        return await sync_to_async(view)(request)
+
+    middleware = ServerTimingMiddleware(get_response)
+    response = async_to_sync(middleware)(RequestFactory().get('/'))
+    assert 'db-default;desc="1 queries"' in response['Server-Timing']
+    assert connection.execute_wrappers == []
+
+
+def test_server_timing_hides_tenant_aliases():
+    agency = SimpleNamespace(gci_alias='gci_besalco', gcli_alias='gcli_besalco')
+    with tenant_context(agency):
+        aliases = ServerTimingMiddleware._request_aliases()
+    assert aliases == {'default': 'default', 'gci_besalco': 'gci', 'gcli_besalco': 'gcli'}
+
+
+@pytest.fixture
+def own_executor(monkeypatch):
+    # Un pool de workers propio: sus conexiones no deben quedar abiertas para
+    # los tests siguientes, que no tienen acceso a la BD
+    monkeypatch.setattr(concurrent, '_executor', None)
+    yield
+    if concurrent._executor is not None:
+        concurrent._executor.submit(connections.close_all).result()
+        concurrent._executor.shutdown()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_server_timing_counts_queries_of_concurrent_workers(settings, own_executor):
+    settings.CONCURRENT_QUERIES_ENABLED = True
+    settings.CONCURRENT_QUERIES_MAX_WORKERS = 1
+
+    def query():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        return threading.current_thread().name
+
+    def get_response(request):
+        threads = run_concurrently(query, query)
+        assert all(name.startswith('concurrent_queries') for name in threads)
+        return HttpResponse()
+
+    response = ServerTimingMiddleware(get_response)(RequestFactory().get('/'))
+    assert 'db-default;desc="2 queries"' in response['Server-Timing']
+
+
+def test_server_timing_marks_streamed_responses():
+    response = ServerTimingMiddleware(lambda request: StreamingHttpResponse(iter([b'fila'])))(
+        RequestFactory().get('/')
+    )
+    assert 'db;desc="streamed"' in response['Server-Timing']
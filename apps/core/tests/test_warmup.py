@@ -0,0 +1,99 @@
+# core/tests/test_warmup.py
+import runpy
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from django.conf import settings
+
+from apps.core import warmup
+from apps.core.services import DatabasesUtils
+
+
+class FakeConnection:
+    def __init__(self, alias, fail=False):
+        self.alias = alias
+        self.fail = fail
+        self.events = []
+
+    def ensure_connection(self):
+        if self.fail:
+            raise OSError('sin respuesta')
+        self.events.append(('connect', threading.current_thread().name))
+
+    def cursor(self):
+        return FakeCursor()
+
+    def close(self):
+        self.events.append(('close', threading.current_thread().name))
+
+
+class FakeCursor:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql):
+        pass
+
+
+@pytest.fixture
+def fake_connections(monkeypatch):
+    created = {}
+
+    def connection(alias):
+        if alias not in created:
+            created[alias] = FakeConnection(alias, fail=alias == 'gcli_caida')
+        return created[alias]
+
+    monkeypatch.setattr(warmup, 'connections', type('Connections', (), {
+        '__getitem__': lambda self, alias: connection(alias),
+    })())
+    monkeypatch.setattr(DatabasesUtils, 'register_db_alias', staticmethod(lambda alias: None))
+    monkeypatch.setattr(DatabasesUtils, 'get_dynamic_db_connection', staticmethod(connection))
+    return created
+
+
+def test_caller_keeps_the_pool_and_workers_probe_the_rest(settings, fake_connections):
+    settings.TENANT_POOL_MAX_CONNECTIONS = 1
+    agencies = [
+        SimpleNamespace(gci_alias='gci_besalco', gcli_alias='gcli_besalco'),
+        SimpleNamespace(gci_alias='gci_sur', gcli_alias='gcli_caida'),
+    ]
+
+    results = warmup.warm_tenants(agencies=agencies, max_workers=2)
+
+    assert [(result.alias, result.ok, result.kept) for result in results] == [
+        ('gci_besalco', True, True), ('gcli_besalco', True, False),
+        ('gci_sur', True, False), ('gcli_caida', False, False),
+    ]
+    # La conexión que queda se abre una sola vez, en el thread que llama
+    caller = threading.current_thread().name
+    assert fake_connections['gci_besalco'].events == [('connect', caller)]
+    # El resto lo abre y cierra un worker con su propia conexión
+    for alias in ('gcli_besalco', 'gci_sur'):
+        (connect, worker), close = fake_connections[alias].events
+        assert connect == 'connect' and worker.startswith('warm_tenants')
+        assert close == ('close', worker)
+
+
+def test_without_keep_every_connection_is_probed_and_closed(fake_connections):
+    agencies = [SimpleNamespace(gci_alias='gci_besalco', gcli_alias='gcli_besalco')]
+
+    results = warmup.warm_tenants(agencies=agencies, keep=False)
+
+    assert not any(result.kept for result in results)
+    assert all(connection.events[-1][0] == 'close' for connection in fake_connections.values())
+
+
+@pytest.mark.parametrize('worker_class, keep', [('SyncWorker', True), ('UvicornWorker', False)])
+def test_gunicorn_warms_each_worker_after_init(monkeypatch, worker_class, keep):
+    calls = []
+    monkeypatch.setattr(warmup, 'warm_on_startup', lambda keep: calls.append(keep))
+    config = runpy.run_path(str(Path(settings.BASE_DIR) / 'gunicorn.conf.py'))
+
+    config['post_worker_init'](type(worker_class, (), {})())
+    assert calls == [keep]
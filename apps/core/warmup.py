@@ -0,0 +1,110 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connections
+
+from .pool import tenant_pool
+from .services import DatabasesUtils
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmupResult:
+    agency: object
+    alias: str
+    elapsed: float = None
+    error: str = None
+    kept: bool = False
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def warm_tenants(agencies=None, max_workers=None, keep=True):
+    """
+    Registra los alias gci_/gcli_ de las inmobiliarias y abre cada conexión una
+    sola vez, con health check (SELECT 1).
+
+    Las conexiones de Django pertenecen al thread que las abre. Con keep, el
+    thread que llama abre en su pool las primeras TENANT_POOL_MAX_CONNECTIONS,
+    que son las que usarán sus requests, mientras hasta max_workers threads
+    verifican el resto y las cierran. Sin keep todas se verifican y cierran.
+    Retorna un WarmupResult por alias.
+    """
+    if agencies is None:
+        agencies = DatabasesUtils.get_agencies()
+    if max_workers is None:
+        max_workers = getattr(settings, 'WARM_TENANTS_MAX_WORKERS', 8)
+
+    results = []
+    for agency in agencies:
+        for db_alias in (agency.gci_alias, agency.gcli_alias):
+            DatabasesUtils.register_db_alias(db_alias)
+            results.append(WarmupResult(agency=agency, alias=db_alias))
+
+    kept = results[:tenant_pool.max_connections] if keep else []
+    probed = results[len(kept):]
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='warm_tenants') as executor:
+        probes = [executor.submit(_probe, result) for result in probed]
+        for result in kept:
+            _check(result, DatabasesUtils.get_dynamic_db_connection(result.alias))
+            result.kept = result.ok
+        for probe in probes:
+            probe.result()
+
+    return results
+
+
+def warm_on_startup(keep=True):
+    """
+    Precalienta las conexiones del worker si WARM_TENANTS_ON_STARTUP está
+    activo. Un error nunca impide que el worker arranque.
+
+    Debe llamarse en el worker después del fork y antes de atender requests,
+    desde el hook post_worker_init de gunicorn (ver gunicorn.conf.py): al
+    importar wsgi.py/asgi.py con --preload las conexiones quedarían en el
+    master y los workers heredarían sus sockets. keep indica si el thread que
+    llama es el que atenderá los requests (worker sync de gunicorn); si no,
+    las conexiones solo se verifican.
+    """
+    if not getattr(settings, 'WARM_TENANTS_ON_STARTUP', False):
+        return []
+    try:
+        results = warm_tenants(keep=keep)
+    except Exception:
+        logger.exception("No se pudieron precalentar las conexiones de inmobiliarias")
+        return []
+
+    failed = [result for result in results if not result.ok]
+    logger.info(
+        "Conexiones de inmobiliarias precalentadas: %d ok, %d con error",
+        len(results) - len(failed), len(failed)
+    )
+    for result in failed:
+        logger.warning("No se pudo conectar %s: %s", result.alias, result.error)
+    return results
+
+
+def _check(result, connection):
+    try:
+        start = time.perf_counter()
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        result.elapsed = time.perf_counter() - start
+    except Exception as e:
+        result.error = str(e)
+
+
+def _probe(result):
+    connection = connections[result.alias]
+    try:
+        _check(result, connection)
+    finally:
+        connection.close()
@@ -0,0 +1,259 @@
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Case, CharField, Count, Max, Value, When
+from django.utils import timezone
+
+from .models import Evaluation, FollowUpCounter, FollowUpCounterState, FollowUpTaskSnapshot, TaskHistory
+from .services import MEANS_MAP, FollowUpService
+
+import logging
+logger = logging.getLogger('follow_up.counters')
+
+COUNTER_MODELS = [FollowUpTaskSnapshot, FollowUpCounter, FollowUpCounterState]
+
+# Tamaño de los lotes de ids en las consultas con id__in
+_CHUNK_SIZE = 1000
+
+
+class FollowUpCounterService:
+    """
+    Mantiene en la BD gcli de la inmobiliaria actual los contadores de tareas de
+    seguimiento abiertas por (usuario, día límite, medio de entrada), para que
+    get_summary(source='counters') no tenga que recorrer tarea.
+
+    seguimiento_tarea guarda la contribución de cada tarea y seguimiento_contador
+    su agregado. sync procesa los historial_tarea nuevos desde la marca de agua
+    de seguimiento_contador_estado y recalcula solo las tareas que cambiaron y
+    los contadores de sus usuarios. Los cambios que no dejan registro en
+    historial_tarea (por ejemplo la visita de una evaluación en gci) solo se
+    corrigen con rebuild; check compara los contadores con la consulta en vivo.
+    """
+
+    @staticmethod
+    def _alias():
+        return router.db_for_write(FollowUpCounter)
+
+    @staticmethod
+    def create_tables():
+        """
+        Crea las tablas de contadores que no existan y retorna sus nombres.
+        """
+        connection = connections[FollowUpCounterService._alias()]
+        existing = set(connection.introspection.table_names())
+        missing = [model for model in COUNTER_MODELS if model._meta.db_table not in existing]
+        if missing:
+            with connection.schema_editor() as editor:
+                for model in missing:
+                    editor.create_model(model)
+        return [model._meta.db_table for model in missing]
+
+    @staticmethod
+    def _load_means(evaluation_ids):
+        """
+        Retorna {id_evaluacion: medio de entrada}, sin pasar por el cache de
+        dimensiones para no arrastrar datos vencidos a los contadores.
+        """
+        evaluation_ids = list(evaluation_ids)
+        means = {}
+        for start in range(0, len(evaluation_ids), _CHUNK_SIZE):
+            for evaluation_id, input_means_id in Evaluation.objects.filter(
+                id__in=evaluation_ids[start:start + _CHUNK_SIZE]
+            ).values_list('id', 'visit_id__input_means_id'):
+                means[evaluation_id] = MEANS_MAP.get(input_means_id, 'others')
+        return means
+
+    @staticmethod
+    def _snapshots(tasks):
+        """
+        Arma los FollowUpTaskSnapshot de un queryset de tareas de seguimiento
+        abiertas, con el mismo criterio de usuario que _get_tasks.
+        """
+        rows = [
+            (task_id, due_date, evaluation_id, username)
+            for task_id, due_date, evaluation_id, username, rut_gci in tasks.values_list(
+                'id', 'due_date', 'evaluation_id',
+                'task_user__sso_username__username_sso', 'task_user__sso_username__rut_gci',
+            )
+            if username is not None and str(rut_gci) == username
+        ]
+        means = FollowUpCounterService._load_means({row[2] for row in rows if row[2] is not None})
+        return [
+            FollowUpTaskSnapshot(
+                task_id=task_id,
+                username_sso=username,
+                due_day=timezone.localdate(due_date),
+                means=means.get(evaluation_id, 'others'),
+            )
+            for task_id, due_date, evaluation_id, username in rows
+        ]
+
+    @staticmethod
+    def _recount(usernames):
+        """
+        Recalcula desde seguimiento_tarea todos los contadores de los usuarios.
+        """
+        usernames = list(usernames)
+        for start in range(0, len(usernames), _CHUNK_SIZE):
+            chunk = usernames[start:start + _CHUNK_SIZE]
+            FollowUpCounter.objects.filter(username_sso__in=chunk).delete()
+            FollowUpCounter.objects.bulk_create(
+                FollowUpCounter(username_sso=username, due_day=due_day, means=means, quantity=quantity)
+                for username, due_day, means, quantity in FollowUpTaskSnapshot.objects.filter(
+                    username_sso__in=chunk
+                ).values_list('username_sso', 'due_day', 'means').annotate(quantity=Count('task_id')).order_by()
+            )
+
+    @staticmethod
+    def _save_state(last_history_id):
+        values = {'last_history_id': last_history_id, 'updated_at': timezone.now()}
+        if not FollowUpCounterState.objects.filter(id=1).update(**values):
+            FollowUpCounterState.objects.create(id=1, **values)
+
+    @staticmethod
+    def rebuild():
+        """
+        Reconstruye todos los contadores desde tarea y deja la marca de agua en el
+        último historial_tarea existente. Retorna la cantidad de tareas contadas.
+        """
+        with transaction.atomic(using=FollowUpCounterService._alias()):
+            # Se lee antes de recorrer tarea: lo posterior lo procesa el próximo sync
+            last_history_id = TaskHistory.objects.aggregate(last=Max('id'))['last'] or 0
+
+            FollowUpTaskSnapshot.objects.all().delete()
+            FollowUpCounter.objects.all().delete()
+
+            tasks = FollowUpService._open_follow_ups().order_by('id')
+            last_task_id = 0
+            total = 0
+            while True:
+                chunk = list(tasks.filter(id__gt=last_task_id).values_list('id', flat=True)[:_CHUNK_SIZE])
+                if not chunk:
+                    break
+                snapshots = FollowUpCounterService._snapshots(tasks.filter(id__in=chunk))
+                FollowUpTaskSnapshot.objects.bulk_create(snapshots)
+                total += len(snapshots)
+                last_task_id = chunk[-1]
+
+            FollowUpCounterService._recount(
+                FollowUpTaskSnapshot.objects.values_list('username_sso', flat=True).distinct().order_by()
+            )
+            FollowUpCounterService._save_state(last_history_id)
+
+        logger.info("Contadores de seguimiento reconstruidos: %s tareas", total)
+        return total
+
+    @staticmethod
+    def sync(batch_size=_CHUNK_SIZE, lag_window=None):
+        """
+        Aplica los historial_tarea posteriores a la marca de agua, de a
+        batch_size registros. Sin estado previo hace un rebuild.
+        Retorna la cantidad de tareas con historial nuevo.
+
+        En MySQL el id autoincremental se asigna al insertar y no al confirmar:
+        una transacción lenta puede confirmar un id menor que otro ya procesado.
+        Por eso cada sync vuelve a aplicar también los últimos lag_window ids
+        bajo la marca de agua (FOLLOW_UP_COUNTERS_LAG_WINDOW por defecto). Como
+        la contribución de cada tarea se reemplaza completa, repetirla no cambia
+        los contadores. Lo que confirme más atrasado que esa ventana solo lo
+        corrige rebuild, y check permite detectarlo.
+        """
+        state = FollowUpCounterState.objects.filter(id=1).first()
+        if state is None:
+            return FollowUpCounterService.rebuild()
+        if lag_window is None:
+            lag_window = getattr(settings, 'FOLLOW_UP_COUNTERS_LAG_WINDOW', 200)
+
+        watermark = state.last_history_id
+        last_history_id = max(0, watermark - lag_window)
+        total = 0
+        while True:
+            history = list(
+                TaskHistory.objects.filter(id__gt=last_history_id).order_by('id').values_list(
+                    'id', 'task_id'
+                )[:batch_size]
+            )
+            if not history:
+                break
+            last_history_id = history[-1][0]
+            task_ids = list({task_id for _, task_id in history})
+            # La marca de agua no retrocede por la relectura de la ventana
+            watermark = max(watermark, last_history_id)
+            FollowUpCounterService._apply(task_ids, watermark)
+            total += len({task_id for history_id, task_id in history if history_id > state.last_history_id})
+        return total
+
+    @staticmethod
+    def _apply(task_ids, last_history_id):
+        """
+        Reemplaza la contribución de las tareas y recalcula los contadores de los
+        usuarios afectados (antes y después del cambio), junto con la marca de agua.
+        """
+        with transaction.atomic(using=FollowUpCounterService._alias()):
+            previous = FollowUpTaskSnapshot.objects.filter(task_id__in=task_ids)
+            usernames = set(previous.values_list('username_sso', flat=True))
+            snapshots = FollowUpCounterService._snapshots(
+                FollowUpService._open_follow_ups().filter(id__in=task_ids)
+            )
+            usernames.update(snapshot.username_sso for snapshot in snapshots)
+
+            previous.delete()
+            FollowUpTaskSnapshot.objects.bulk_create(snapshots)
+            if usernames:
+                FollowUpCounterService._recount(usernames)
+            FollowUpCounterService._save_state(last_history_id)
+
+    @staticmethod
+    def check():
+        """
+        Compara los contadores de hoy y atrasadas con la consulta en vivo para
+        todos los usuarios. Retorna las diferencias como una lista de dicts con
+        username, time_status, means, live y counters.
+        """
+        today = timezone.localdate()
+        start_of_day, end_of_day = FollowUpService._day_bounds()
+
+        live_by_evaluation = {}
+        for username, rut_gci, time_status, evaluation_id, quantity in FollowUpService._open_follow_ups().filter(
+            due_date__lte=end_of_day
+        ).annotate(
+            time_status=Case(
+                When(due_date__lt=start_of_day, then=Value('overdue')),
+                default=Value('today'),
+                output_field=CharField(),
+            )
+        ).values_list(
+            'task_user__sso_username__username_sso', 'task_user__sso_username__rut_gci',
+            'time_status', 'evaluation_id',
+        ).annotate(quantity=Count('id')).order_by():
+            if username is None or str(rut_gci) != username:
+                continue
+            key = (username, time_status, evaluation_id)
+            live_by_evaluation[key] = live_by_evaluation.get(key, 0) + quantity
+
+        means = FollowUpCounterService._load_means(
+            {evaluation_id for _, _, evaluation_id in live_by_evaluation if evaluation_id is not None}
+        )
+        live = {}
+        for (username, time_status, evaluation_id), quantity in live_by_evaluation.items():
+            key = (username, time_status, means.get(evaluation_id, 'others'))
+            live[key] = live.get(key, 0) + quantity
+
+        counters = {}
+        for username, due_day, counter_means, quantity in FollowUpCounter.objects.filter(
+            due_day__lte=today
+        ).values_list('username_sso', 'due_day', 'means', 'quantity'):
+            key = (username, 'today' if due_day == today else 'overdue', counter_means)
+            counters[key] = counters.get(key, 0) + quantity
+
+        differences = []
+        for key in sorted(set(live) | set(counters)):
+            if live.get(key, 0) != counters.get(key, 0):
+                username, time_status, counter_means = key
+                differences.append({
+                    'username': username,
+                    'time_status': time_status,
+                    'means': counter_means,
+                    'live': live.get(key, 0),
+                    'counters': counters.get(key, 0),
+                })
+        return differences
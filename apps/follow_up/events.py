@@ -0,0 +1,315 @@
+import asyncio
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.core.renderers import dumps
+from apps.core.services import DatabasesUtils
+from .models import TaskHistory, UserTask
+from .services import FollowUpService
+
+import logging
+logger = logging.getLogger('follow_up.events')
+
+
+class Subscription:
+    """
+    Conexión de un navegador a los eventos de un usuario. Solo guarda el último
+    resumen publicado: si el cliente se atrasa recibe el más reciente y no
+    todos los intermedios.
+
+    Los streams WSGI esperan en un threading.Condition con su propio thread.
+    Los ASGI llaman bind_loop y esperan con anext_message en un asyncio.Event
+    que publish activa con call_soon_threadsafe, sin ocupar ningún thread.
+    """
+
+    def __init__(self, hub, agency, user_rut, blocking=False):
+        self.hub = hub
+        self.agency = agency
+        self.user_rut = user_rut
+        self.blocking = blocking
+        self._condition = threading.Condition()
+        self._payload = None
+        self._version = 0
+        self._seen = 0
+        self._loop = None
+        self._event = None
+        self.closed = False
+
+    def bind_loop(self):
+        """
+        Asocia la suscripción al event loop actual para esperar con anext_message.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+
+    def _wake(self):
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            # El loop ya terminó: no queda nadie esperando
+            pass
+
+    def _pending(self):
+        return self._version > self._seen or self.closed
+
+    def _take(self):
+        if self.closed or self._version == self._seen:
+            return None
+        self._seen = self._version
+        return self._payload
+
+    def publish(self, payload):
+        with self._condition:
+            self._payload = payload
+            self._version += 1
+            self._condition.notify_all()
+        self._wake()
+
+    def next_message(self, timeout):
+        """
+        Espera hasta timeout segundos por un resumen no entregado y lo retorna,
+        o retorna None si no hubo cambios.
+        """
+        with self._condition:
+            self._condition.wait_for(self._pending, timeout)
+            return self._take()
+
+    async def anext_message(self, timeout):
+        """
+        Igual que next_message, esperando en el event loop de bind_loop.
+        """
+        deadline = self._loop.time() + timeout
+        while True:
+            with self._condition:
+                if self._pending():
+                    return self._take()
+                # Se limpia con el lock tomado: un publish posterior vuelve a
+                # activarlo antes de que el loop retome esta corrutina
+                self._event.clear()
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(self._event.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+        self._wake()
+        self.hub.unsubscribe(self)
+
+
+class _TenantState:
+    def __init__(self):
+        self.subscribers = {}
+        self.dirty = set()
+        self.last_payload = {}
+        self.last_history_id = None
+        self.day = None
+        self.thread = None
+
+
+class FollowUpEventHub:
+    """
+    Detecta cambios en los seguimientos con un único poller por inmobiliaria y
+    los reparte a todas las suscripciones de cada usuario, así la carga en la BD
+    depende de la cantidad de inmobiliarias y no de pestañas abiertas.
+
+    Cada FOLLOW_UP_EVENTS_INTERVAL segundos el poller lee el último
+    id_historial_tarea; solo si avanzó busca qué usuarios suscritos tienen tareas
+    con historial nuevo y recalcula su resumen (hoy y atrasadas), que se publica
+    si cambió. Al cambiar el día se recalculan todos, porque el corte entre hoy y
+    atrasadas se mueve sin dejar historial. El thread termina cuando la
+    inmobiliaria se queda sin suscripciones.
+
+    Las suscripciones blocking (WSGI) ocupan un thread del servidor mientras
+    dure el stream, así que no pueden ser más de FOLLOW_UP_EVENTS_MAX_WSGI_STREAMS.
+    """
+
+    def __init__(self, interval=None, autostart=True):
+        self._interval = interval
+        self._autostart = autostart
+        self._lock = threading.Lock()
+        self._tenants = {}
+        self._blocking = 0
+
+    @property
+    def interval(self):
+        if self._interval is not None:
+            return self._interval
+        return getattr(settings, 'FOLLOW_UP_EVENTS_INTERVAL', 5)
+
+    @staticmethod
+    def _key(agency):
+        return agency.id if agency is not None else None
+
+    def subscribe(self, agency, user_rut, blocking=False):
+        """
+        Registra una suscripción, o retorna None si es blocking y ya se alcanzó
+        FOLLOW_UP_EVENTS_MAX_WSGI_STREAMS.
+        """
+        subscription = Subscription(self, agency, str(user_rut), blocking=blocking)
+        with self._lock:
+            if blocking:
+                if self._blocking >= getattr(settings, 'FOLLOW_UP_EVENTS_MAX_WSGI_STREAMS', 4):
+                    return None
+                self._blocking += 1
+            state = self._tenants.setdefault(self._key(agency), _TenantState())
+            state.subscribers.setdefault(subscription.user_rut, set()).add(subscription)
+            payload = state.last_payload.get(subscription.user_rut)
+            if payload is None:
+                # El poller calcula el primer resumen en su próxima pasada
+                state.dirty.add(subscription.user_rut)
+            if self._autostart and (state.thread is None or not state.thread.is_alive()):
+                state.thread = threading.Thread(
+                    target=self._run, args=(agency,), name=f'follow_up_events_{agency}', daemon=True
+                )
+                state.thread.start()
+        if payload is not None:
+            subscription.publish(payload)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            state = self._tenants.get(self._key(subscription.agency))
+            if state is None:
+                return
+            subscriptions = state.subscribers.get(subscription.user_rut, set())
+            if subscription in subscriptions and subscription.blocking:
+                self._blocking -= 1
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                state.subscribers.pop(subscription.user_rut, None)
+                state.last_payload.pop(subscription.user_rut, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                key: sum(len(subscriptions) for subscriptions in state.subscribers.values())
+                for key, state in self._tenants.items()
+            }
+
+    def _run(self, agency):
+        key = self._key(agency)
+        try:
+            while True:
+                time.sleep(self.interval)
+                with self._lock:
+                    state = self._tenants.get(key)
+                    if state is None or not state.subscribers:
+                        self._tenants.pop(key, None)
+                        return
+                close_old_connections()
+                try:
+                    self.poll(agency)
+                except Exception as e:
+                    logger.warning("Poller de eventos de seguimiento falló en %s: %s", agency, e)
+        finally:
+            connections.close_all()
+
+    def poll(self, agency):
+        """
+        Una pasada del poller de la inmobiliaria: publica los resúmenes que
+        cambiaron. Retorna los usuarios recalculados.
+        """
+        with self._lock:
+            state = self._tenants.get(self._key(agency))
+            if state is None or not state.subscribers:
+                return set()
+            users = set(state.subscribers)
+            dirty = state.dirty & users
+            state.dirty = set()
+
+        with DatabasesUtils.tenant_context(agency):
+            if agency is not None:
+                DatabasesUtils.get_dynamic_db_connection(agency.gcli_alias)
+                DatabasesUtils.get_dynamic_db_connection(agency.gci_alias)
+
+            today = timezone.localdate()
+            last_history_id = TaskHistory.objects.aggregate(last=Max('id'))['last'] or 0
+            if state.last_history_id is None or state.day != today:
+                changed = set(users)
+            elif last_history_id > state.last_history_id:
+                changed = set(UserTask.objects.filter(
+                    sso_username__in=users,
+                    id__task_history__id__gt=state.last_history_id,
+                    id__task_history__id__lte=last_history_id,
+                ).values_list('sso_username', flat=True).distinct())
+            else:
+                changed = set()
+            state.last_history_id = last_history_id
+            state.day = today
+
+            recalculated = changed | dirty
+            for user_rut in recalculated:
+                payload = FollowUpService.get_overview(user_rut)['data']
+                with self._lock:
+                    if payload == state.last_payload.get(user_rut) and user_rut not in dirty:
+                        continue
+                    state.last_payload[user_rut] = payload
+                    subscriptions = list(state.subscribers.get(user_rut, ()))
+                for subscription in subscriptions:
+                    subscription.publish(payload)
+        return recalculated
+
+
+event_hub = FollowUpEventHub()
+
+
+def _format_event(payload):
+    if payload is None:
+        return b': keepalive\n\n'
+    return b'event: summary\ndata: ' + dumps(payload) + b'\n\n'
+
+
+def _timeouts():
+    """
+    Esperas sucesivas entre mensajes: FOLLOW_UP_EVENTS_HEARTBEAT segundos, hasta
+    completar FOLLOW_UP_EVENTS_MAX_DURATION. Después el stream termina y el
+    navegador se reconecta según retry.
+    """
+    heartbeat = getattr(settings, 'FOLLOW_UP_EVENTS_HEARTBEAT', 15)
+    deadline = time.monotonic() + getattr(settings, 'FOLLOW_UP_EVENTS_MAX_DURATION', 300)
+    while (remaining := deadline - time.monotonic()) > 0:
+        yield min(heartbeat, remaining)
+
+
+def stream_events(subscription):
+    """
+    Cuerpo text/event-stream para servidores WSGI. Envía un comentario cada
+    FOLLOW_UP_EVENTS_HEARTBEAT segundos sin cambios para mantener viva la
+    conexión; al desconectarse el cliente o al cumplirse
+    FOLLOW_UP_EVENTS_MAX_DURATION se cierra la suscripción y se libera el thread.
+    """
+    try:
+        yield b'retry: 5000\n\n'
+        for timeout in _timeouts():
+            yield _format_event(subscription.next_message(timeout))
+    finally:
+        subscription.close()
+
+
+async def astream_events(subscription):
+    """
+    Igual que stream_events para ASGI, donde un iterador sincrónico infinito
+    no se puede servir. Espera en el event loop, así que no ocupa threads y la
+    cantidad de streams no se limita.
+    """
+    subscription.bind_loop()
+    try:
+        yield b'retry: 5000\n\n'
+        for timeout in _timeouts():
+            yield _format_event(await subscription.anext_message(timeout))
+    finally:
+        subscription.close()
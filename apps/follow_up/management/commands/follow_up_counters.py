@@ -0,0 +1,97 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.core.services import DatabasesUtils
+from apps.follow_up.counters import FollowUpCounterService
+
+
+class Command(BaseCommand):
+    help = (
+        "Mantiene los contadores materializados de seguimientos de cada "
+        "inmobiliaria: crea sus tablas, los reconstruye, aplica los historial_tarea "
+        "nuevos o los compara con la consulta en vivo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--agency', type=int, action='append', dest='agency_ids',
+            help='Id de inmobiliaria a procesar (por defecto todas). Puede repetirse.'
+        )
+        action = parser.add_mutually_exclusive_group()
+        action.add_argument('--create-tables', action='store_true', help='Crea las tablas que falten.')
+        action.add_argument('--rebuild', action='store_true', help='Reconstruye los contadores desde cero.')
+        action.add_argument(
+            '--check', action='store_true',
+            help='Compara los contadores con la consulta en vivo y falla si difieren.'
+        )
+        parser.add_argument(
+            '--loop', type=float, default=None, metavar='SEGUNDOS',
+            help='Repite la sincronización cada SEGUNDOS en vez de ejecutarla una vez.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Registros de historial_tarea por lote de sincronización.'
+        )
+
+    def handle(self, *args, **options):
+        if options['loop'] is not None and (options['create_tables'] or options['rebuild'] or options['check']):
+            raise CommandError("--loop solo se usa con la sincronización")
+
+        agencies = self._agencies(options['agency_ids'])
+        if options['loop'] is None:
+            failed = self._run_once(agencies, options)
+            if failed:
+                raise CommandError(f"Inmobiliarias con error: {', '.join(failed)}")
+            return
+
+        while True:
+            self._run_once(agencies, options)
+            time.sleep(options['loop'])
+
+    @staticmethod
+    def _agencies(agency_ids):
+        if not agency_ids:
+            return DatabasesUtils.get_agencies()
+        agencies = [DatabasesUtils.get_agency(agency_id) for agency_id in agency_ids]
+        missing = [str(agency_id) for agency_id, agency in zip(agency_ids, agencies) if agency is None]
+        if missing:
+            raise CommandError(f"Inmobiliarias no encontradas: {', '.join(missing)}")
+        return agencies
+
+    def _run_once(self, agencies, options):
+        failed = []
+        for agency in agencies:
+            with DatabasesUtils.tenant_context(agency):
+                DatabasesUtils.get_dynamic_db_connection(agency.gci_alias)
+                DatabasesUtils.get_dynamic_db_connection(agency.gcli_alias)
+                try:
+                    self._run_for_agency(agency, options)
+                except Exception as e:
+                    failed.append(str(agency))
+                    self.stdout.write(self.style.ERROR(f"{agency}: ERROR {e}"))
+                finally:
+                    connections.close_all()
+        return failed
+
+    def _run_for_agency(self, agency, options):
+        if options['create_tables']:
+            created = FollowUpCounterService.create_tables()
+            self.stdout.write(f"{agency}: tablas creadas: {', '.join(created) or 'ninguna'}")
+        elif options['rebuild']:
+            total = FollowUpCounterService.rebuild()
+            self.stdout.write(f"{agency}: {total} tareas contadas")
+        elif options['check']:
+            differences = FollowUpCounterService.check()
+            for difference in differences:
+                self.stdout.write(self.style.WARNING(
+                    f"{agency}: {difference['username']} {difference['time_status']} "
+                    f"{difference['means']}: en vivo {difference['live']}, contadores {difference['counters']}"
+                ))
+            if differences:
+                raise CommandError(f"{len(differences)} contadores difieren")
+            self.stdout.write(f"{agency}: contadores consistentes")
+        else:
+            total = FollowUpCounterService.sync(batch_size=options['batch_size'])
+            self.stdout.write(f"{agency}: {total} tareas recalculadas")
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.services import DatabasesUtils
+from apps.follow_up.services import FollowUpService
+
+
+class Command(BaseCommand):
+    help = (
+        "Calcula el resumen de seguimientos de un usuario en todas las "
+        "inmobiliarias en paralelo y muestra el total por medio de entrada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-rut', required=True, help='RUT del usuario (username_sso).')
+        parser.add_argument(
+            '--time-status', choices=['today', 'overdue'], default='overdue',
+            help='Tareas del día o atrasadas (por defecto overdue).'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Inmobiliarias consultadas en paralelo (por defecto FAN_OUT_MAX_WORKERS).'
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=None,
+            help='Segundos máximos por inmobiliaria (por defecto FAN_OUT_TIMEOUT).'
+        )
+
+    def handle(self, *args, **options):
+        result = DatabasesUtils.fan_out(
+            FollowUpService.get_summary,
+            args=(options['user_rut'], options['time_status']),
+            max_workers=options['workers'],
+            timeout=options['timeout'],
+        )
+
+        for agency_id, summary in sorted(result.results.items()):
+            quantities = ', '.join(f"{item['means']}={item['quantity']}" for item in summary['data'])
+            self.stdout.write(f"{result.agencies[agency_id]}: {quantities}")
+        for agency_id, error in sorted(result.errors.items()):
+            self.stdout.write(self.style.ERROR(f"{result.agencies[agency_id]}: ERROR {error}"))
+        for agency_id in sorted(result.timed_out):
+            self.stdout.write(self.style.WARNING(f"{result.agencies[agency_id]}: TIMEOUT"))
+
+        totals = result.merge(FollowUpService.merge_summaries)
+        self.stdout.write(
+            "Total: " + ', '.join(f"{item['means']}={item['quantity']}" for item in totals)
+        )
+        if not result.complete:
+            raise CommandError(
+                f"{len(result.errors)} inmobiliarias con error, {len(result.timed_out)} sin respuesta"
+            )
@@ -1,9 +1,19 @@
 from ..core.models.tasks.task import Task
 from ..core.models.evaluation import Evaluation
 from ..core.models.client import Client
+from ..core.models.user import UserGcli
+from ..core.models.tasks import FollowUpCounter, FollowUpCounterState, FollowUpTaskSnapshot, TaskHistory, TaskStatus, TaskType, UserTask
 
 __all__ = [
     'Task',
     'Evaluation',
     'Client',
+    'UserGcli',
+    'TaskHistory',
+    'TaskStatus',
+    'TaskType',
+    'UserTask',
+    'FollowUpCounter',
+    'FollowUpCounterState',
+    'FollowUpTaskSnapshot',
 ]
@@ -1,202 +1,681 @@
-from django.db.models import OuterRef, Subquery, Q, F
+from django.conf import settings
+from django.db.models import Case, CharField, Count, IntegerField, Max, Q, Sum, Value, When
 from django.utils import timezone
-from datetime import datetime, time
-from .models import Task, Evaluation, Client
-from collections import Counter
+from datetime import datetime, time, timedelta
+from itertools import chain
+from .models import Task, TaskStatus, TaskType, Evaluation, Client, FollowUpCounter, UserGcli
+
+from apps.core.cache import dimension_cache
+from apps.core.catalog import label_catalog
+from apps.core.pagination import paginate_keyset
+from apps.core.services import DatabasesUtils
 
 import logging
 logger = logging.getLogger('follow_up.services')
 
+# id_via_ingreso de la visita -> medio de entrada informado
+MEANS_MAP = {
+    7:  'sales_room',
+    4:  'centralizer',
+    8:  'web_quoter',
+    5:  'rrss',
+    12: 'api',
+}
+
+# Orden de los medios en el resumen; lo que no esté en MEANS_MAP cae en 'others'
+SUMMARY_MEANS = ['sales_room', 'centralizer', 'web_quoter', 'rrss', 'api', 'others']
+
+
+def format_rut(rut, dv):
+    if rut:
+        rut = str(rut).replace('.', '').replace('-', '')
+        rut = '{:,}'.format(int(rut)).replace(',', '.')
+        return f"{rut}-{dv}"
+    return f""
+
+
+def format_date(date):
+    if date is None:
+        return None
+    return date.strftime('%d-%m-%Y')
+
 class FollowUpService:
     @staticmethod
     def _get_tasks(user_rut: int, date_filter: Q):
         """
         Función base para obtener tareas con filtros de fecha específicos.
+
+        Cada tarea se retorna una sola vez. No se filtra por el último registro
+        de historial_tarea: toda tarea con historial tiene una fila con su propia
+        fecha máxima, por lo que esa condición se cumplía siempre y solo agregaba
+        una subconsulta correlacionada por tarea (y filas duplicadas en empates).
+
+        Retorna solo el filtro, sin select_related ni prefetch: cada consumidor
+        proyecta las columnas que usa.
+        """
+        return FollowUpService._open_follow_ups().filter(
+            task_user__sso_username__username_sso=user_rut,
+            task_user__sso_username__rut_gci=user_rut
+        ).filter(date_filter)
+
+    @staticmethod
+    def _open_follow_ups():
+        """
+        Tareas de seguimiento abiertas de todos los usuarios.
         """
-        max_date_subquery = Subquery(
-            Task.objects.filter(
-                id=OuterRef('id')
-            ).order_by('-task_history__record_date').values('task_history__record_date')[:1]
-        )
-        
         return Task.objects.filter(
             system_id=1,
-            task_status_id__label__in=['Nueva', 'En Ejecución'],
+            task_status_id__in=label_catalog.ids(TaskStatus, ['Nueva', 'En Ejecución']),
             actual_completion_date__isnull=True,
-            task_type_id__label='Seguimiento',
-            task_user__sso_username__username_sso=user_rut,
-            task_user__sso_username__rut_gci=user_rut
-        ).filter(date_filter).select_related(
-            'task_status_id',
-            'task_type_id',
-        ).prefetch_related(
-            'task_user__sso_username',
-            'task_history'
-        ).annotate(
-            max_task_history_date=max_date_subquery,
-        ).filter(
-            Q(task_history__record_date=F('max_task_history_date')) |
-            Q(max_task_history_date__isnull=True)
-        ).all()
+            task_type_id__in=label_catalog.ids(TaskType, 'Seguimiento'),
+        )
 
     @staticmethod
-    def get_today_tasks(user_rut: int):
+    def _day_bounds():
+        """
+        Retorna el inicio y el fin del día actual en la zona horaria activa.
+        """
         today = timezone.now().date()
         start_of_day = timezone.make_aware(datetime.combine(today, time.min))
         end_of_day = timezone.make_aware(datetime.combine(today, time.max))
+        return start_of_day, end_of_day
+
+    @staticmethod
+    def _day_start(offset: int):
+        """
+        Inicio del día actual + offset días, en la zona horaria activa (no se
+        suman 24 horas para no correrse en los cambios de horario).
+        """
+        day = timezone.localdate() + timedelta(days=offset)
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    @staticmethod
+    def get_today_tasks(user_rut: int):
+        start_of_day, end_of_day = FollowUpService._day_bounds()
         date_filter = Q(due_date__range=[start_of_day, end_of_day])
         return FollowUpService._get_tasks(user_rut, date_filter)
 
     @staticmethod
     def get_overdue_tasks(user_rut: int):
-        today = timezone.now().date()
-        date_filter = Q(due_date__lt=today)
+        start_of_day, _ = FollowUpService._day_bounds()
+        date_filter = Q(due_date__lt=start_of_day)
         tasks = FollowUpService._get_tasks(user_rut, date_filter)
         return tasks
     
     @staticmethod
-    def get_summary(user_rut: int, time_status: str):
+    def get_validator(user_rut: int):
+        """
+        Valores baratos de obtener que cambian cuando cambian las tareas del
+        usuario, para el ETag de summary, details y overview: cantidad de tareas
+        asignadas y último registro de historial_tarea, en una sola consulta.
+
+        Se agregan el día actual, porque el corte entre hoy y atrasadas cambia a
+        medianoche, y el tramo de FOLLOW_UP_ETAG_TTL, porque los comentarios y
+        fechas de recontacto viven en gci y no dejan registro en historial_tarea.
+        """
+        stats = Task.objects.filter(task_user__sso_username=user_rut).aggregate(
+            tasks=Count('id', distinct=True),
+            last_record=Max('task_history__record_date'),
+        )
+        ttl = getattr(settings, 'FOLLOW_UP_ETAG_TTL', 60)
+        now = timezone.now()
+        return (
+            user_rut,
+            stats['tasks'],
+            stats['last_record'],
+            timezone.localdate(now),
+            int(now.timestamp() // ttl) if ttl else None,
+        )
+
+    @staticmethod
+    def get_summary(user_rut: int, time_status: str, source: str = None):
         """
         Obtiene el resumen de tareas agrupadas por medio de entrada.
         
         Args:
             user_rut (int): RUT del usuario
             time_status (str): Estado temporal ('today' o 'overdue')
+            source (str): 'live' para calcularlo desde tarea o 'counters' para
+                leerlo de los contadores materializados (FOLLOW_UP_SUMMARY_SOURCE
+                por defecto)
             
         Returns:
             dict: Resumen de tareas agrupadas por medio de entrada
         """
-        tasks = FollowUpService.get_today_tasks(user_rut) if time_status == 'today' else FollowUpService.get_overdue_tasks(user_rut)
+        if source is None:
+            source = getattr(settings, 'FOLLOW_UP_SUMMARY_SOURCE', 'live')
 
-        task_ids = list(tasks.values_list('evaluation_id', flat=True))
-        if task_ids:
-            evaluations = Evaluation.objects.filter(
-                id__in=task_ids
-            ).select_related('visit_id')
-            input_means_map = dict(
-                evaluations.values_list('id', 'visit_id__input_means_id')
-            )
+        if source == 'counters':
+            summary = FollowUpService._summary_from_counters(user_rut, time_status)
         else:
-            input_means_map = {}
-
-        for task in tasks:
-            task.input_means_id = input_means_map.get(task.evaluation_id.id)
-            
-        input_means_counter = Counter()
-        means_map = {
-            7:  'sales_room',
-            4:  'centralizer',
-            8:  'web_quoter',
-            5:  'rrss',
-            12: 'api',
-        }
+            tasks = FollowUpService._get_time_status_tasks(user_rut, time_status)
 
-        for task in tasks:
-            category = means_map.get(task.input_means_id, 'others')
-            input_means_counter[category] += 1
-
-        summary = {
-            'sales_room': 0,
-            'centralizer': 0,
-            'web_quoter': 0,
-            'rrss': 0,
-            'api': 0,
-            'others': 0
-        }
+            # 1. Cantidad de tareas por evaluación, agrupada en la BD gcli
+            evaluation_counts = FollowUpService._count_by_evaluation(tasks)
 
-        summary.update(input_means_counter)
+            # 2. Medio de entrada de cada evaluación, resuelto en la BD gci
+            summary = FollowUpService._summarize(evaluation_counts)
 
         return {
             'status': 'success',
             'data': [{'means': key, 'quantity': value} for key, value in summary.items()]
         }
-    
+
     @staticmethod
-    def get_details(user_rut: int, time_status: str):
+    def can_view_team(user_rut, user_ruts):
         """
-        Obtiene los detalles de las tareas.
+        Indica si el usuario autenticado puede ver el resumen de user_ruts: siempre
+        el propio, y el de otros si su cargo en gcli está en
+        FOLLOW_UP_TEAM_MANAGER_POSITIONS. Sin cargos configurados se confía en
+        que el gateway solo expone team-summary a jefaturas.
         """
-        def format_rut(rut, dv):
-            if rut:
-                rut = str(rut).replace('.', '').replace('-', '')
-                rut = '{:,}'.format(int(rut)).replace(',', '.')
-                return f"{rut}-{dv}"
-            return f""
+        if {str(rut) for rut in user_ruts} <= {str(user_rut)}:
+            return True
+        positions = getattr(settings, 'FOLLOW_UP_TEAM_MANAGER_POSITIONS', [])
+        if not positions:
+            return True
+        position = UserGcli.objects.filter(
+            username_sso=str(user_rut), rut_gci=user_rut
+        ).values_list('position', flat=True).first()
+        return position is not None and position.strip().lower() in positions
 
-        def format_date(date):
-            if date is None:
-                return None
-            return date.strftime('%d-%m-%Y')
-        
-        means_map = {
-            7:  'sales_room',
-            4:  'centralizer',
-            8:  'web_quoter',
-            5:  'rrss',
-            12: 'api',
+    @staticmethod
+    def get_team_summary(user_ruts, time_status: str, source: str = None):
+        """
+        Obtiene el resumen de tareas por medio de entrada de varios usuarios con
+        una consulta agrupada por usuario en gcli y una sola lectura de
+        evaluaciones en gci, en vez de un get_summary por usuario.
+
+        Args:
+            user_ruts (list): RUTs de los usuarios (máximo FOLLOW_UP_TEAM_MAX_USERS)
+            time_status (str): Estado temporal ('today' o 'overdue')
+            source (str): 'live' o 'counters', como en get_summary
+
+        Returns:
+            dict: Resumen de cada usuario, en el orden pedido
+        """
+        user_ruts = list(dict.fromkeys(str(user_rut) for user_rut in user_ruts))
+        max_users = getattr(settings, 'FOLLOW_UP_TEAM_MAX_USERS', 500)
+        if not user_ruts or len(user_ruts) > max_users:
+            raise ValueError(f'user_ruts must have between 1 and {max_users} users')
+        if source is None:
+            source = getattr(settings, 'FOLLOW_UP_SUMMARY_SOURCE', 'live')
+
+        if source == 'counters':
+            today = timezone.localdate()
+            day_filter = Q(due_day=today) if time_status == 'today' else Q(due_day__lt=today)
+            summaries = {user_rut: dict.fromkeys(SUMMARY_MEANS, 0) for user_rut in user_ruts}
+            for username, means, quantity in FollowUpCounter.objects.filter(
+                day_filter, username_sso__in=user_ruts
+            ).values_list('username_sso', 'means').annotate(quantity=Sum('quantity')).order_by():
+                summary = summaries[username]
+                summary[means if means in summary else 'others'] += quantity
+        else:
+            start_of_day, end_of_day = FollowUpService._day_bounds()
+            if time_status == 'today':
+                date_filter = Q(due_date__range=[start_of_day, end_of_day])
+            else:
+                date_filter = Q(due_date__lt=start_of_day)
+
+            # 1. Cantidad de tareas por usuario y evaluación, agrupada en gcli.
+            # Igual que _get_tasks, solo cuentan los usuarios cuyo rut_gci
+            # coincide con su username_sso.
+            evaluation_counts = {user_rut: {} for user_rut in user_ruts}
+            for username, rut_gci, evaluation_id, quantity in FollowUpService._open_follow_ups().filter(
+                date_filter,
+                task_user__sso_username__username_sso__in=user_ruts,
+                task_user__sso_username__rut_gci__in=user_ruts,
+            ).values_list(
+                'task_user__sso_username__username_sso', 'task_user__sso_username__rut_gci', 'evaluation_id',
+            ).annotate(quantity=Count('id')).order_by():
+                if str(rut_gci) == username:
+                    evaluation_counts[username][evaluation_id] = quantity
+
+            # 2. Medio de entrada de todas las evaluaciones, en una sola lectura de gci
+            evaluations = FollowUpService._get_evaluations(list({
+                evaluation_id
+                for counts in evaluation_counts.values() for evaluation_id in counts
+                if evaluation_id is not None
+            }))
+            summaries = {
+                user_rut: FollowUpService._summarize(counts, evaluations)
+                for user_rut, counts in evaluation_counts.items()
+            }
+
+        return {
+            'status': 'success',
+            'data': [
+                {
+                    'userRut': user_rut,
+                    'summary': [{'means': key, 'quantity': value} for key, value in summaries[user_rut].items()],
+                }
+                for user_rut in user_ruts
+            ]
         }
-        
-        tasks = FollowUpService.get_today_tasks(user_rut) if time_status == 'today' else FollowUpService.get_overdue_tasks(user_rut)
-        tasks = tasks.select_related(
-            'task_status_id',
-            'task_type_id',
-            'system_id',
-            'task_user__sso_username'
-        ).prefetch_related(
-            'task_history'
+
+    @staticmethod
+    def get_overview(user_rut: int, include_details: bool = False):
+        """
+        Obtiene el resumen de las tareas de hoy y de las atrasadas (y
+        opcionalmente sus detalles) con una sola lectura de tarea, clasificando
+        cada fila por su fecha límite respecto del día actual.
+
+        Args:
+            user_rut (int): RUT del usuario
+            include_details (bool): Incluir los detalles de cada grupo
+
+        Returns:
+            dict: Por cada estado temporal ('today' y 'overdue'), su resumen por
+            medio de entrada y, si se pidieron, sus detalles
+        """
+        start_of_day, end_of_day = FollowUpService._day_bounds()
+        tasks = FollowUpService._get_tasks(user_rut, Q(due_date__lte=end_of_day)).annotate(
+            time_status=Case(
+                When(due_date__lt=start_of_day, then=Value('overdue')),
+                default=Value('today'),
+                output_field=CharField(),
+            )
         )
 
-        client_ids = [task.client_gci_id.id for task in tasks if task.client_gci_id]
-        evaluation_ids = [task.evaluation_id.id for task in tasks if task.evaluation_id]
-    
-        if client_ids:
-            clients = Client.objects.filter(id__in=client_ids)
-            client_map = {client.id: client for client in clients}
+        evaluation_counts = {'today': {}, 'overdue': {}}
+        details = {'today': [], 'overdue': []}
+        if include_details:
+            rows = list(tasks.order_by('due_date', 'id').values(
+                'id', 'due_date', 'client_gci_id', 'evaluation_id', 'time_status',
+            ))
+            for row, detail in zip(rows, FollowUpService._detail_rows(rows)):
+                counts = evaluation_counts[row['time_status']]
+                counts[row['evaluation_id']] = counts.get(row['evaluation_id'], 0) + 1
+                details[row['time_status']].append(detail)
         else:
-            client_map = {}
+            for time_status, evaluation_id, quantity in tasks.order_by().values_list(
+                'time_status', 'evaluation_id'
+            ).annotate(quantity=Count('id')):
+                evaluation_counts[time_status][evaluation_id] = quantity
+
+        # Una sola consulta a gci para las evaluaciones de ambos grupos
+        evaluations = FollowUpService._get_evaluations([
+            evaluation_id
+            for counts in evaluation_counts.values() for evaluation_id in counts
+            if evaluation_id is not None
+        ])
+
+        data = {}
+        for time_status, counts in evaluation_counts.items():
+            summary = FollowUpService._summarize(counts, evaluations)
+            data[time_status] = {
+                'summary': [{'means': key, 'quantity': value} for key, value in summary.items()]
+            }
+            if include_details:
+                data[time_status]['details'] = details[time_status]
+
+        return {
+            'status': 'success',
+            'data': data
+        }
+
+    @staticmethod
+    def get_histogram(user_rut: int, upcoming_days: int = 7, aging_edges=(1, 4, 8, 31)):
+        """
+        Obtiene la distribución de las tareas por fecha límite con una sola
+        consulta agrupada: antigüedad de las atrasadas, las de hoy y las de cada
+        uno de los próximos días.
+
+        Args:
+            user_rut (int): RUT del usuario
+            upcoming_days (int): Cantidad de días futuros, uno por tramo
+            aging_edges (list): Días de atraso con que comienza cada tramo, en
+                orden creciente y partiendo en 1; el último tramo no tiene fin.
+                (1, 4, 8, 31) da 1-3, 4-7, 8-30 y más de 30 días.
 
-        if evaluation_ids:
-            evaluations = Evaluation.objects.filter(id__in=evaluation_ids).select_related(
-                'visit_id',
-                'project_id'
+        Returns:
+            dict: Cantidad de tareas por tramo de atraso, de hoy y por día futuro
+        """
+        aging_edges = list(aging_edges)
+        max_aging_days = getattr(settings, 'FOLLOW_UP_HISTOGRAM_MAX_AGING_DAYS', 3650)
+        if not aging_edges or aging_edges[0] != 1 or any(
+            edge <= previous for previous, edge in zip(aging_edges, aging_edges[1:])
+        ):
+            raise ValueError('aging must be increasing days starting at 1')
+        if aging_edges[-1] > max_aging_days:
+            raise ValueError(f'aging edges must not exceed {max_aging_days} days')
+        max_upcoming_days = getattr(settings, 'FOLLOW_UP_HISTOGRAM_MAX_DAYS', 60)
+        if not 0 <= upcoming_days <= max_upcoming_days:
+            raise ValueError(f'upcoming_days must be between 0 and {max_upcoming_days}')
+
+        # Cada When corresponde a un tramo con su límite superior exclusivo, en
+        # orden de fecha: gana el primero que se cumple.
+        # Tramos: 0..len(aging)-1 atraso (del más antiguo al más reciente),
+        # len(aging) hoy y los siguientes cada día futuro.
+        whens = []
+        for index, edge in reversed(list(enumerate(aging_edges))):
+            # Atrasada al menos `edge` días: vence antes del inicio de hoy - (edge - 1)
+            whens.append(When(due_date__lt=FollowUpService._day_start(1 - edge), then=Value(index)))
+        today_bucket = len(aging_edges)
+        for offset in range(upcoming_days + 1):
+            whens.append(When(
+                due_date__lt=FollowUpService._day_start(offset + 1), then=Value(today_bucket + offset)
+            ))
+
+        counts = dict(
+            FollowUpService._get_tasks(
+                user_rut, Q(due_date__lt=FollowUpService._day_start(upcoming_days + 1))
+            ).annotate(
+                bucket=Case(*whens, output_field=IntegerField())
+            ).order_by().values_list('bucket').annotate(quantity=Count('id'))
+        )
+
+        today = timezone.localdate()
+        return {
+            'status': 'success',
+            'data': {
+                'overdue': [
+                    {
+                        'fromDays': edge,
+                        'toDays': aging_edges[index + 1] - 1 if index + 1 < len(aging_edges) else None,
+                        'quantity': counts.get(index, 0),
+                    }
+                    for index, edge in enumerate(aging_edges)
+                ],
+                'today': counts.get(today_bucket, 0),
+                'upcoming': [
+                    {
+                        'date': format_date(today + timedelta(days=offset)),
+                        'quantity': counts.get(today_bucket + offset, 0),
+                    }
+                    for offset in range(1, upcoming_days + 1)
+                ],
+            }
+        }
+
+    @staticmethod
+    def _summary_from_counters(user_rut: int, time_status: str):
+        """
+        Suma los contadores materializados del usuario (ver
+        FollowUpCounterService) para el día actual o los anteriores.
+        """
+        today = timezone.localdate()
+        day_filter = Q(due_day=today) if time_status == 'today' else Q(due_day__lt=today)
+        summary = dict.fromkeys(SUMMARY_MEANS, 0)
+        for means, quantity in FollowUpCounter.objects.filter(
+            day_filter, username_sso=str(user_rut)
+        ).values_list('means').annotate(quantity=Sum('quantity')).order_by():
+            summary[means if means in summary else 'others'] += quantity
+        return summary
+
+    @staticmethod
+    def _count_by_evaluation(tasks):
+        """
+        Retorna {evaluation_id: cantidad de tareas} sin instanciar tareas.
+        """
+        return dict(
+            tasks.order_by().values_list('evaluation_id').annotate(
+                quantity=Count('id')
             )
-            evaluation_map = {evaluation.id: evaluation for evaluation in evaluations}
-        else:
-            evaluation_map = {}
-        
+        )
+
+    @staticmethod
+    def _summarize(evaluation_counts, evaluations=None):
+        """
+        Acumula las cantidades por evaluación en los medios de entrada del resumen.
+        evaluations permite entregar las evaluaciones ya cargadas.
+        """
+        if evaluations is None:
+            evaluations = FollowUpService._get_evaluations(
+                [evaluation_id for evaluation_id in evaluation_counts if evaluation_id is not None]
+            )
+
+        summary = dict.fromkeys(SUMMARY_MEANS, 0)
+        for evaluation_id, quantity in evaluation_counts.items():
+            evaluation = evaluations.get(evaluation_id)
+            summary[evaluation['means'] if evaluation else 'others'] += quantity
+        return summary
+
+    @staticmethod
+    def _get_clients(client_ids):
+        """
+        Retorna {id_cliente: {'rut', 'name'}} ya formateados, desde el cache de
+        dimensiones de la inmobiliaria o con una sola consulta a gci.
+        """
+        if not client_ids:
+            return {}
+        return dimension_cache.get_many('client', client_ids, FollowUpService._load_clients)
+
+    @staticmethod
+    def _load_clients(client_ids):
+        clients = {}
+        for client in Client.objects.filter(id__in=client_ids).values(
+            'id', 'type', 'person_name', 'person_lastname', 'person_rut', 'person_rut_dv',
+            'company_rut', 'company_rut_dv', 'company_name',
+        ):
+            if client['type'] == 'NATURAL':
+                rut = format_rut(client['person_rut'], client['person_rut_dv'])
+                name = f"{client['person_name'].strip()} {client['person_lastname'].strip()}".strip().title()
+            else:
+                rut = format_rut(client['company_rut'], client['company_rut_dv'])
+                name = client['company_name'].strip().title()
+            clients[client['id']] = {'rut': rut, 'name': name}
+        return clients
+
+    @staticmethod
+    def _get_evaluations(evaluation_ids):
+        """
+        Retorna {id_evaluacion: {'project', 'means'}} con el proyecto y el medio
+        de entrada de la visita ya resueltos, desde el cache de dimensiones.
+        Solo se cachea lo que no cambia en la vida de una evaluación; el
+        comentario y la fecha de recontacto, que cambian con cada gestión, se
+        leen siempre con _get_evaluation_rows.
+        """
+        if not evaluation_ids:
+            return {}
+        return dimension_cache.get_many('evaluation', evaluation_ids, FollowUpService._load_evaluations)
+
+    @staticmethod
+    def _load_evaluations(evaluation_ids):
+        evaluations = {}
+        for evaluation_id, project, input_means_id in Evaluation.objects.filter(
+            id__in=evaluation_ids
+        ).values_list('id', 'project_id__label', 'visit_id__input_means_id'):
+            evaluations[evaluation_id] = {
+                'project': project.strip().title() if project else None,
+                'means': MEANS_MAP.get(input_means_id, 'others'),
+            }
+        return evaluations
+
+    @staticmethod
+    def _get_evaluation_rows(evaluation_ids):
+        """
+        Retorna {id_evaluacion: {'project', 'contactDate', 'lastComment', 'means'}}
+        leídos de gci en una sola consulta, sin cache porque el comentario y la
+        fecha de recontacto cambian con cada gestión. De paso deja en cache el
+        proyecto y el medio de entrada para los resúmenes.
+        """
+        if not evaluation_ids:
+            return {}
+        rows = {}
+        for evaluation_id, project, input_means_id, recontact_date, comment in Evaluation.objects.filter(
+            id__in=evaluation_ids
+        ).values_list('id', 'project_id__label', 'visit_id__input_means_id', 'recontact_date', 'comment'):
+            rows[evaluation_id] = {
+                'project': project.strip().title() if project else None,
+                'contactDate': format_date(recontact_date),
+                'lastComment': comment.strip().lower(),
+                'means': MEANS_MAP.get(input_means_id, 'others'),
+            }
+        dimension_cache.set_many('evaluation', {
+            evaluation_id: {'project': row['project'], 'means': row['means']}
+            for evaluation_id, row in rows.items()
+        })
+        return rows
+
+    @staticmethod
+    def get_agencies_summary(user_rut: int, time_status: str):
+        """
+        Obtiene el resumen de tareas del usuario en las inmobiliarias donde está
+        registrado, consultándolas en paralelo. Las inmobiliarias en que el
+        usuario no existe no se incluyen en la respuesta.
+
+        Args:
+            user_rut (int): RUT del usuario
+            time_status (str): Estado temporal ('today' o 'overdue')
+
+        Returns:
+            dict: Totales por medio de entrada, resumen por inmobiliaria y las
+            inmobiliarias que fallaron o no respondieron a tiempo
+        """
+        result = DatabasesUtils.fan_out(FollowUpService._linked_summary, args=(user_rut, time_status))
+        result.results = {
+            agency_id: summary for agency_id, summary in result.results.items() if summary is not None
+        }
+
+        totals = result.merge(FollowUpService.merge_summaries)
+        agencies = [
+            {
+                'agencyId': agency_id,
+                'name': result.agencies[agency_id].name,
+                'data': summary['data'],
+            }
+            for agency_id, summary in sorted(result.results.items())
+        ]
+
+        return {
+            'status': 'success' if result.complete else 'partial',
+            'data': totals,
+            'agencies': agencies,
+            'failed': sorted(result.errors),
+            'timedOut': sorted(result.timed_out),
+        }
+
+    @staticmethod
+    def _linked_summary(user_rut: int, time_status: str):
+        """
+        get_summary en la inmobiliaria actual, o None si el usuario no está
+        registrado en ella (mismo criterio de usuario que _get_tasks).
+        """
+        if not UserGcli.objects.filter(username_sso=str(user_rut), rut_gci=user_rut).exists():
+            return None
+        return FollowUpService.get_summary(user_rut, time_status)
+
+    @staticmethod
+    def merge_summaries(summaries):
+        totals = dict.fromkeys(SUMMARY_MEANS, 0)
+        for summary in summaries:
+            for item in summary['data']:
+                totals[item['means']] += item['quantity']
+        return [{'means': key, 'quantity': value} for key, value in totals.items()]
+
+    @staticmethod
+    def _get_time_status_tasks(user_rut: int, time_status: str):
+        if time_status == 'today':
+            return FollowUpService.get_today_tasks(user_rut)
+        return FollowUpService.get_overdue_tasks(user_rut)
+
+    @staticmethod
+    def get_details(user_rut: int, time_status: str):
+        """
+        Obtiene los detalles de todas las tareas en una sola lista.
+        Para usuarios con muchas tareas usar get_details_page o iter_details.
+        """
+        return {
+            'status': 'success',
+            'data': list(FollowUpService.iter_details(user_rut, time_status))
+        }
+
+    @staticmethod
+    def get_details_page(user_rut: int, time_status: str, cursor=None, page_size=None):
+        """
+        Obtiene una página de detalles ordenada por (fecha límite, id).
+
+        Args:
+            user_rut (int): RUT del usuario
+            time_status (str): Estado temporal ('today' o 'overdue')
+            cursor (str): nextCursor de la página anterior; None para la primera
+            page_size (int): Tareas por página (FOLLOW_UP_PAGE_SIZE por defecto)
+
+        Returns:
+            dict: Detalles de la página y nextCursor (None en la última página)
+        """
+        if page_size is None:
+            page_size = getattr(settings, 'FOLLOW_UP_PAGE_SIZE', 100)
+        max_page_size = getattr(settings, 'FOLLOW_UP_MAX_PAGE_SIZE', 500)
+        if not 1 <= page_size <= max_page_size:
+            raise ValueError(f'page_size must be between 1 and {max_page_size}')
+
+        # Solo las columnas que usa la respuesta, sin instanciar tareas
+        tasks = FollowUpService._get_time_status_tasks(user_rut, time_status).values(
+            'id', 'due_date', 'client_gci_id', 'evaluation_id',
+        )
+        page = paginate_keyset(tasks, ('due_date', 'id'), cursor=cursor, page_size=page_size)
+
+        return {
+            'status': 'success',
+            'data': FollowUpService._detail_rows(page.items),
+            'nextCursor': page.next_cursor,
+        }
+
+    @staticmethod
+    def iter_details(user_rut: int, time_status: str, page_size=None):
+        """
+        Retorna un iterador con los detalles de todas las tareas, leyendo una
+        página a la vez (ver iter_detail_pages).
+        """
+        return chain.from_iterable(FollowUpService.iter_detail_pages(user_rut, time_status, page_size))
+
+    @staticmethod
+    def iter_detail_pages(user_rut: int, time_status: str, page_size=None):
+        """
+        Retorna un iterador con las listas de detalles de cada página.
+
+        Pensado para respuestas en streaming, que se consumen después de que el
+        middleware restableció el contexto: cada página se consulta dentro de la
+        inmobiliaria que estaba activa al crear el generador, y el contexto no
+        queda abierto entre un yield y otro.
+        """
+        if page_size is None:
+            page_size = getattr(settings, 'FOLLOW_UP_MAX_PAGE_SIZE', 500)
+        # Se lee aquí y no dentro del generador, que recién corre al consumirse
+        agency = DatabasesUtils.get_current_agency()
+
+        def pages():
+            cursor = None
+            while True:
+                with DatabasesUtils.tenant_context(agency):
+                    page = FollowUpService.get_details_page(user_rut, time_status, cursor, page_size)
+                if page['data']:
+                    yield page['data']
+                cursor = page['nextCursor']
+                if cursor is None:
+                    return
+
+        return pages()
+
+    @staticmethod
+    def _detail_rows(tasks):
+        """
+        Arma las filas de detalle de una página de tareas (dicts con id,
+        client_gci_id y evaluation_id): una consulta a gci por página para las
+        evaluaciones y otra para los clientes que no estén en cache.
+        """
+        client_ids = [task['client_gci_id'] for task in tasks if task['client_gci_id']]
+        evaluation_ids = [task['evaluation_id'] for task in tasks if task['evaluation_id']]
+        # Consultas independientes: en paralelo si CONCURRENT_QUERIES_ENABLED
+        client_map, evaluation_map = DatabasesUtils.run_concurrently(
+            lambda: FollowUpService._get_clients(client_ids),
+            lambda: FollowUpService._get_evaluation_rows(evaluation_ids),
+        )
+
         table_data = []
         for task in tasks:
-            client_id = task.client_gci_id.id if task.client_gci_id else None
-            evaluation_id = task.evaluation_id.id if task.evaluation_id else None
-            
-            client = client_map.get(client_id)
-            evaluation = evaluation_map.get(evaluation_id)
-            visit = evaluation.visit_id if evaluation else None
-
-            rut = "Sin Rut"
-            name = "Sin Nombre"
-
-            if client:
-                if client.type == 'NATURAL':
-                    rut = format_rut(client.person_rut, client.person_rut_dv)
-                    name = f"{client.person_name.strip()} {client.person_lastname.strip()}".strip().title()
-                else:
-                    rut = format_rut(client.company_rut, client.company_rut_dv)
-                    name = client.company_name.strip().title()
-            
-            means = means_map.get(visit.input_means_id if visit else None, 'others')
+            client = client_map.get(task['client_gci_id'])
+            evaluation = evaluation_map.get(task['evaluation_id'])
 
             table_data.append({
-                'id': task.id,
-                'rut': rut,
-                'name': name,
-                'project': evaluation.project_id.label.strip().title() if evaluation and evaluation.project_id else None,
-                'contactDate': format_date(evaluation.recontact_date if evaluation else None),
-                'lastComment': evaluation.comment.strip().lower() if evaluation else None,
-                'means': means
+                'id': task['id'],
+                'rut': client['rut'] if client else "Sin Rut",
+                'name': client['name'] if client else "Sin Nombre",
+                'project': evaluation['project'] if evaluation else None,
+                'contactDate': evaluation['contactDate'] if evaluation else None,
+                'lastComment': evaluation['lastComment'] if evaluation else None,
+                'means': evaluation['means'] if evaluation else 'others'
             })
-
-        return {
-            'status': 'success',
-            'data': table_data
-        }
\ No newline at end of file
+        return table_data
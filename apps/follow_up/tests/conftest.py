@@ -0,0 +1,110 @@
+# follow_up/tests/conftest.py
+from datetime import timedelta
+from itertools import count
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from apps.core.cache import dimension_cache
+from apps.core.catalog import label_catalog
+from apps.core.models import Client, Evaluation, UserGcli
+from apps.core.models.project import Project
+from apps.core.models.visit import Visit
+from apps.core.models.tasks import (
+    FollowUpCounter, FollowUpCounterState, FollowUpTaskSnapshot, Task, TaskHistory, TaskOrigin,
+    TaskStatus, TaskType, UserTask,
+)
+from apps.core.models.tasks.system import System
+
+USER_RUT = 1001
+
+UNMANAGED_MODELS = [
+    System, TaskType, TaskStatus, TaskOrigin, UserGcli, Project, Visit, Client, Evaluation,
+    Task, TaskHistory, UserTask, FollowUpTaskSnapshot, FollowUpCounter, FollowUpCounterState,
+]
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(django_db_setup, django_db_blocker):
+    """
+    Crea en la BD de tests las tablas no administradas que usa follow_up.
+    Sin inmobiliaria en el contexto el router envía todo a default.
+    """
+    completion = Task._meta.get_field('actual_completion_date')
+    with django_db_blocker.unblock():
+        # En las BD reales la columna acepta NULL aunque el modelo no lo declare
+        completion.null = True
+        try:
+            with connection.schema_editor() as editor:
+                for model in UNMANAGED_MODELS:
+                    editor.create_model(model)
+        finally:
+            completion.null = False
+
+
+@pytest.fixture(autouse=True)
+def clear_dimension_cache():
+    # Los ids se repiten entre tests: no arrastrar filas cacheadas
+    dimension_cache.invalidate()
+    label_catalog.invalidate()
+    yield
+    dimension_cache.invalidate()
+    label_catalog.invalidate()
+
+
+@pytest.fixture
+def catalog(db):
+    return {
+        'system': System.objects.create(id=1, label='GCI'),
+        'follow_up': TaskType.objects.create(id=1, label='Seguimiento', system_id=1),
+        'call': TaskType.objects.create(id=2, label='Llamado', system_id=1),
+        'new': TaskStatus.objects.create(id=1, label='Nueva'),
+        'running': TaskStatus.objects.create(id=2, label='En Ejecución'),
+        'closed': TaskStatus.objects.create(id=3, label='Cerrada'),
+        'origin': TaskOrigin.objects.create(id=1, label='Manual', system_id=1),
+        'project': Project.objects.create(id=1, label='  edificio centro '),
+        'user': UserGcli.objects.create(username_sso=str(USER_RUT), rut_gci=USER_RUT, position='Vendedor'),
+        'other_user': UserGcli.objects.create(username_sso='2002', rut_gci=2002, position='Vendedor'),
+    }
+
+
+@pytest.fixture
+def make_task(catalog):
+    """
+    Crea una tarea de seguimiento abierta con su evaluación, visita y cliente.
+    due_days es el desfase en días respecto de hoy a mediodía.
+    """
+    ids = count(1)
+
+    def make(due_days=-1, input_means=7, user='user', status='new', task_type='follow_up',
+             client_type='NATURAL', history=1):
+        task_id = next(ids)
+        today = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        due_date = today + timedelta(days=due_days)
+        visit = Visit.objects.create(id=task_id, input_means_id=input_means)
+        client = Client.objects.create(
+            id=task_id, type=client_type, person_name=' juan ', person_lastname='pérez ',
+            person_rut='12345678', person_rut_dv='9', company_rut='76543210',
+            company_rut_dv='K', company_name='inmobiliaria sur',
+        )
+        evaluation = Evaluation.objects.create(
+            id=task_id, project_id=catalog['project'], visit_id=visit, client_id=client,
+            recontact_date=due_date.date(), comment=' Llamar de nuevo ',
+        )
+        task = Task.objects.create(
+            id=task_id, system_id=catalog['system'], task_type_id=catalog[task_type],
+            task_origin_id=catalog['origin'], task_status_id=catalog[status],
+            client_gci_id=client, due_date=due_date, actual_completion_date=None,
+            title=f'Tarea {task_id}', evaluation_id=evaluation,
+        )
+        UserTask.objects.create(id=task, sso_username=catalog[user])
+        for index in range(history):
+            TaskHistory.objects.create(
+                task_id=task, task_status_id=catalog[status],
+                record_date=today - timedelta(days=history - index), due_date=due_date,
+                title='Historial',
+            )
+        return task
+
+    return make
@@ -0,0 +1,128 @@
+# follow_up/tests/test_counters.py
+import pytest
+from django.utils import timezone
+
+from apps.follow_up.counters import FollowUpCounterService
+from apps.follow_up.models import FollowUpCounter, TaskHistory
+from apps.follow_up.services import FollowUpService
+
+from .conftest import USER_RUT
+
+
+def assert_counters_match_live():
+    for time_status in ('today', 'overdue'):
+        assert (
+            FollowUpService.get_summary(USER_RUT, time_status, source='counters')
+            == FollowUpService.get_summary(USER_RUT, time_status, source='live')
+        )
+    assert FollowUpCounterService.check() == []
+
+
+def add_history(task, status):
+    task.task_history.create(
+        task_status_id=status, record_date=timezone.now(), due_date=task.due_date, title='Gestión',
+    )
+
+
+@pytest.mark.django_db
+def test_rebuild_matches_live_summary(make_task):
+    make_task(due_days=-2, input_means=7)
+    make_task(due_days=-1, input_means=4)
+    make_task(due_days=0, input_means=8)
+    make_task(due_days=-1, input_means=7, user='other_user')
+    make_task(due_days=-1, status='closed')
+
+    assert FollowUpCounterService.sync() == 4
+    assert_counters_match_live()
+
+
+@pytest.mark.django_db
+def test_sync_applies_new_history_only(make_task, catalog, django_assert_max_num_queries):
+    task = make_task(due_days=-1, input_means=7)
+    FollowUpCounterService.rebuild()
+    assert FollowUpCounterService.sync() == 0
+
+    new_task = make_task(due_days=0, input_means=4)
+    assert FollowUpCounterService.sync() == 1
+    assert_counters_match_live()
+
+    task.task_status_id = catalog['closed']
+    task.save()
+    add_history(task, catalog['closed'])
+    assert FollowUpCounterService.sync() == 1
+    overdue = FollowUpService.get_summary(USER_RUT, 'overdue', source='counters')
+    assert all(item['quantity'] == 0 for item in overdue['data'])
+    assert_counters_match_live()
+
+    # Una cantidad fija de consultas por lote, sin recorrer las demás tareas
+    new_task.task_status_id = catalog['running']
+    new_task.save()
+    add_history(new_task, catalog['running'])
+    with django_assert_max_num_queries(14):
+        FollowUpCounterService.sync()
+
+
+@pytest.mark.django_db
+def test_check_reports_differences(make_task):
+    make_task(due_days=-1, input_means=7)
+    FollowUpCounterService.rebuild()
+    FollowUpCounter.objects.filter(means='sales_room').update(quantity=5)
+
+    assert FollowUpCounterService.check() == [{
+        'username': str(USER_RUT),
+        'time_status': 'overdue',
+        'means': 'sales_room',
+        'live': 1,
+        'counters': 5,
+    }]
+
+
+@pytest.mark.django_db
+def test_summary_source_setting(make_task, settings):
+    make_task(due_days=-1, input_means=7)
+    FollowUpCounterService.rebuild()
+    make_task(due_days=-1, input_means=7, history=0)
+
+    settings.FOLLOW_UP_SUMMARY_SOURCE = 'counters'
+    assert FollowUpService.get_summary(USER_RUT, 'overdue')['data'][0]['quantity'] == 1
+    settings.FOLLOW_UP_SUMMARY_SOURCE = 'live'
+    assert FollowUpService.get_summary(USER_RUT, 'overdue')['data'][0]['quantity'] == 2
+
+
+@pytest.mark.django_db
+def test_create_tables_skips_existing():
+    assert FollowUpCounterService.create_tables() == []
+
+
+@pytest.mark.django_db
+def test_team_summary_from_counters(make_task):
+    make_task(due_days=-1, input_means=7)
+    make_task(due_days=0, input_means=4, user='other_user')
+    FollowUpCounterService.rebuild()
+
+    for time_status in ('today', 'overdue'):
+        assert (
+            FollowUpService.get_team_summary([USER_RUT, 2002], time_status, source='counters')
+            == FollowUpService.get_team_summary([USER_RUT, 2002], time_status, source='live')
+        )
+
+
+@pytest.mark.django_db
+def test_sync_picks_up_history_committed_below_the_watermark(make_task, catalog):
+    task = make_task(due_days=-1, input_means=7)
+    other = make_task(due_days=-2, input_means=4)
+    FollowUpCounterService.rebuild()
+
+    # Simula una transacción que confirmó tarde con un id menor que la marca
+    # de agua: el cambio de la tarea queda con un id ya procesado
+    late = TaskHistory.objects.filter(task_id=task.id).order_by('id').first()
+    task.task_status_id = catalog['closed']
+    task.save()
+    TaskHistory.objects.filter(id=late.id).update(task_status_id=catalog['closed'])
+    add_history(other, catalog['new'])
+
+    FollowUpCounterService.sync(lag_window=0)
+    assert FollowUpCounterService.check() != []
+
+    FollowUpCounterService.sync()
+    assert_counters_match_live()
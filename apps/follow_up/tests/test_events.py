@@ -0,0 +1,179 @@
+# follow_up/tests/test_events.py
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from apps.core.context import tenant_context
+from apps.follow_up import views
+from apps.follow_up.events import FollowUpEventHub, astream_events, stream_events
+from apps.follow_up.views import FollowUpViewSet
+
+from .conftest import USER_RUT
+
+
+def overdue_total(payload):
+    return sum(item['quantity'] for item in payload['overdue']['summary'])
+
+
+@pytest.mark.django_db
+def test_poll_publishes_initial_summary_and_changes_only(make_task, catalog, django_assert_num_queries):
+    hub = FollowUpEventHub(autostart=False)
+    task = make_task(due_days=-1)
+    first = hub.subscribe(None, USER_RUT)
+    second = hub.subscribe(None, USER_RUT)
+
+    hub.poll(None)
+    assert overdue_total(first.next_message(0)) == 1
+    assert overdue_total(second.next_message(0)) == 1
+
+    # Sin historial nuevo: una sola consulta y nada que publicar
+    with django_assert_num_queries(1):
+        assert hub.poll(None) == set()
+    assert first.next_message(0) is None
+
+    task.task_status_id = catalog['closed']
+    task.save()
+    task.task_history.create(
+        task_status_id=catalog['closed'], record_date=timezone.now(), due_date=task.due_date, title='Cierre',
+    )
+    assert hub.poll(None) == {str(USER_RUT)}
+    assert overdue_total(first.next_message(0)) == 0
+    assert overdue_total(second.next_message(0)) == 0
+
+
+@pytest.mark.django_db
+def test_history_of_other_users_is_ignored(make_task, catalog):
+    hub = FollowUpEventHub(autostart=False)
+    make_task(due_days=-1)
+    subscription = hub.subscribe(None, USER_RUT)
+    hub.poll(None)
+    subscription.next_message(0)
+
+    make_task(due_days=-1, user='other_user')
+    assert hub.poll(None) == set()
+
+
+@pytest.mark.django_db
+def test_new_subscriber_gets_last_summary_without_polling(make_task):
+    hub = FollowUpEventHub(autostart=False)
+    make_task(due_days=-1)
+    hub.subscribe(None, USER_RUT)
+    hub.poll(None)
+
+    late = hub.subscribe(None, USER_RUT)
+    assert overdue_total(late.next_message(0)) == 1
+    assert hub.poll(None) == set()
+
+
+def test_stream_closes_subscription():
+    hub = FollowUpEventHub(autostart=False)
+    subscription = hub.subscribe(None, USER_RUT)
+    subscription.publish({'today': {'summary': []}})
+
+    stream = stream_events(subscription)
+    assert next(stream) == b'retry: 5000\n\n'
+    event = next(stream).decode()
+    assert event.startswith('event: summary\ndata: ')
+    assert json.loads(event.split('data: ', 1)[1]) == {'today': {'summary': []}}
+    stream.close()
+    assert hub.stats() == {None: 0}
+
+
+def test_events_requires_user():
+    request = APIRequestFactory().get('/follow-up/events/')
+    response = FollowUpViewSet.as_view({'get': 'events'})(request)
+    assert response.status_code == 400
+
+
+def test_events_requires_agency():
+    request = APIRequestFactory().get('/follow-up/events/', HTTP_X_USER_RUT=str(USER_RUT))
+    response = FollowUpViewSet.as_view({'get': 'events'})(request)
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_wsgi_streams_are_limited(settings, monkeypatch):
+    settings.FOLLOW_UP_EVENTS_MAX_WSGI_STREAMS = 1
+    hub = FollowUpEventHub(autostart=False)
+    monkeypatch.setattr(views, 'event_hub', hub)
+    view = FollowUpViewSet.as_view({'get': 'events'})
+
+    with tenant_context(SimpleNamespace(id=1, name='Besalco')):
+        first = view(APIRequestFactory().get('/follow-up/events/', HTTP_X_USER_RUT=str(USER_RUT)))
+        assert first.status_code == 200
+        assert next(iter(first)) == b'retry: 5000\n\n'
+        second = view(APIRequestFactory().get('/follow-up/events/', HTTP_X_USER_RUT=str(USER_RUT)))
+        assert second.status_code == 503
+
+        first.close()
+        third = view(APIRequestFactory().get('/follow-up/events/', HTTP_X_USER_RUT=str(USER_RUT)))
+        assert third.status_code == 200
+        next(iter(third))
+        third.close()
+    assert hub.stats() == {1: 0}
+
+
+def test_stream_ends_after_max_duration(settings):
+    settings.FOLLOW_UP_EVENTS_MAX_DURATION = 0.2
+    settings.FOLLOW_UP_EVENTS_HEARTBEAT = 0.05
+    hub = FollowUpEventHub(autostart=False)
+    subscription = hub.subscribe(None, USER_RUT)
+
+    messages = list(stream_events(subscription))
+    assert messages[0] == b'retry: 5000\n\n'
+    assert set(messages[1:]) == {b': keepalive\n\n'}
+    assert subscription.closed
+    assert hub.stats() == {None: 0}
+
+
+class NoThreadsExecutor(ThreadPoolExecutor):
+    def submit(self, *args, **kwargs):
+        raise AssertionError('el stream ASGI no debe ocupar threads del executor')
+
+
+def test_async_streams_wait_without_threads(settings):
+    settings.FOLLOW_UP_EVENTS_HEARTBEAT = 5
+    hub = FollowUpEventHub(autostart=False)
+    subscriptions = [hub.subscribe(None, USER_RUT) for _ in range(50)]
+
+    async def consume():
+        asyncio.get_running_loop().set_default_executor(NoThreadsExecutor())
+        streams = [astream_events(subscription) for subscription in subscriptions]
+        for stream in streams:
+            assert await stream.__anext__() == b'retry: 5000\n\n'
+        pending = [asyncio.ensure_future(stream.__anext__()) for stream in streams]
+        # El poller publica desde su propio thread
+        await asyncio.sleep(0.05)
+        threading.Thread(target=lambda: [
+            subscription.publish({'today': {'summary': []}}) for subscription in subscriptions
+        ]).start()
+        events = await asyncio.wait_for(asyncio.gather(*pending), 1)
+        for stream in streams:
+            await stream.aclose()
+        return events
+
+    events = asyncio.run(consume())
+    assert all(event.startswith(b'event: summary\n') for event in events)
+    assert hub.stats() == {None: 0}
+
+
+def test_async_stream_sends_keepalive_on_timeout(settings):
+    settings.FOLLOW_UP_EVENTS_HEARTBEAT = 0.05
+    hub = FollowUpEventHub(autostart=False)
+    subscription = hub.subscribe(None, USER_RUT)
+
+    async def consume():
+        stream = astream_events(subscription)
+        await stream.__anext__()
+        event = await stream.__anext__()
+        await stream.aclose()
+        return event
+
+    assert asyncio.run(consume()) == b': keepalive\n\n'
+    assert subscription.closed
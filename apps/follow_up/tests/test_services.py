@@ -0,0 +1,255 @@
+# follow_up/tests/test_services.py
+import pytest
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.cache import dimension_cache
+from apps.core.fanout import FanOutResult
+from apps.core.models import Evaluation
+from apps.core.services import DatabasesUtils
+from apps.follow_up.services import FollowUpService
+
+from .conftest import USER_RUT
+
+
+def quantities(result):
+    return {item['means']: item['quantity'] for item in result['data']}
+
+
+@pytest.mark.django_db
+def test_summary_groups_by_input_means(make_task):
+    make_task(due_days=-2, input_means=7)
+    make_task(due_days=-3, input_means=7, history=3)
+    make_task(due_days=-1, input_means=4)
+    make_task(due_days=-1, input_means=99)
+    make_task(due_days=0, input_means=8)
+    make_task(due_days=-1, input_means=7, user='other_user')
+    make_task(due_days=-1, input_means=7, status='closed')
+    make_task(due_days=-1, input_means=7, task_type='call')
+
+    overdue = quantities(FollowUpService.get_summary(USER_RUT, 'overdue'))
+    assert overdue == {
+        'sales_room': 2, 'centralizer': 1, 'web_quoter': 0, 'rrss': 0, 'api': 0, 'others': 1,
+    }
+    today = quantities(FollowUpService.get_summary(USER_RUT, 'today'))
+    assert today['web_quoter'] == 1
+    assert sum(today.values()) == 1
+
+
+@pytest.mark.django_db
+def test_summary_without_tasks(catalog):
+    result = FollowUpService.get_summary(USER_RUT, 'overdue')
+    assert [item['means'] for item in result['data']] == [
+        'sales_room', 'centralizer', 'web_quoter', 'rrss', 'api', 'others',
+    ]
+    assert all(item['quantity'] == 0 for item in result['data'])
+
+
+@pytest.mark.django_db
+def test_details_formats_clients_and_evaluations(make_task):
+    natural = make_task(due_days=-1, input_means=4)
+    company = make_task(due_days=-2, input_means=3, client_type='EMPRESA')
+
+    result = FollowUpService.get_details(USER_RUT, 'overdue')
+    rows = {row['id']: row for row in result['data']}
+    assert rows[natural.id] == {
+        'id': natural.id,
+        'rut': '12.345.678-9',
+        'name': 'Juan Pérez',
+        'project': 'Edificio Centro',
+        'contactDate': natural.due_date.strftime('%d-%m-%Y'),
+        'lastComment': 'llamar de nuevo',
+        'means': 'centralizer',
+    }
+    assert rows[company.id]['rut'] == '76.543.210-K'
+    assert rows[company.id]['name'] == 'Inmobiliaria Sur'
+    assert rows[company.id]['means'] == 'others'
+
+
+@pytest.mark.django_db
+def test_details_reuses_cached_dimensions(make_task, django_assert_num_queries):
+    make_task(due_days=-1)
+    make_task(due_days=-2)
+    FollowUpService.get_details(USER_RUT, 'overdue')
+    # La página de tareas y sus evaluaciones; los clientes salen del cache
+    with django_assert_num_queries(2):
+        FollowUpService.get_details(USER_RUT, 'overdue')
+
+
+@pytest.mark.django_db
+def test_details_cold_page_reads_evaluations_once(make_task, django_assert_num_queries):
+    make_task(due_days=-1)
+    FollowUpService.get_details(USER_RUT, 'overdue')
+    dimension_cache.invalidate()
+    # Con el catálogo de glosas ya cargado: tareas, clientes y evaluaciones; la
+    # misma lectura deja en cache lo que usan los resúmenes
+    with django_assert_num_queries(3):
+        FollowUpService.get_details(USER_RUT, 'overdue')
+    with django_assert_num_queries(1):
+        FollowUpService.get_summary(USER_RUT, 'overdue')
+
+
+@pytest.mark.django_db
+def test_details_read_evaluation_follow_ups_live(make_task):
+    task = make_task(due_days=-1)
+    FollowUpService.get_details(USER_RUT, 'overdue')
+
+    # Una nueva gestión cambia el comentario y la fecha de recontacto en gci
+    recontact_date = timezone.localdate() + timedelta(days=3)
+    Evaluation.objects.filter(id=task.evaluation_id_id).update(comment='Volver a llamar', recontact_date=recontact_date)
+
+    row = FollowUpService.get_details(USER_RUT, 'overdue')['data'][0]
+    assert row['lastComment'] == 'volver a llamar'
+    assert row['contactDate'] == recontact_date.strftime('%d-%m-%Y')
+
+
+@pytest.mark.django_db
+def test_details_pages_follow_due_date_and_id(make_task):
+    tasks = [make_task(due_days=-days) for days in (3, 1, 2, 2, 5, 2, 1)]
+    expected = [task.id for task in sorted(tasks, key=lambda task: (task.due_date, task.id))]
+
+    seen = []
+    cursor = None
+    while True:
+        page = FollowUpService.get_details_page(USER_RUT, 'overdue', cursor, page_size=2)
+        seen += [row['id'] for row in page['data']]
+        cursor = page['nextCursor']
+        if cursor is None:
+            break
+    assert seen == expected
+    assert [row['id'] for row in FollowUpService.iter_details(USER_RUT, 'overdue', page_size=3)] == expected
+
+
+@pytest.mark.django_db
+def test_details_page_size_is_bounded(catalog, settings):
+    settings.FOLLOW_UP_MAX_PAGE_SIZE = 10
+    with pytest.raises(ValueError):
+        FollowUpService.get_details_page(USER_RUT, 'overdue', page_size=11)
+
+
+@pytest.mark.django_db
+def test_overview_matches_separate_calls(make_task, django_assert_num_queries):
+    make_task(due_days=-2, input_means=7)
+    make_task(due_days=-1, input_means=4)
+    make_task(due_days=0, input_means=8)
+    make_task(due_days=0, input_means=7)
+    make_task(due_days=1, input_means=7)
+
+    # Con el catálogo de glosas ya cargado: tareas y evaluaciones
+    FollowUpService.get_overview(USER_RUT)
+    dimension_cache.invalidate()
+    with django_assert_num_queries(2):
+        overview = FollowUpService.get_overview(USER_RUT)['data']
+    for time_status in ('today', 'overdue'):
+        assert overview[time_status]['summary'] == FollowUpService.get_summary(USER_RUT, time_status)['data']
+        assert 'details' not in overview[time_status]
+
+    overview = FollowUpService.get_overview(USER_RUT, include_details=True)['data']
+    for time_status in ('today', 'overdue'):
+        assert overview[time_status]['summary'] == FollowUpService.get_summary(USER_RUT, time_status)['data']
+        assert overview[time_status]['details'] == FollowUpService.get_details(USER_RUT, time_status)['data']
+
+
+@pytest.mark.django_db
+def test_validator_changes_with_task_history(make_task):
+    task = make_task(due_days=-1)
+    validator = FollowUpService.get_validator(USER_RUT)
+    assert FollowUpService.get_validator(USER_RUT) == validator
+
+    task.task_history.create(
+        task_status_id=task.task_status_id, record_date=timezone.now(), due_date=task.due_date, title='Gestión',
+    )
+    assert FollowUpService.get_validator(USER_RUT) != validator
+    changed = FollowUpService.get_validator(USER_RUT)
+
+    make_task(due_days=-3, history=0)
+    assert FollowUpService.get_validator(USER_RUT) != changed
+
+
+@pytest.mark.django_db
+def test_details_inside_transaction_runs_lookups_inline(make_task, settings):
+    # Los workers no verían las filas de la transacción del test
+    settings.CONCURRENT_QUERIES_ENABLED = True
+    task = make_task(due_days=-1)
+    rows = FollowUpService.get_details(USER_RUT, 'overdue')['data']
+    assert rows[0]['id'] == task.id
+    assert rows[0]['name'] == 'Juan Pérez'
+
+
+@pytest.mark.django_db
+def test_open_follow_ups_filter_catalog_ids_without_joins(catalog):
+    sql = str(FollowUpService._get_tasks(USER_RUT, Q()).query)
+    assert 'JOIN "estado_tarea"' not in sql
+    assert 'JOIN "tipo_tarea"' not in sql
+
+
+@pytest.mark.django_db
+def test_histogram_buckets_in_one_query(make_task, django_assert_num_queries):
+    for days in (-45, -31, -30, -8, -7, -4, -3, -1, 0, 0, 1, 3, 7, 8):
+        make_task(due_days=days)
+
+    FollowUpService.get_histogram(USER_RUT)
+    with django_assert_num_queries(1):
+        data = FollowUpService.get_histogram(USER_RUT, upcoming_days=7)['data']
+
+    assert [(bucket['fromDays'], bucket['toDays'], bucket['quantity']) for bucket in data['overdue']] == [
+        (1, 3, 2), (4, 7, 2), (8, 30, 2), (31, None, 2),
+    ]
+    assert data['today'] == 2
+    assert [bucket['quantity'] for bucket in data['upcoming']] == [1, 0, 1, 0, 0, 0, 1]
+    assert data['upcoming'][0]['date'] == (timezone.localdate() + timedelta(days=1)).strftime('%d-%m-%Y')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('kwargs', [
+    {'aging_edges': [2, 5]},
+    {'aging_edges': [1, 5, 5]},
+    {'aging_edges': [1, 99999999]},
+    {'upcoming_days': 61},
+])
+def test_histogram_rejects_invalid_edges(catalog, kwargs):
+    with pytest.raises(ValueError):
+        FollowUpService.get_histogram(USER_RUT, **kwargs)
+
+
+@pytest.mark.django_db
+def test_team_summary_matches_per_user_summaries(make_task, django_assert_num_queries):
+    make_task(due_days=-2, input_means=7)
+    make_task(due_days=-1, input_means=4)
+    make_task(due_days=-1, input_means=8, user='other_user')
+    make_task(due_days=0, input_means=7, user='other_user')
+    team = [USER_RUT, 2002, 3003]
+
+    FollowUpService.get_team_summary(team, 'overdue')
+    dimension_cache.invalidate()
+    # Tareas de todo el equipo y evaluaciones
+    with django_assert_num_queries(2):
+        result = FollowUpService.get_team_summary(team, 'overdue')['data']
+
+    assert [row['userRut'] for row in result] == ['1001', '2002', '3003']
+    for row in result:
+        assert row['summary'] == FollowUpService.get_summary(row['userRut'], 'overdue')['data']
+
+
+@pytest.mark.django_db
+def test_team_summary_limits_users(catalog, settings):
+    settings.FOLLOW_UP_TEAM_MAX_USERS = 2
+    with pytest.raises(ValueError):
+        FollowUpService.get_team_summary([1, 2, 3], 'today')
+    with pytest.raises(ValueError):
+        FollowUpService.get_team_summary([], 'today')
+
+
+@pytest.mark.django_db
+def test_agencies_summary_skips_agencies_without_the_user(make_task, monkeypatch):
+    make_task(due_days=-1)
+    monkeypatch.setattr(DatabasesUtils, 'fan_out', lambda func, args: FanOutResult(
+        agencies={1: SimpleNamespace(name='Sur')},
+        results={1: func(*args)},
+    ))
+    agencies = FollowUpService.get_agencies_summary(USER_RUT, 'overdue')['agencies']
+    assert [agency['agencyId'] for agency in agencies] == [1]
+    assert FollowUpService.get_agencies_summary(9999, 'overdue')['agencies'] == []
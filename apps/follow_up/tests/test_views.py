@@ -0,0 +1,197 @@
+# follow_up/tests/test_views.py
+import csv
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory
+from rest_framework.test import APIRequestFactory
+
+from apps.core.models import UserGcli
+from apps.core.pagination import encode_cursor
+from apps.follow_up.views import FollowUpViewSet, stream_csv_rows
+
+from .conftest import USER_RUT
+
+details_view = FollowUpViewSet.as_view({'get': 'details'})
+
+
+def get_details(**params):
+    request = APIRequestFactory().get('/follow-up/details/', params, HTTP_X_USER_RUT=str(USER_RUT))
+    return details_view(request)
+
+
+@pytest.mark.django_db
+def test_details_streams_all_tasks(make_task, settings):
+    settings.FOLLOW_UP_MAX_PAGE_SIZE = 2
+    tasks = [make_task(due_days=-days) for days in (1, 2, 3)]
+
+    response = get_details(time_status='overdue')
+    assert response.streaming
+    body = json.loads(b''.join(response.streaming_content))
+    assert body['status'] == 'success'
+    assert sorted(row['id'] for row in body['data']) == sorted(task.id for task in tasks)
+
+
+@pytest.mark.django_db
+def test_details_streams_asynchronously_under_asgi(make_task, settings):
+    settings.FOLLOW_UP_MAX_PAGE_SIZE = 2
+    tasks = [make_task(due_days=-days) for days in (1, 2, 3)]
+
+    request = AsyncRequestFactory().get(
+        '/follow-up/details/', {'time_status': 'overdue'}, headers={'X-User-Rut': str(USER_RUT)}
+    )
+    response = details_view(request)
+    assert response.is_async
+
+    async def read():
+        return [chunk async for chunk in response.streaming_content]
+
+    chunks = async_to_sync(read)()
+    # Un trozo por página además del inicio y el cierre
+    assert len(chunks) == 4
+    body = json.loads(b''.join(chunks))
+    assert sorted(row['id'] for row in body['data']) == sorted(task.id for task in tasks)
+
+
+@pytest.mark.django_db
+def test_details_page_with_cursor(make_task):
+    for days in (1, 2, 3):
+        make_task(due_days=-days)
+
+    first = get_details(time_status='overdue', page_size=2)
+    first.render()
+    assert len(first.data['data']) == 2
+    second = get_details(time_status='overdue', cursor=first.data['nextCursor'])
+    second.render()
+    assert len(second.data['data']) == 1
+    assert second.data['nextCursor'] is None
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', [
+    {'page_size': 'diez'},
+    {'page_size': '0'},
+    {'cursor': 'basura'},
+    {'cursor': encode_cursor(['garbage', 1])},
+    {'cursor': encode_cursor(['2024-01-01T00:00:00+00:00', 'uno'])},
+    {'cursor': encode_cursor([None, 1])},
+])
+def test_details_rejects_invalid_pagination(catalog, params):
+    response = get_details(time_status='overdue', **params)
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_overview_rejects_invalid_include_details(catalog):
+    request = APIRequestFactory().get(
+        '/follow-up/overview/', {'include_details': 'quizás'}, HTTP_X_USER_RUT=str(USER_RUT)
+    )
+    response = FollowUpViewSet.as_view({'get': 'overview'})(request)
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params, status', [
+    ({'upcoming_days': '30', 'aging': '1,8'}, 200),
+    ({'upcoming_days': '-1'}, 400),
+    ({'aging': '1,tres'}, 400),
+    ({'aging': '1,99999999'}, 400),
+])
+def test_histogram_params(catalog, params, status):
+    request = APIRequestFactory().get('/follow-up/histogram/', params, HTTP_X_USER_RUT=str(USER_RUT))
+    response = FollowUpViewSet.as_view({'get': 'histogram'})(request)
+    assert response.status_code == status
+    if status == 200:
+        assert len(response.data['data']['upcoming']) == 30
+        assert [bucket['toDays'] for bucket in response.data['data']['overdue']] == [7, None]
+
+
+def get_export(**params):
+    request = APIRequestFactory().get('/follow-up/export/', params, HTTP_X_USER_RUT=str(USER_RUT))
+    return FollowUpViewSet.as_view({'get': 'export'})(request)
+
+
+@pytest.mark.django_db
+def test_export_csv_streams_pages(make_task, settings):
+    settings.FOLLOW_UP_MAX_PAGE_SIZE = 2
+    tasks = [make_task(due_days=-days) for days in (1, 2, 3)]
+
+    response = get_export(time_status='overdue')
+    assert response.streaming
+    assert response['Content-Type'] == 'text/csv; charset=utf-8'
+    assert response['Content-Disposition'].startswith('attachment; filename="seguimiento_overdue_')
+    lines = list(csv.reader(b''.join(response.streaming_content).decode('utf-8-sig').splitlines()))
+    assert lines[0] == ['id', 'rut', 'name', 'project', 'contactDate', 'lastComment', 'means']
+    assert sorted(int(line[0]) for line in lines[1:]) == sorted(task.id for task in tasks)
+    assert lines[1][2] == 'Juan Pérez'
+
+
+@pytest.mark.django_db
+def test_export_ndjson(make_task):
+    task = make_task(due_days=0)
+
+    response = get_export(time_status='today', export_format='ndjson')
+    assert response['Content-Type'] == 'application/x-ndjson'
+    rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+    assert [row['id'] for row in rows] == [task.id]
+
+
+def test_csv_cells_do_not_start_formulas():
+    assert b"'=HYPERLINK(1)" in b''.join(stream_csv_rows([[
+        dict.fromkeys(['id', 'rut', 'name', 'project', 'contactDate', 'means']) | {'lastComment': '=HYPERLINK(1)'}
+    ]]))
+
+
+@pytest.mark.django_db
+def test_export_rejects_unknown_format(catalog):
+    assert get_export(export_format='xlsx').status_code == 400
+
+
+def get_team_summary(user_ruts, user_rut=USER_RUT):
+    headers = {'HTTP_X_USER_RUT': str(user_rut)} if user_rut else {}
+    request = APIRequestFactory().get('/follow-up/team-summary/', {'user_ruts': user_ruts}, **headers)
+    return FollowUpViewSet.as_view({'get': 'team_summary'})(request)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('user_ruts, status', [('1001, 2002', 200), ('', 400), ('1001,12.345.678-9', 400)])
+def test_team_summary_params(catalog, user_ruts, status):
+    assert get_team_summary(user_ruts).status_code == status
+
+
+@pytest.mark.django_db
+def test_team_summary_requires_user(catalog):
+    assert get_team_summary('1001', user_rut=None).status_code == 400
+
+
+@pytest.mark.django_db
+def test_team_summary_of_others_requires_manager_position(catalog, settings):
+    settings.FOLLOW_UP_TEAM_MANAGER_POSITIONS = ['jefe de ventas']
+    # El propio resumen siempre se puede ver
+    assert get_team_summary(str(USER_RUT)).status_code == 200
+    assert get_team_summary(f'{USER_RUT},2002').status_code == 403
+
+    UserGcli.objects.filter(username_sso=str(USER_RUT)).update(position='Jefe de Ventas ')
+    assert get_team_summary(f'{USER_RUT},2002').status_code == 200
+
+
+@pytest.mark.django_db
+def test_export_streams_asynchronously_under_asgi(make_task, settings):
+    settings.FOLLOW_UP_MAX_PAGE_SIZE = 2
+    tasks = [make_task(due_days=-days) for days in (1, 2, 3)]
+
+    request = AsyncRequestFactory().get(
+        '/follow-up/export/', {'time_status': 'overdue', 'export_format': 'ndjson'},
+        headers={'X-User-Rut': str(USER_RUT)},
+    )
+    response = FollowUpViewSet.as_view({'get': 'export'})(request)
+    assert response.is_async
+
+    async def read():
+        return [chunk async for chunk in response.streaming_content]
+
+    chunks = async_to_sync(read)()
+    assert len(chunks) == 2
+    rows = [json.loads(line) for line in b''.join(chunks).splitlines()]
+    assert sorted(row['id'] for row in rows) == sorted(task.id for task in tasks)
@@ -1,14 +1,31 @@
+import csv
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from apps.core.conditional import conditional_etag
+from apps.core.identity import get_user_rut
+from apps.core.renderers import dumps
+from apps.core.services import DatabasesUtils
+from apps.core.streaming import streaming_response
+from .events import astream_events, event_hub, stream_events
 from .services import FollowUpService
 
+
+def follow_up_validator(request):
+    return FollowUpService.get_validator(get_user_rut(request))
+
+
 class FollowUpViewSet(viewsets.ViewSet):
 
     @action(detail=False, methods=['get'], url_path='summary')
+    @conditional_etag(follow_up_validator)
     def summary(self, request, *args, **kwargs):
         time_status = request.query_params.get('time_status', 'today')
-        user_rut = request.headers.get('X-User-Rut')
+        user_rut = get_user_rut(request)
 
         if time_status not in ['today', 'overdue']:
             return Response({
@@ -25,10 +42,178 @@ class FollowUpViewSet(viewsets.ViewSet):
                 'message': str(e)
             }, status=400)
         
+    @action(detail=False, methods=['get'], url_path='overview')
+    @conditional_etag(follow_up_validator)
+    def overview(self, request, *args, **kwargs):
+        """
+        Resumen de hoy y atrasadas en una sola llamada; con
+        include_details=true agrega los detalles de cada grupo.
+        """
+        include_details = request.query_params.get('include_details', 'false').lower()
+        user_rut = get_user_rut(request)
+
+        if include_details not in ['true', 'false']:
+            return Response({
+                'status': 'error',
+                'message': 'include_details must be either "true" or "false"'
+            }, status=400)
+
+        try:
+            result = FollowUpService.get_overview(user_rut, include_details == 'true')
+            return Response(result)
+        except ValueError as e:
+            return Response({
+                'status': 'error',
+                'message': str(e)
+            }, status=400)
+
+    @action(detail=False, methods=['get'], url_path='histogram')
+    @conditional_etag(follow_up_validator)
+    def histogram(self, request, *args, **kwargs):
+        """
+        Distribución por fecha límite: upcoming_days días futuros (7 por
+        defecto) y tramos de atraso según aging, por ejemplo aging=1,4,8,31.
+        """
+        user_rut = get_user_rut(request)
+
+        try:
+            upcoming_days = request.query_params.get('upcoming_days', '7')
+            aging = request.query_params.get('aging', '1,4,8,31')
+            if not upcoming_days.isdigit() or not all(edge.strip().isdigit() for edge in aging.split(',')):
+                raise ValueError('upcoming_days and aging must be positive integers')
+
+            result = FollowUpService.get_histogram(
+                user_rut,
+                upcoming_days=int(upcoming_days),
+                aging_edges=[int(edge) for edge in aging.split(',')],
+            )
+            return Response(result)
+        except ValueError as e:
+            return Response({
+                'status': 'error',
+                'message': str(e)
+            }, status=400)
+
+    @action(detail=False, methods=['get'], url_path='events')
+    def events(self, request, *args, **kwargs):
+        """
+        Server-Sent Events con el resumen de hoy y atrasadas del usuario,
+        enviado al conectarse y luego solo cuando cambia.
+        """
+        user_rut = get_user_rut(request)
+
+        if not user_rut:
+            return Response({
+                'status': 'error',
+                'message': 'X-User-Rut header or access token is required'
+            }, status=400)
+
+        agency = DatabasesUtils.get_current_agency()
+        if agency is None:
+            return Response({
+                'status': 'error',
+                'message': 'X-Agency-Id header or access token is required'
+            }, status=400)
+
+        # En WSGI cada stream retiene un thread del servidor: se limitan y
+        # duran a lo más FOLLOW_UP_EVENTS_MAX_DURATION
+        blocking = not isinstance(request._request, ASGIRequest)
+        subscription = event_hub.subscribe(agency, user_rut, blocking=blocking)
+        if subscription is None:
+            response = Response({
+                'status': 'error',
+                'message': 'Too many event streams, retry later'
+            }, status=503)
+            response['Retry-After'] = '30'
+            return response
+        content = stream_events(subscription) if blocking else astream_events(subscription)
+        response = StreamingHttpResponse(content, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @action(detail=False, methods=['get'], url_path='agencies-summary')
+    def agencies_summary(self, request, *args, **kwargs):
+        time_status = request.query_params.get('time_status', 'today')
+        user_rut = get_user_rut(request)
+
+        if time_status not in ['today', 'overdue']:
+            return Response({
+                'status': 'error',
+                'message': 'time_status must be either "today" or "overdue"'
+            }, status=400)
+
+        # Solo el usuario autenticado (token o headers de Kong), y solo en sus
+        # inmobiliarias
+        if not user_rut or not str(user_rut).isdigit():
+            return Response({
+                'status': 'error',
+                'message': 'X-User-Rut header or access token is required'
+            }, status=400)
+
+        try:
+            result = FollowUpService.get_agencies_summary(user_rut, time_status)
+            return Response(result)
+        except ValueError as e:
+            return Response({
+                'status': 'error',
+                'message': str(e)
+            }, status=400)
+
+    @action(detail=False, methods=['get'], url_path='team-summary')
+    def team_summary(self, request, *args, **kwargs):
+        """
+        Resumen de varios usuarios en una llamada, con user_ruts separados por
+        coma. Requiere un usuario autenticado y, si se configura
+        FOLLOW_UP_TEAM_MANAGER_POSITIONS, que su cargo sea uno de esos para ver
+        a otros usuarios (ver FollowUpService.can_view_team).
+        """
+        time_status = request.query_params.get('time_status', 'today')
+        user_ruts = request.query_params.get('user_ruts', '')
+        user_rut = get_user_rut(request)
+
+        if not user_rut:
+            return Response({
+                'status': 'error',
+                'message': 'X-User-Rut header or access token is required'
+            }, status=400)
+
+        if time_status not in ['today', 'overdue']:
+            return Response({
+                'status': 'error',
+                'message': 'time_status must be either "today" or "overdue"'
+            }, status=400)
+
+        try:
+            user_ruts = [user_rut.strip() for user_rut in user_ruts.split(',') if user_rut.strip()]
+            if not all(user_rut.isdigit() for user_rut in user_ruts):
+                raise ValueError('user_ruts must be comma-separated RUTs without check digit')
+
+            if not FollowUpService.can_view_team(user_rut, user_ruts):
+                return Response({
+                    'status': 'error',
+                    'message': 'Not allowed to view other users summaries'
+                }, status=403)
+
+            result = FollowUpService.get_team_summary(user_ruts, time_status)
+            return Response(result)
+        except ValueError as e:
+            return Response({
+                'status': 'error',
+                'message': str(e)
+            }, status=400)
+
     @action(detail=False, methods=['get'], url_path='details')
+    @conditional_etag(follow_up_validator)
     def details(self, request, *args, **kwargs):
+        """
+        Con page_size o cursor retorna una página y su nextCursor; sin ellos
+        envía todas las tareas en streaming con el formato de siempre.
+        """
         time_status = request.query_params.get('time_status', 'today')
-        user_rut = request.headers.get('X-User-Rut')
+        user_rut = get_user_rut(request)
+        page_size = request.query_params.get('page_size')
+        cursor = request.query_params.get('cursor')
 
         if time_status not in ['today', 'overdue']:
             return Response({
@@ -37,11 +222,109 @@ class FollowUpViewSet(viewsets.ViewSet):
             }, status=400)
 
         try:
-            result = FollowUpService.get_details(user_rut, time_status)
+            if page_size is None and cursor is None:
+                pages = FollowUpService.iter_detail_pages(user_rut, time_status)
+                return streaming_response(request, stream_json_rows(pages), content_type='application/json')
+
+            if page_size is not None:
+                if not page_size.isdigit():
+                    raise ValueError('page_size must be a positive integer')
+                page_size = int(page_size)
+            result = FollowUpService.get_details_page(user_rut, time_status, cursor, page_size)
             return Response(result)
         except ValueError as e:
             return Response({
                 'status': 'error',
                 'message': str(e)
             }, status=400)
-        
\ No newline at end of file
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request, *args, **kwargs):
+        """
+        Descarga los detalles de todas las tareas en streaming como CSV o NDJSON
+        (export_format=csv|ndjson), leyendo de a una página con sus clientes y
+        evaluaciones, así la memoria no depende del tamaño de la exportación.
+        """
+        time_status = request.query_params.get('time_status', 'today')
+        export_format = request.query_params.get('export_format', 'csv')
+        user_rut = get_user_rut(request)
+
+        if time_status not in ['today', 'overdue']:
+            return Response({
+                'status': 'error',
+                'message': 'time_status must be either "today" or "overdue"'
+            }, status=400)
+
+        if export_format not in EXPORT_FORMATS:
+            return Response({
+                'status': 'error',
+                'message': 'export_format must be either "csv" or "ndjson"'
+            }, status=400)
+
+        stream, content_type = EXPORT_FORMATS[export_format]
+        pages = FollowUpService.iter_detail_pages(user_rut, time_status)
+        response = streaming_response(request, stream(pages), content_type=content_type)
+        filename = f'seguimiento_{time_status}_{timezone.localdate():%Y%m%d}.{export_format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+def stream_json_rows(pages):
+    """
+    Serializa {"status": "success", "data": [...]} con un trozo por página de
+    filas.
+    """
+    yield b'{"status":"success","data":['
+    separator = b''
+    for rows in pages:
+        yield separator + b','.join(dumps(row) for row in rows)
+        separator = b','
+    yield b']}'
+
+
+EXPORT_COLUMNS = ['id', 'rut', 'name', 'project', 'contactDate', 'lastComment', 'means']
+
+
+class _LineBuffer:
+    """
+    Archivo de una sola escritura para csv.writer: retorna la línea en vez de
+    guardarla.
+    """
+
+    def write(self, value):
+        return value
+
+
+def _csv_cell(value):
+    # Evita que una planilla interprete como fórmula un comentario como "=..."
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        return "'" + value
+    return value
+
+
+def stream_csv_rows(pages):
+    """
+    Serializa los detalles como CSV en UTF-8 con BOM, para que Excel respete
+    los acentos, con un trozo por página de filas.
+    """
+    writer = csv.writer(_LineBuffer())
+    yield '\ufeff'.encode() + writer.writerow(EXPORT_COLUMNS).encode()
+    for rows in pages:
+        yield ''.join(
+            writer.writerow([_csv_cell(row[column]) for column in EXPORT_COLUMNS]) for row in rows
+        ).encode()
+
+
+def stream_ndjson_rows(pages):
+    """
+    Serializa los detalles como un objeto JSON por línea, con un trozo por
+    página de filas.
+    """
+    for rows in pages:
+        yield b''.join(dumps(row) + b'\n' for row in rows)
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv_rows, 'text/csv; charset=utf-8'),
+    'ndjson': (stream_ndjson_rows, 'application/x-ndjson'),
+}
@@ -10,3 +10,11 @@ class UserService:
         Función base para obtener info del usuario.
         """
         return User.objects.filter(rut=user_rut)
+
+    @staticmethod
+    def get_validator(user_rut: int):
+        """
+        Datos que determinan la respuesta de info, para su ETag. Se leen solo
+        las columnas mostradas, sin serializar.
+        """
+        return tuple(User.objects.filter(rut=user_rut).values_list('rut', 'name', 'lastname'))
@@ -1,14 +1,21 @@
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from apps.core.conditional import conditional_etag
+from apps.core.identity import get_user_rut
 from .services import UserService
 from .serializers import UserInfoSerializer
 
+
+def user_info_validator(request):
+    return UserService.get_validator(get_user_rut(request))
+
 class UserViewSet(viewsets.ViewSet):
 
     @action(detail=False, methods=['get'], url_path='info')
+    @conditional_etag(user_info_validator)
     def userInfo(self, request, *args, **kwargs):
-        user_rut = request.headers.get('X-User-Rut')
+        user_rut = get_user_rut(request)
 
         try:
             result = UserService.get_info(user_rut)
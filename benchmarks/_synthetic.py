@@ -0,0 +1,148 @@
+"""
+Datos sintéticos en SQLite para los benchmarks de follow_up.
+
+Crea las tablas de los modelos no administrados (tarea, historial_tarea,
+tarea_usuario, cliente, evaluacion, ...) en una sola BD default y las llena con
+volúmenes configurables. Sin inmobiliaria en el contexto, el router envía todo
+a default, así que los servicios corren sin cambios sobre estos datos.
+"""
+import os
+import random
+import sys
+from datetime import datetime, time, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django
+from django.conf import settings
+
+USER_RUT = 1001
+MEANS_IDS = [7, 4, 8, 5, 12, 1]
+
+
+def setup_django(name=':memory:', **extra):
+    settings.configure(
+        INSTALLED_APPS=['apps.core', 'apps.follow_up', 'apps.user'],
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': name}},
+        DATABASE_ROUTERS=['apps.core.routers.databases.AgencyDatabaseRouter'],
+        TENANT_REPLICA_HOSTS={'gci': None, 'gcli': None},
+        USE_TZ=True,
+        TIME_ZONE='UTC',
+        **extra,
+    )
+    django.setup()
+
+
+def create_schema():
+    from django.db import connection
+    from apps.core.models import Agency, Client, Evaluation, UserGcli
+    from apps.core.models.project import Project
+    from apps.core.models.visit import Visit
+    from apps.core.models.tasks import Task, TaskHistory, TaskOrigin, TaskStatus, TaskType, UserTask
+    from apps.core.models.tasks.system import System
+
+    # En las BD reales la columna acepta NULL (tareas sin terminar) aunque el
+    # modelo no lo declare; las tablas sintéticas deben reflejarlo.
+    Task._meta.get_field('actual_completion_date').null = True
+
+    with connection.schema_editor() as editor:
+        for model in (
+            Agency, System, TaskType, TaskStatus, TaskOrigin, UserGcli, Project, Visit, Client,
+            Evaluation, Task, TaskHistory, UserTask,
+        ):
+            editor.create_model(model)
+        editor.execute('CREATE INDEX historial_tarea_tarea ON historial_tarea (id_tarea, fecha_registro)')
+        editor.execute('CREATE INDEX tarea_usuario_username ON tarea_usuario (username_sso)')
+        # La paginación por cursor de detalles recorre (fecha_limite, id_tarea)
+        editor.execute('CREATE INDEX tarea_fecha_limite ON tarea (fecha_limite, id_tarea)')
+
+
+def populate(history_rows, histories_per_task=10, user_share=0.2, seed=0):
+    """
+    Inserta history_rows filas de historial_tarea repartidas en
+    history_rows / histories_per_task tareas; user_share de ellas quedan
+    asignadas a USER_RUT. Retorna la cantidad de tareas.
+    """
+    from django.db import connection
+
+    rng = random.Random(seed)
+    n_tasks = max(1, history_rows // histories_per_task)
+    # Naive en UTC, igual que Django guarda los datetime en SQLite: con offset
+    # las comparaciones de texto de SQLite no coinciden con las del ORM
+    today = datetime.combine(datetime.now(timezone.utc).date(), time(12))
+
+    with connection.cursor() as cursor:
+        cursor.executemany('INSERT INTO sistema VALUES (%s, %s)', [(1, 'GCI'), (2, 'Otro')])
+        cursor.executemany(
+            'INSERT INTO tipo_tarea VALUES (%s, %s, %s, %s, %s)',
+            [(1, 'Seguimiento', 1, 1, None), (2, 'Llamado', 1, 1, None)]
+        )
+        cursor.executemany(
+            'INSERT INTO estado_tarea VALUES (%s, %s)',
+            [(1, 'Nueva'), (2, 'En Ejecución'), (3, 'Cerrada')]
+        )
+        cursor.execute("INSERT INTO origen_tarea VALUES (1, 'Manual', 1)")
+        cursor.executemany(
+            'INSERT INTO usuario (username_sso, rut_gci, cargo) VALUES (%s, %s, %s)',
+            [(str(rut), rut, 'Vendedor') for rut in range(USER_RUT, USER_RUT + 5)]
+        )
+        cursor.executemany(
+            'INSERT INTO proyecto VALUES (%s, %s)',
+            [(i, f'proyecto {i}') for i in range(1, 51)]
+        )
+        cursor.executemany(
+            'INSERT INTO visita VALUES (%s, %s)',
+            [(i, rng.choice(MEANS_IDS)) for i in range(1, n_tasks + 1)]
+        )
+        cursor.executemany(
+            'INSERT INTO cliente VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)',
+            [
+                (i, 'NATURAL' if i % 3 else 'EMPRESA', f'nombre {i}', f'apellido {i}',
+                 str(10000000 + i), 'K', str(76000000 + i), '1', f'empresa {i}')
+                for i in range(1, n_tasks + 1)
+            ]
+        )
+        cursor.executemany(
+            'INSERT INTO evaluacion VALUES (%s, %s, %s, %s, %s, %s)',
+            [
+                (i, rng.randint(1, 50), i, i, (today + timedelta(days=rng.randint(-10, 10))).date(),
+                 f'  Comentario {i}  ')
+                for i in range(1, n_tasks + 1)
+            ]
+        )
+
+        tasks = []
+        user_tasks = []
+        for task_id in range(1, n_tasks + 1):
+            due = today + timedelta(days=rng.randint(-60, 30), hours=rng.randint(-11, 11))
+            completed = None if rng.random() < 0.9 else due
+            tasks.append((
+                task_id, 1 if rng.random() < 0.95 else 2, 1 if rng.random() < 0.8 else 2, 1,
+                rng.choice([1, 1, 2, 3]), task_id, due, completed, f'Tarea {task_id}', None, task_id,
+            ))
+            owner = USER_RUT if rng.random() < user_share else USER_RUT + rng.randint(1, 4)
+            user_tasks.append((task_id, str(owner)))
+        cursor.executemany('INSERT INTO tarea VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)', tasks)
+        cursor.executemany('INSERT INTO tarea_usuario (id_tarea, username_sso) VALUES (%s, %s)', user_tasks)
+
+        batch = []
+        history_id = 0
+        for task_id in range(1, n_tasks + 1):
+            start = today - timedelta(days=90)
+            for _ in range(histories_per_task):
+                history_id += 1
+                start += timedelta(hours=rng.randint(0, 48))
+                batch.append((
+                    history_id, task_id, rng.choice([1, 2, 3]), None, start, start, None,
+                    'Historial', None, None,
+                ))
+            if len(batch) >= 50000:
+                cursor.executemany(
+                    'INSERT INTO historial_tarea VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)', batch
+                )
+                batch = []
+        if batch:
+            cursor.executemany(
+                'INSERT INTO historial_tarea VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)', batch
+            )
+    return n_tasks
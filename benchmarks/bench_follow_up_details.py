@@ -0,0 +1,144 @@
+"""
+Benchmark de FollowUpService.get_details: hidratación de modelos (versión
+original, con select_related/prefetch_related y Client/Evaluation como
+instancias) contra el pipeline de proyecciones por página.
+
+Para cada cantidad de tareas del usuario mide la latencia y el pico de memoria
+(tracemalloc) de armar todos los detalles, y verifica que ambas versiones
+retornen las mismas filas:
+
+    python benchmarks/bench_follow_up_details.py --sizes 1000 10000 100000
+"""
+import argparse
+import time
+import tracemalloc
+
+from _synthetic import USER_RUT, create_schema, populate, setup_django
+
+setup_django()
+
+from django.db import connection  # noqa: E402
+from django.db.models import Q  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from apps.core.cache import dimension_cache  # noqa: E402
+from apps.core.models.tasks import Task  # noqa: E402
+from apps.follow_up.models import Client, Evaluation  # noqa: E402
+from apps.follow_up.services import MEANS_MAP, FollowUpService  # noqa: E402
+
+
+def previous_get_details(user_rut):
+    """
+    Copia de get_details antes de los cambios de follow_up, como línea base.
+    """
+    def format_rut(rut, dv):
+        if rut:
+            rut = str(rut).replace('.', '').replace('-', '')
+            rut = '{:,}'.format(int(rut)).replace(',', '.')
+            return f"{rut}-{dv}"
+        return f""
+
+    def format_date(date):
+        if date is None:
+            return None
+        return date.strftime('%d-%m-%Y')
+
+    tasks = Task.objects.filter(
+        system_id=1,
+        task_status_id__label__in=['Nueva', 'En Ejecución'],
+        actual_completion_date__isnull=True,
+        task_type_id__label='Seguimiento',
+        task_user__sso_username__username_sso=user_rut,
+        task_user__sso_username__rut_gci=user_rut
+    ).filter(Q(due_date__lt=timezone.now().date())).select_related(
+        'task_status_id',
+        'task_type_id',
+        'system_id',
+    ).prefetch_related(
+        'task_user__sso_username',
+        'task_history'
+    )
+
+    client_ids = [task.client_gci_id.id for task in tasks if task.client_gci_id]
+    evaluation_ids = [task.evaluation_id.id for task in tasks if task.evaluation_id]
+    client_map = {client.id: client for client in Client.objects.filter(id__in=client_ids)}
+    evaluation_map = {
+        evaluation.id: evaluation
+        for evaluation in Evaluation.objects.filter(id__in=evaluation_ids).select_related('visit_id', 'project_id')
+    }
+
+    table_data = []
+    for task in tasks:
+        client = client_map.get(task.client_gci_id.id if task.client_gci_id else None)
+        evaluation = evaluation_map.get(task.evaluation_id.id if task.evaluation_id else None)
+        visit = evaluation.visit_id if evaluation else None
+        rut = "Sin Rut"
+        name = "Sin Nombre"
+        if client:
+            if client.type == 'NATURAL':
+                rut = format_rut(client.person_rut, client.person_rut_dv)
+                name = f"{client.person_name.strip()} {client.person_lastname.strip()}".strip().title()
+            else:
+                rut = format_rut(client.company_rut, client.company_rut_dv)
+                name = client.company_name.strip().title()
+        table_data.append({
+            'id': task.id,
+            'rut': rut,
+            'name': name,
+            'project': evaluation.project_id.label.strip().title() if evaluation and evaluation.project_id else None,
+            'contactDate': format_date(evaluation.recontact_date if evaluation else None),
+            'lastComment': evaluation.comment.strip().lower() if evaluation else None,
+            'means': MEANS_MAP.get(visit.input_means_id if visit else None, 'others'),
+        })
+    return {'status': 'success', 'data': table_data}
+
+
+def current_get_details(user_rut):
+    # Sin cache caliente, para medir el camino completo
+    dimension_cache.invalidate()
+    return FollowUpService.get_details(user_rut, 'overdue')
+
+
+def measure(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(USER_RUT)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    func(USER_RUT)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result['data']
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    create_schema()
+    for size in args.sizes:
+        with connection.cursor() as cursor:
+            for table in ('historial_tarea', 'tarea_usuario', 'tarea', 'evaluacion', 'cliente',
+                          'visita', 'proyecto', 'usuario', 'origen_tarea', 'estado_tarea',
+                          'tipo_tarea', 'sistema'):
+                cursor.execute(f'DELETE FROM {table}')
+        # Todas las tareas del usuario, con 3 registros de historial cada una
+        populate(size * 3, histories_per_task=3, user_share=1.0)
+
+        before, before_peak, before_rows = measure(previous_get_details, args.repeat)
+        after, after_peak, after_rows = measure(current_get_details, args.repeat)
+        key = lambda row: row['id']  # noqa: E731
+        assert sorted(before_rows, key=key) == sorted(after_rows, key=key), "Las versiones difieren"
+
+        print(f"\n=== tarea: {size} filas, detalles: {len(after_rows)} ===")
+        print(f"antes   {before * 1000:9.1f} ms  pico {before_peak / 2**20:7.1f} MiB")
+        print(f"después {after * 1000:9.1f} ms  pico {after_peak / 2**20:7.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
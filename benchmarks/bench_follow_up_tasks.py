@@ -0,0 +1,108 @@
+"""
+Benchmark de FollowUpService._get_tasks antes y después de quitar el filtro del
+"último historial" con subconsulta correlacionada.
+
+Para cada volumen de historial_tarea muestra el plan de ejecución (EXPLAIN
+QUERY PLAN de SQLite), la latencia de evaluar las tareas atrasadas de un
+usuario y verifica que ambas versiones retornen las mismas tareas:
+
+    python benchmarks/bench_follow_up_tasks.py --sizes 10000 100000 1000000
+"""
+import argparse
+import time
+
+from _synthetic import USER_RUT, create_schema, populate, setup_django
+
+setup_django()
+
+from django.db import connection  # noqa: E402
+from django.db.models import F, OuterRef, Q, Subquery  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from apps.core.models.tasks import Task  # noqa: E402
+from apps.follow_up.services import FollowUpService  # noqa: E402
+
+
+def previous_get_tasks(user_rut, date_filter):
+    """
+    Copia de _get_tasks antes del cambio, como línea base.
+    """
+    max_date_subquery = Subquery(
+        Task.objects.filter(
+            id=OuterRef('id')
+        ).order_by('-task_history__record_date').values('task_history__record_date')[:1]
+    )
+    return Task.objects.filter(
+        system_id=1,
+        task_status_id__label__in=['Nueva', 'En Ejecución'],
+        actual_completion_date__isnull=True,
+        task_type_id__label='Seguimiento',
+        task_user__sso_username__username_sso=user_rut,
+        task_user__sso_username__rut_gci=user_rut
+    ).filter(date_filter).select_related(
+        'task_status_id',
+        'task_type_id',
+    ).annotate(
+        max_task_history_date=max_date_subquery,
+    ).filter(
+        Q(task_history__record_date=F('max_task_history_date')) |
+        Q(max_task_history_date__isnull=True)
+    )
+
+
+def explain(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return '\n'.join(f"    {row[-1]}" for row in cursor.fetchall())
+
+
+def measure(queryset_factory, repeat):
+    best = None
+    ids = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ids = [task.id for task in queryset_factory()]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, ids
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    create_schema()
+    date_filter = Q(due_date__lt=timezone.now().date())
+
+    for size in args.sizes:
+        with connection.cursor() as cursor:
+            for table in ('historial_tarea', 'tarea_usuario', 'tarea', 'evaluacion', 'cliente',
+                          'visita', 'proyecto', 'usuario', 'origen_tarea', 'estado_tarea',
+                          'tipo_tarea', 'sistema'):
+                cursor.execute(f'DELETE FROM {table}')
+        n_tasks = populate(size)
+
+        print(f"\n=== historial_tarea: {size} filas, tarea: {n_tasks} filas ===")
+        previous = lambda: previous_get_tasks(USER_RUT, date_filter)  # noqa: E731
+        current = lambda: FollowUpService._get_tasks(USER_RUT, date_filter).prefetch_related(None)  # noqa: E731
+
+        print("Antes (subconsulta correlacionada):")
+        print(explain(previous()))
+        print("Después:")
+        print(explain(current()))
+
+        before, before_ids = measure(previous, args.repeat)
+        after, after_ids = measure(current, args.repeat)
+        assert set(before_ids) == set(after_ids), "Las versiones retornan tareas distintas"
+        print(
+            f"antes {before * 1000:9.1f} ms ({len(before_ids)} filas, "
+            f"{len(before_ids) - len(set(before_ids))} duplicadas)"
+        )
+        print(f"después {after * 1000:7.1f} ms ({len(after_ids)} filas)")
+
+
+if __name__ == '__main__':
+    main()
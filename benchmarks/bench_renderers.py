@@ -0,0 +1,54 @@
+"""
+Benchmark de ORJSONRenderer contra el JSONRenderer de DRF sobre la respuesta
+de FollowUpService.get_details con datos sintéticos:
+
+    python benchmarks/bench_renderers.py --rows 10000
+"""
+import argparse
+import json
+import time
+
+from _synthetic import USER_RUT, create_schema, populate, setup_django
+
+setup_django()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from apps.core.renderers import ORJSONRenderer, orjson  # noqa: E402
+from apps.follow_up.services import FollowUpService  # noqa: E402
+
+
+def measure(renderer, data, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = renderer.render(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, body
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    create_schema()
+    # Con todas las tareas del usuario, algo más de un tercio quedan atrasadas
+    populate(args.rows * 3 * 3, histories_per_task=3, user_share=1.0)
+    data = FollowUpService.get_details(USER_RUT, 'overdue')
+    data['data'] = data['data'][:args.rows]
+
+    stock, stock_body = measure(JSONRenderer(), data, args.repeat)
+    fast, fast_body = measure(ORJSONRenderer(), data, args.repeat)
+    assert json.loads(stock_body) == json.loads(fast_body), "Las respuestas difieren"
+    assert stock_body == fast_body, "Los bytes difieren"
+
+    print(f"filas: {len(data['data'])}, cuerpo: {len(stock_body) / 1024:.0f} KiB, orjson {orjson.__version__ if orjson else 'no instalado'}")
+    print(f"JSONRenderer   {stock * 1000:7.2f} ms")
+    print(f"ORJSONRenderer {fast * 1000:7.2f} ms ({stock / fast:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
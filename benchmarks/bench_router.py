@@ -0,0 +1,85 @@
+"""
+Micro-benchmark del costo de enrutamiento por query de AgencyDatabaseRouter.
+
+Compara el enrutamiento memoizado con la versión anterior, que en cada llamada
+reconstruía el alias con agency.name.lower() y pasaba por
+get_dynamic_db_connection. No requiere MySQL:
+
+    python benchmarks/bench_router.py [--iterations 200000]
+"""
+import argparse
+import os
+import sys
+import timeit
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django
+from django.conf import settings
+from django.db import connections
+
+settings.configure(
+    INSTALLED_APPS=['apps.core'],
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+    DATABASE_ROUTERS=['apps.core.routers.databases.AgencyDatabaseRouter'],
+    USE_TZ=True,
+    TIME_ZONE='UTC',
+    TENANT_REPLICA_HOSTS={'gci': None, 'gcli': None},
+)
+django.setup()
+
+from apps.core.models import Client, Evaluation  # noqa: E402
+from apps.core.models.tasks import Task  # noqa: E402
+from apps.core.pool import TenantConnectionPool  # noqa: E402
+from apps.core.registry import AgencyEntry  # noqa: E402
+from apps.core.routers.databases import AgencyDatabaseRouter  # noqa: E402
+from apps.core.services import DatabasesUtils  # noqa: E402
+
+
+class PreviousAgencyDatabaseRouter:
+    """
+    Copia del router antes de memoizar, como línea base.
+    """
+    def db_for_read(self, model, **hints):
+        agency = DatabasesUtils.get_current_agency()
+        db_type = getattr(model, 'database', 'default')
+        if db_type == 'default':
+            return 'default'
+        if agency and db_type in ['gci', 'gcli']:
+            db_alias = f"{db_type}_{agency.name.lower()}"
+            DatabasesUtils.get_dynamic_db_connection(db_alias)
+            return db_alias
+        return 'default'
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=200000)
+    args = parser.parse_args()
+
+    agency = AgencyEntry.from_agency(SimpleNamespace(id=1, name='Besalco'))
+    # Alias en SQLite para medir solo el enrutamiento, sin conectarse a MySQL.
+    for db_alias in (agency.gci_alias, agency.gcli_alias):
+        connections.settings[db_alias] = dict(
+            TenantConnectionPool.build_settings(db_alias),
+            ENGINE='django.db.backends.sqlite3',
+            NAME=':memory:',
+            TIME_ZONE=None,
+        )
+    models = (Task, Evaluation, Client)
+
+    with DatabasesUtils.tenant_context(agency):
+        for router in (PreviousAgencyDatabaseRouter(), AgencyDatabaseRouter()):
+            def route():
+                for model in models:
+                    router.db_for_read(model)
+
+            route()
+            elapsed = min(timeit.repeat(route, number=args.iterations // len(models), repeat=5))
+            per_call = elapsed / args.iterations * 1e9
+            print(f"{type(router).__name__:<32} {per_call:8.1f} ns por db_for_read")
+
+
+if __name__ == '__main__':
+    main()
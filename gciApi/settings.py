@@ -45,7 +45,9 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.middleware.common.CommonMiddleware',
     'apps.core.middlewares.kong.KongHeadersMiddleware',
+    'apps.core.middlewares.identity.IdentityMiddleware',
     'apps.core.middlewares.databases.DynamicDatabaseMiddleware',
+    'apps.core.middlewares.timing.ServerTimingMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -85,6 +87,119 @@ DATABASES = {
 
 DATABASE_ROUTERS = ['apps.core.routers.databases.AgencyDatabaseRouter']
 
+# Registro en memoria de la tabla inmobiliarias (ver apps.core.registry).
+# TTL en segundos de la tabla cacheada y tiempo mínimo entre recargas
+# provocadas por un id de inmobiliaria desconocido.
+AGENCY_REGISTRY_TTL = int(os.environ.get('AGENCY_REGISTRY_TTL', 300))
+AGENCY_REGISTRY_MISS_RELOAD = int(os.environ.get('AGENCY_REGISTRY_MISS_RELOAD', 30))
+
+# Pool de conexiones a las BD de inmobiliarias (ver apps.core.pool).
+# Máximo de conexiones abiertas por thread, segundos de inactividad antes de
+# cerrar una conexión y CONN_MAX_AGE de los alias gci_*/gcli_*.
+TENANT_POOL_MAX_CONNECTIONS = int(os.environ.get('TENANT_POOL_MAX_CONNECTIONS', 20))
+TENANT_POOL_IDLE_TIMEOUT = int(os.environ.get('CONNECTION_TIMEOUT', 300))
+TENANT_CONN_MAX_AGE = int(os.environ.get('TENANT_CONN_MAX_AGE', 600))
+
+# Réplicas de lectura por familia de BD de inmobiliarias. Si se define el host,
+# las lecturas fuera de transacción van a la réplica mientras su retraso no
+# supere TENANT_REPLICA_MAX_LAG segundos (ver apps.core.replicas).
+TENANT_REPLICA_HOSTS = {
+    'gci': os.environ.get('DB_HOST_GCI_REPLICA'),
+    'gcli': os.environ.get('DB_HOST_GCLI_REPLICA'),
+}
+TENANT_REPLICA_MAX_LAG = float(os.environ.get('TENANT_REPLICA_MAX_LAG', 5))
+TENANT_REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('TENANT_REPLICA_LAG_CHECK_INTERVAL', 10))
+
+# Ejecución de una misma función sobre varias inmobiliarias en paralelo
+# (ver apps.core.fanout): threads simultáneos y timeout por inmobiliaria.
+FAN_OUT_MAX_WORKERS = int(os.environ.get('FAN_OUT_MAX_WORKERS', 8))
+FAN_OUT_TIMEOUT = float(os.environ.get('FAN_OUT_TIMEOUT', 10))
+
+# Verificación local de access tokens (ver apps.core.middlewares.identity):
+# con JWT_REQUIRED los requests sin Authorization: Bearer responden 401 en vez
+# de usar los headers de Kong. Máximo de tokens verificados en cache.
+JWT_REQUIRED = os.environ.get('JWT_REQUIRED', 'false').lower() == 'true'
+JWT_VERIFIED_CACHE_MAX_ENTRIES = int(os.environ.get('JWT_VERIFIED_CACHE_MAX_ENTRIES', 10000))
+
+# Rotación de refresh tokens (ver apps.authentication.revocation): segundos
+# entre limpiezas de los registros vencidos de token_revocado.
+REFRESH_REVOCATION_PRUNE_INTERVAL = float(os.environ.get('REFRESH_REVOCATION_PRUNE_INTERVAL', 3600))
+
+# Header Server-Timing con queries y tiempo por alias de BD, vista y render
+# (ver apps.core.middlewares.timing).
+SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'true').lower() == 'true'
+
+# Cache en memoria de dimensiones de gci (clientes, proyecto y medio de entrada
+# de cada evaluación) usadas junto a las tareas de gcli (ver apps.core.cache):
+# máximo de filas y TTL en segundos. El comentario y la fecha de recontacto de
+# la evaluación cambian con cada gestión y no se cachean.
+DIMENSION_CACHE_MAX_ENTRIES = int(os.environ.get('DIMENSION_CACHE_MAX_ENTRIES', 10000))
+DIMENSION_CACHE_TTL = int(os.environ.get('DIMENSION_CACHE_TTL', 300))
+
+# Segundos tras los cuales cambia el ETag de summary, details y overview aunque
+# no haya historial nuevo, porque los comentarios y fechas de recontacto de gci
+# no dejan registro en historial_tarea (ver FollowUpService.get_validator).
+FOLLOW_UP_ETAG_TTL = int(os.environ.get('FOLLOW_UP_ETAG_TTL', 60))
+
+# TTL en segundos del catálogo glosa -> id de estado_tarea, tipo_tarea,
+# origen_tarea y sistema (ver apps.core.catalog).
+LABEL_CATALOG_TTL = int(os.environ.get('LABEL_CATALOG_TTL', 300))
+
+# Paginación por cursor de /follow-up/details/: tareas por página por defecto
+# y máximo aceptado en page_size. Sin page_size la respuesta se envía en
+# streaming, leyendo de a FOLLOW_UP_MAX_PAGE_SIZE tareas.
+FOLLOW_UP_PAGE_SIZE = int(os.environ.get('FOLLOW_UP_PAGE_SIZE', 100))
+FOLLOW_UP_MAX_PAGE_SIZE = int(os.environ.get('FOLLOW_UP_MAX_PAGE_SIZE', 500))
+
+# /follow-up/histogram/: máximo de días futuros (un tramo por día) y mayor
+# borde de atraso aceptado en aging.
+FOLLOW_UP_HISTOGRAM_MAX_DAYS = int(os.environ.get('FOLLOW_UP_HISTOGRAM_MAX_DAYS', 60))
+FOLLOW_UP_HISTOGRAM_MAX_AGING_DAYS = int(os.environ.get('FOLLOW_UP_HISTOGRAM_MAX_AGING_DAYS', 3650))
+
+# Máximo de usuarios por llamada a /follow-up/team-summary/, y cargos de gcli
+# (usuario.cargo, separados por coma) que pueden ver el resumen de otros
+# usuarios. Vacío, cualquier usuario autenticado puede, y el acceso queda a
+# cargo de las reglas del gateway.
+FOLLOW_UP_TEAM_MAX_USERS = int(os.environ.get('FOLLOW_UP_TEAM_MAX_USERS', 500))
+FOLLOW_UP_TEAM_MANAGER_POSITIONS = [
+    position.strip().lower()
+    for position in os.environ.get('FOLLOW_UP_TEAM_MANAGER_POSITIONS', '').split(',')
+    if position.strip()
+]
+
+# Origen del resumen de /follow-up/summary/: 'live' lo calcula desde tarea y
+# 'counters' lo lee de los contadores materializados que mantiene el comando
+# follow_up_counters (ver apps.follow_up.counters).
+FOLLOW_UP_SUMMARY_SOURCE = os.environ.get('FOLLOW_UP_SUMMARY_SOURCE', 'live')
+# Ids de historial_tarea bajo la marca de agua que cada sincronización vuelve a
+# aplicar, por transacciones que confirman después de otras con ids mayores.
+FOLLOW_UP_COUNTERS_LAG_WINDOW = int(os.environ.get('FOLLOW_UP_COUNTERS_LAG_WINDOW', 200))
+
+# /follow-up/events/ (Server-Sent Events): segundos entre pasadas del poller de
+# cada inmobiliaria y entre comentarios keepalive sin cambios
+# (ver apps.follow_up.events).
+FOLLOW_UP_EVENTS_INTERVAL = float(os.environ.get('FOLLOW_UP_EVENTS_INTERVAL', 5))
+FOLLOW_UP_EVENTS_HEARTBEAT = float(os.environ.get('FOLLOW_UP_EVENTS_HEARTBEAT', 15))
+# Cada stream termina a los FOLLOW_UP_EVENTS_MAX_DURATION segundos y el navegador
+# se reconecta. En WSGI cada stream ocupa un thread del servidor, así que se
+# aceptan a lo más FOLLOW_UP_EVENTS_MAX_WSGI_STREAMS por proceso (el resto recibe
+# 503). En ASGI los streams esperan en el event loop sin ocupar threads y no se
+# limitan: para muchos clientes simultáneos los eventos deben servirse por ASGI.
+FOLLOW_UP_EVENTS_MAX_DURATION = float(os.environ.get('FOLLOW_UP_EVENTS_MAX_DURATION', 300))
+FOLLOW_UP_EVENTS_MAX_WSGI_STREAMS = int(os.environ.get('FOLLOW_UP_EVENTS_MAX_WSGI_STREAMS', 4))
+
+# Consultas independientes de un mismo request (por ejemplo clientes y
+# evaluaciones en gci) en paralelo, en un pool compartido de threads con
+# conexiones propias (ver apps.core.concurrent). Desactivado por defecto.
+CONCURRENT_QUERIES_ENABLED = os.environ.get('CONCURRENT_QUERIES_ENABLED', 'false').lower() == 'true'
+CONCURRENT_QUERIES_MAX_WORKERS = int(os.environ.get('CONCURRENT_QUERIES_MAX_WORKERS', 4))
+
+# Precalentado de conexiones de cada worker de gunicorn después del fork y antes
+# de atender requests (hook post_worker_init de gunicorn.conf.py, ver
+# apps.core.warmup y el comando warm_tenants).
+WARM_TENANTS_ON_STARTUP = os.environ.get('WARM_TENANTS_ON_STARTUP', 'false').lower() == 'true'
+WARM_TENANTS_MAX_WORKERS = int(os.environ.get('WARM_TENANTS_MAX_WORKERS', 8))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
@@ -128,6 +243,16 @@ MIGRATION_MODULES = DisableMigrations()
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # JSON con orjson (ver apps.core.renderers); sin orjson se comportan como los de DRF
+    'DEFAULT_RENDERER_CLASSES': (
+        'apps.core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'apps.core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_AUTHENTICATION_CLASSES': (),
     'DEFAULT_PERMISSION_CLASSES': (),
     'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.URLPathVersioning',
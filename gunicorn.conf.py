@@ -0,0 +1,13 @@
+# Configuración de gunicorn, que la carga desde el directorio de trabajo.
+
+
+def post_worker_init(worker):
+    """
+    Precalienta las conexiones de inmobiliarias (WARM_TENANTS_ON_STARTUP) en
+    cada worker, después del fork y antes de que atienda requests. Solo el
+    worker sync atiende los requests en este mismo thread; en los demás
+    (gthread, uvicorn) las conexiones solo se verifican.
+    """
+    from apps.core.warmup import warm_on_startup
+
+    warm_on_startup(keep=type(worker).__name__ == 'SyncWorker')